@@ -0,0 +1,232 @@
+"""
+Admission control of solve requests against per-worker budgets.
+
+The cost of a solve is estimated from the connectivity of the request before
+anything is allocated. Requests are routed to the fastest solver within the
+memory budget, queued while other solves hold the memory they need, and
+rejected when they can never fit or do not get memory in time.
+
+    FEA_WORKER_MEMORY_MB     memory budget of a worker (default the memory
+                             fraction of the solver profile of the memory
+                             available at startup)
+    FEA_MAX_SOLVE_SECONDS    largest estimated solve time (default 60)
+    FEA_ADMISSION_TIMEOUT    longest wait for memory in seconds (default 10)
+"""
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+from fastapi import HTTPException
+
+from fea.truss import banded, solver
+from fea.truss.truss import is_planar
+
+log = logging.getLogger(__name__)
+
+# Python objects of the nodes and elements, in bytes.
+NODE_OVERHEAD = 512
+ELEMENT_OVERHEAD = 2048
+
+
+class AdmissionError(Exception):
+    def __init__(self, status_code, detail, retry_after=None):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+def rejection(e):
+    headers = None
+    if e.retry_after is not None:
+        headers = {'Retry-After': str(e.retry_after)}
+    return HTTPException(
+        status_code=e.status_code,
+        detail=e.detail,
+        headers=headers,
+    )
+
+
+def request_stats(nodal_coords, connectivity, force_vector=(), planar=None):
+    """
+    Size, number of nonzeros and half bandwidth of the stiffness matrix of
+    a truss, from its node and connectivity dictionaries and its loads.
+    """
+    if planar is None:
+        planar = is_planar(nodal_coords, force_vector)
+    DOF = 2 if planar else 3
+    index = {id: i for i, id in enumerate(nodal_coords)}
+    try:
+        pairs = np.array([
+            (index[c['i']], index[c['j']]) for c in connectivity.values()
+        ], dtype=np.int64).reshape(-1, 2)
+    except KeyError as e:
+        raise AdmissionError(422, f'Node {e} is not defined.')
+    return banded.matrix_stats(pairs, len(index), DOF)
+
+
+class AdmissionController():
+    """
+    AdmissionController class, admit solve requests within the memory and
+    time budgets of a worker.
+
+    ...
+
+    Attributes
+    ----------
+    memory : float
+        Memory budget of the worker [bytes].
+    time : float
+        Largest estimated solve time admitted [s].
+    timeout : float
+        Longest time a request waits for memory [s].
+    profile : dict
+        Solver profile used for the estimates.
+    in_use : float
+        Memory reserved by the solves in progress [bytes].
+
+    Methods
+    -------
+    plan(nodal_coords, connectivity, force_vector, planar, solvers)
+    plan_stats(n_dof, nnz, bandwidth, n_nodes, n_elements, solvers)
+    admit(memory)
+    from_env()
+
+    """
+
+    def __init__(self, memory=None, time=60, timeout=10, profile=None):
+        self.profile = profile or solver.load_profile()
+        if memory is None:
+            available = solver.available_memory()
+            if available:
+                memory = available * self.profile['memory_fraction']
+        self.memory = memory
+        self.time = time
+        self.timeout = timeout
+        self.in_use = 0
+        self._condition = threading.Condition()
+
+    @classmethod
+    def from_env(cls):
+        memory = os.environ.get('FEA_WORKER_MEMORY_MB')
+        return cls(
+            memory=float(memory) * 2**20 if memory else None,
+            time=float(os.environ.get('FEA_MAX_SOLVE_SECONDS', 60)),
+            timeout=float(os.environ.get('FEA_ADMISSION_TIMEOUT', 10)),
+        )
+
+    def plan(
+        self,
+        nodal_coords,
+        connectivity,
+        force_vector=(),
+        planar=None,
+        solvers=None
+    ):
+        """
+        Estimate the cost of solving a truss with each solver, or each of
+        solvers, and select the fastest one within the budgets. Raises an
+        AdmissionError with status 413 if no solver fits.
+        """
+        n_dof, nnz, bandwidth = request_stats(
+            nodal_coords, connectivity, force_vector, planar
+        )
+        return self.plan_stats(
+            n_dof,
+            nnz,
+            bandwidth,
+            len(nodal_coords),
+            len(connectivity),
+            solvers,
+        )
+
+    def plan_stats(
+        self,
+        n_dof,
+        nnz,
+        bandwidth,
+        n_nodes=0,
+        n_elements=0,
+        solvers=None
+    ):
+        """
+        plan from the size, number of nonzeros and half bandwidth of the
+        stiffness matrix of a truss with n_nodes nodes and n_elements
+        elements.
+        """
+        overhead = NODE_OVERHEAD * n_nodes + ELEMENT_OVERHEAD * n_elements
+        estimates = {}
+        for method in solvers or solver.SOLVERS:
+            memory, seconds = solver.estimate(
+                method, n_dof, nnz, bandwidth, self.profile
+            )
+            estimates[method] = (memory + overhead, seconds)
+
+        fits = [
+            m for m, (memory, _) in estimates.items()
+            if self.memory is None or memory <= self.memory
+        ]
+        if not fits:
+            leanest = min(estimates.values())[0]
+            raise AdmissionError(
+                413,
+                f'Truss with {n_dof} degrees of freedom needs at least '
+                f'{leanest / 2**20:.0f} MB, more than the '
+                f'{self.memory / 2**20:.0f} MB available to a worker.',
+            )
+
+        method = min(fits, key=lambda m: estimates[m][1])
+        memory, seconds = estimates[method]
+        if self.time is not None and seconds > self.time:
+            raise AdmissionError(
+                413,
+                f'Truss with {n_dof} degrees of freedom has an estimated '
+                f'solve time of {seconds:.0f} s, more than the limit of '
+                f'{self.time:.0f} s.',
+            )
+
+        log.info(
+            f'Admitting {n_dof} degrees of freedom with the {method} solver, '
+            f'estimated {memory / 2**20:.1f} MB and {seconds:.3f} s.'
+        )
+        return {
+            'solver': method,
+            'n_dof': n_dof,
+            'nnz': nnz,
+            'bandwidth': bandwidth,
+            'estimated_memory': memory,
+            'estimated_time': seconds,
+        }
+
+    @contextmanager
+    def admit(self, memory):
+        """
+        Reserve memory for the duration of a solve, waiting for solves in
+        progress to release it. Raises an AdmissionError with status 503 if
+        it is not released in time.
+        """
+        if self.memory is not None:
+            deadline = time.monotonic() + self.timeout
+            with self._condition:
+                while self.in_use and self.in_use + memory > self.memory:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise AdmissionError(
+                            503,
+                            'Server busy, not enough memory is free for '
+                            'this truss. Retry later.',
+                            retry_after=max(1, int(self.timeout)),
+                        )
+                    self._condition.wait(remaining)
+                self.in_use += memory
+
+        try:
+            yield
+        finally:
+            if self.memory is not None:
+                with self._condition:
+                    self.in_use -= memory
+                    self._condition.notify_all()
@@ -0,0 +1,180 @@
+"""
+Micro-batching of the linear solves of small concurrent truss requests.
+
+Requests arriving within a short window are grouped by the size of their
+reduced system, padded to a common size and solved with one stacked
+np.linalg.solve call per group. Enabled by setting FEA_BATCH_WINDOW.
+
+    FEA_BATCH_WINDOW   collection window [ms]
+    FEA_BATCH_SIZE     maximum number of systems per batch (default 32)
+    FEA_BATCH_MAX_DOF  largest truss, in degrees of freedom, to batch
+                       (default 600)
+    FEA_BATCH_STEP     systems are padded to a multiple of this size
+                       (default 12)
+"""
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+log = logging.getLogger(__name__)
+
+
+def pad_size(n, step):
+    return -(-n // step) * step
+
+
+def batched_solve(systems, step=1):
+    """
+    Solve a list of (K, F) systems, F of shape (n, 1), with one stacked
+    solve per padded size. Padding adds identity equations, which leave the
+    solution unchanged. Returns the solution, or the exception raised, of
+    each system.
+    """
+    groups = {}
+    for index, (K, F) in enumerate(systems):
+        groups.setdefault(pad_size(len(F), step), []).append(index)
+
+    results = [None] * len(systems)
+    for m, indices in groups.items():
+        sizes = np.array([len(systems[index][1]) for index in indices])
+        if (sizes == m).all():
+            K_stack = np.stack([systems[index][0] for index in indices])
+            F_stack = np.stack([systems[index][1] for index in indices])
+        else:
+            K_stack = np.zeros([len(indices), m, m])
+            F_stack = np.zeros([len(indices), m, 1])
+            for b, index in enumerate(indices):
+                K, F = systems[index]
+                K_stack[b, :len(F), :len(F)] = K
+                F_stack[b, :len(F)] = F
+            diagonal = np.arange(m)
+            K_stack[:, diagonal, diagonal] += diagonal >= sizes[:, None]
+
+        try:
+            Q_stack = np.linalg.solve(K_stack, F_stack)
+        except np.linalg.LinAlgError:
+            # One singular system fails the whole stack, solve one by one.
+            for index in indices:
+                try:
+                    results[index] = np.linalg.solve(*systems[index])
+                except np.linalg.LinAlgError as e:
+                    results[index] = e
+            continue
+
+        for b, (index, n) in enumerate(zip(indices, sizes)):
+            results[index] = Q_stack[b, :n]
+
+    return results
+
+
+class BatchDispatcher():
+    """
+    BatchDispatcher class, collect the reduced systems of concurrent
+    requests and solve them in batches on a background thread.
+
+    ...
+
+    Attributes
+    ----------
+    window : float
+        Time to collect systems after the first one arrives [s].
+    max_batch : int
+        Maximum number of systems solved in one batch.
+    max_dof : int
+        Largest truss, in degrees of freedom, worth batching.
+    step : int
+        Systems are padded to a multiple of step equations.
+    batches : int
+        Number of batches solved.
+    solved : int
+        Number of systems solved.
+
+    Methods
+    -------
+    accepts(n_dof)
+    submit(K, F)
+    solve(K, F)
+    from_env()
+
+    """
+
+    def __init__(self, window=0.002, max_batch=32, max_dof=600, step=12):
+        self.window = window
+        self.max_batch = max_batch
+        self.max_dof = max_dof
+        self.step = step
+        self.batches = 0
+        self.solved = 0
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        window = os.environ.get('FEA_BATCH_WINDOW')
+        if not window:
+            return None
+        return cls(
+            window=float(window) / 1000,
+            max_batch=int(os.environ.get('FEA_BATCH_SIZE', 32)),
+            max_dof=int(os.environ.get('FEA_BATCH_MAX_DOF', 600)),
+            step=int(os.environ.get('FEA_BATCH_STEP', 12)),
+        )
+
+    def accepts(self, n_dof):
+        return n_dof <= self.max_dof
+
+    def submit(self, K, F):
+        with self._lock:
+            if self._thread is None:
+                log.info(
+                    f'Starting batch dispatcher, window {self.window}s, '
+                    f'batches of up to {self.max_batch}.'
+                )
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+
+        future = Future()
+        self._queue.put((K, F, future))
+        return future
+
+    def solve(self, K, F):
+        return self.submit(K, F).result()
+
+    def collect(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self.collect()
+            log.debug(f'Solving a batch of {len(batch)} systems.')
+            try:
+                results = batched_solve(
+                    [(K, F) for K, F, _ in batch],
+                    self.step,
+                )
+            except Exception as e:
+                results = [e] * len(batch)
+
+            self.batches += 1
+            self.solved += len(batch)
+            for (_, _, future), result in zip(batch, results):
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
@@ -0,0 +1,308 @@
+"""
+Load-generation harness for the /truss api.
+
+Starts the api under uvicorn or gunicorn (or targets an already running
+server), posts a weighted mix of generated trusses at a fixed concurrency and
+reports throughput and latency percentiles per model size.
+
+    python -m api.loadtest --server gunicorn --workers 4 --concurrency 32
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import numpy as np
+import requests
+from rich.console import Console
+from rich.table import Table
+
+from fea.truss.generator import generate_truss
+from .routers.truss import convert_to_list
+
+log = logging.getLogger(__name__)
+
+DEFAULT_MIX = '1:60,10:30,100:10'
+
+
+def parse_mix(mix):
+    """
+    Parse a model mix of the form 'bays:weight,bays:weight,...'.
+    """
+    parsed = []
+    for item in mix.split(','):
+        bays, _, weight = item.partition(':')
+        parsed.append((int(bays), float(weight or 1)))
+
+    if not parsed or any(b < 1 or w <= 0 for b, w in parsed):
+        raise ValueError(f'Invalid model mix: {mix}')
+
+    return parsed
+
+
+def to_payload(truss):
+    return {
+        'matProp': convert_to_list(truss['mat_prop'], 'ele'),
+        'nodalCoords': convert_to_list(truss['nodal_coords'], 'id'),
+        'connectivity': convert_to_list(truss['connectivity'], 'id'),
+        'forceVector': truss['force_vector'],
+        'boundaryConditions': truss['boundary_conditions'],
+    }
+
+
+def build_payloads(mix, spatial=False):
+    payloads = {}
+    for bays, weight in mix:
+        truss = generate_truss(bays, spatial=spatial)
+        label = f'{len(truss["nodal_coords"])} nodes'
+        payloads[label] = {
+            'weight': weight,
+            'body': json.dumps(to_payload(truss)),
+        }
+
+    return payloads
+
+
+def summarize(samples, elapsed):
+    """
+    Summarize (label, latency, ok) samples into per-label statistics.
+
+    Latencies are reported in milliseconds.
+    """
+    summary = {}
+    groups = {'all': samples}
+    labels = sorted(
+        {s[0] for s in samples},
+        key=lambda label: [int(t) if t.isdigit() else t for t in label.split()]
+    )
+    for label in labels:
+        groups[label] = [s for s in samples if s[0] == label]
+
+    for label, group in groups.items():
+        latencies = np.array([s[1] for s in group if s[2]]) * 1000
+        errors = sum(1 for s in group if not s[2])
+        stats = {
+            'requests': len(group),
+            'errors': errors,
+            'rps': len(group) / elapsed if elapsed > 0 else 0.0,
+        }
+        for p in (50, 95, 99):
+            stats[f'p{p}'] = (
+                float(np.percentile(latencies, p)) if len(latencies) else None
+            )
+        summary[label] = stats
+
+    return summary
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_server(server, workers, host, port):
+    if server == 'uvicorn':
+        cmd = [
+            sys.executable, '-m', 'uvicorn', 'api.main:fea_app',
+            '--host', host,
+            '--port', str(port),
+            '--workers', str(workers),
+            '--log-level', 'warning',
+        ]
+    elif server == 'gunicorn':
+        cmd = [
+            sys.executable, '-m', 'gunicorn', 'api.main:fea_app',
+            '-w', str(workers),
+            '-k', 'uvicorn.workers.UvicornWorker',
+            '--bind', f'{host}:{port}',
+            '--log-level', 'warning',
+        ]
+    else:
+        raise ValueError(f'Unknown server: {server}')
+
+    log.info(f'Starting {server} with {workers} workers on {host}:{port}.')
+    return subprocess.Popen(cmd)
+
+
+def wait_for_server(url, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(url, timeout=1).status_code == 200:
+                return
+        except requests.ConnectionError:
+            pass
+        time.sleep(0.2)
+
+    raise TimeoutError(f'Server at {url} did not start within {timeout}s.')
+
+
+def run_load(url, payloads, concurrency, duration, requests_limit, seed=0):
+    labels = list(payloads)
+    weights = [payloads[label]['weight'] for label in labels]
+    headers = {'Content-Type': 'application/json'}
+    samples = []
+    lock = threading.Lock()
+    sent = [0]
+    deadline = time.monotonic() + duration
+
+    def worker(worker_index):
+        rng = random.Random(seed + worker_index)
+        session = requests.Session()
+        while time.monotonic() < deadline:
+            with lock:
+                if requests_limit and sent[0] >= requests_limit:
+                    return
+                sent[0] += 1
+
+            label = rng.choices(labels, weights)[0]
+            start = time.perf_counter()
+            try:
+                response = session.post(
+                    f'{url}/truss/',
+                    data=payloads[label]['body'],
+                    headers=headers,
+                )
+                ok = response.status_code == 200
+            except requests.RequestException:
+                ok = False
+            latency = time.perf_counter() - start
+
+            with lock:
+                samples.append((label, latency, ok))
+
+    log.info(f'Sending load with concurrency {concurrency}.')
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(worker, range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    return samples, elapsed
+
+
+def print_summary(summary, baseline=None):
+    table = Table(title='Truss api load test')
+    for column in ('model', 'requests', 'errors', 'rps', 'p50 ms', 'p95 ms',
+                   'p99 ms'):
+        table.add_column(column, justify='right')
+
+    def fmt(label, key):
+        value = summary[label][key]
+        if value is None:
+            return '-'
+        text = f'{value:.1f}'
+        previous = (baseline or {}).get(label, {}).get(key)
+        if previous:
+            text += f' ({(value - previous) / previous:+.0%})'
+        return text
+
+    for label in summary:
+        table.add_row(
+            label,
+            str(summary[label]['requests']),
+            str(summary[label]['errors']),
+            fmt(label, 'rps'),
+            fmt(label, 'p50'),
+            fmt(label, 'p95'),
+            fmt(label, 'p99'),
+        )
+
+    Console().print(table)
+
+
+def save_results(output_dir, config, summary):
+    os.makedirs(output_dir, exist_ok=True)
+    stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+    path = os.path.join(output_dir, f'loadtest-{stamp}.json')
+    with open(path, 'w') as f:
+        json.dump({'config': config, 'summary': summary}, f, indent=2)
+
+    log.info(f'Saved load test results to {path}.')
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument(
+        '--server', choices=['uvicorn', 'gunicorn'], default='uvicorn',
+    )
+    parser.add_argument(
+        '--url', help='Target an already running server instead.',
+    )
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument(
+        '--requests', type=int, default=0,
+        help='Stop after this many requests (0 for no limit).',
+    )
+    parser.add_argument(
+        '--mix', default=DEFAULT_MIX,
+        help='Weighted model sizes as bays:weight,...',
+    )
+    parser.add_argument('--spatial', action='store_true')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='loadtest-results')
+    parser.add_argument(
+        '--compare', help='Previous results file to compare against.',
+    )
+    args = parser.parse_args(argv)
+
+    mix = parse_mix(args.mix)
+    payloads = build_payloads(mix, spatial=args.spatial)
+
+    process = None
+    url = args.url
+    if url is None:
+        port = args.port or free_port()
+        process = start_server(args.server, args.workers, args.host, port)
+        url = f'http://{args.host}:{port}'
+
+    try:
+        wait_for_server(f'{url}/')
+        samples, elapsed = run_load(
+            url,
+            payloads,
+            args.concurrency,
+            args.duration,
+            args.requests,
+            seed=args.seed,
+        )
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    summary = summarize(samples, elapsed)
+    config = {
+        'server': None if args.url else args.server,
+        'url': args.url,
+        'workers': None if args.url else args.workers,
+        'concurrency': args.concurrency,
+        'duration': elapsed,
+        'mix': args.mix,
+        'spatial': args.spatial,
+    }
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['summary']
+
+    print_summary(summary, baseline)
+    save_results(args.output, config, summary)
+
+
+if __name__ == '__main__':
+    main()
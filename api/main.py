@@ -1,7 +1,7 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from .routers import truss
+from .routers import models, truss
 
 fea_app = FastAPI(
     title='fea-app api',
@@ -41,3 +41,8 @@ fea_app.include_router(
     truss.router,
     prefix='/truss',
 )
+
+fea_app.include_router(
+    models.router,
+    prefix='/truss/models',
+)
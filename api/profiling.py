@@ -0,0 +1,116 @@
+"""
+Opt-in CPU and allocation profiling of solve requests.
+
+A request is profiled when it carries the admin header X-FEA-Profile with
+the token in FEA_PROFILE_TOKEN, or when it is sampled from live traffic.
+Sampling is bounded: at most a fraction FEA_PROFILE_RATE of the requests,
+never more than MAX_RATE, and at most one every FEA_PROFILE_INTERVAL
+seconds. A profiled request is solved without batching, and gets the id of
+its profile in the X-FEA-Profile response header. See
+fea.truss.profiling.profile for the artifacts.
+
+    FEA_PROFILE_DIR       directory of the profiles (default
+                          ~/.fea/profiles)
+    FEA_PROFILE_TOKEN     token of the admin header, profiling on request is
+                          disabled without it
+    FEA_PROFILE_RATE      fraction of the requests sampled (default 0)
+    FEA_PROFILE_INTERVAL  shortest time between sampled profiles [s]
+                          (default 60)
+"""
+import hmac
+import logging
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+from fea.truss import profiling
+
+log = logging.getLogger(__name__)
+
+# Largest fraction of live traffic that can be sampled.
+MAX_RATE = 0.05
+
+
+class RequestProfiler():
+    """
+    RequestProfiler class, select the requests to profile on the admin
+    header or by bounded sampling.
+
+    ...
+
+    Attributes
+    ----------
+    token : str
+        Token of the admin header, None to disable it.
+    rate : float
+        Fraction of the requests sampled, at most MAX_RATE.
+    interval : float
+        Shortest time between sampled profiles [s].
+    path : str
+        Directory of the profiles.
+
+    Methods
+    -------
+    selects(header)
+    profile(name, enabled)
+    from_env()
+
+    """
+
+    def __init__(self, token=None, rate=0, interval=60, path=None):
+        if rate > MAX_RATE:
+            log.warning(
+                f'Profile rate {rate} is above the limit, sampling '
+                f'{MAX_RATE} of the requests.'
+            )
+        self.token = token or None
+        self.rate = min(max(rate, 0), MAX_RATE)
+        self.interval = interval
+        self.path = path
+        self._last = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            token=os.environ.get('FEA_PROFILE_TOKEN'),
+            rate=float(os.environ.get('FEA_PROFILE_RATE', 0)),
+            interval=float(os.environ.get('FEA_PROFILE_INTERVAL', 60)),
+            path=os.environ.get('FEA_PROFILE_DIR'),
+        )
+
+    def selects(self, header=None):
+        """
+        Whether to profile a request with the given X-FEA-Profile header.
+        """
+        if header is not None:
+            if self.token and hmac.compare_digest(
+                header.encode(), self.token.encode()
+            ):
+                return True
+            log.warning('Ignoring an X-FEA-Profile header with a bad token.')
+
+        if not self.rate:
+            return False
+        with self._lock:
+            now = time.monotonic()
+            if self._last is not None and now - self._last < self.interval:
+                return False
+            if random.random() >= self.rate:
+                return False
+            self._last = now
+            return True
+
+    @contextmanager
+    def profile(self, name='truss', enabled=True):
+        """
+        Profile the block if enabled and no other profile is running. Yields
+        the report of the profile, or None.
+        """
+        if not enabled:
+            yield None
+            return
+        with profiling.profile(name, self.path, blocking=False) as report:
+            yield report
@@ -0,0 +1,165 @@
+import logging
+
+from fastapi import APIRouter, HTTPException, Query
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+from fea.truss.store import FACTORED_SOLVERS, ModelStore
+from ..admission import AdmissionError, rejection
+from . import truss
+from .truss import (
+    ForceVector,
+    Node,
+    PostProcessing,
+    Stress,
+    TrussModel,
+    convert_to_dict,
+    deformed_nodal_coords,
+    post_processing,
+    stresses,
+)
+
+log = logging.getLogger(__name__)
+
+router = APIRouter()
+
+# Models are stored under $FEA_MODEL_STORE, shared by every worker.
+store = ModelStore()
+
+
+class ModelInfo(BaseModel):
+    id: str = Field(title='Model Id')
+    solver: str = Field(title='Solver')
+    nDof: int = Field(title='Unconstrained Degrees of Freedom')
+
+
+class LoadCase(BaseModel):
+    name: str = Field(title='Load Case')
+    forceVector: List[ForceVector] = Field(title='Force Vector')
+
+
+class LoadCases(BaseModel):
+    loadCases: List[LoadCase] = Field(title='Load Cases')
+
+
+class LoadCaseResult(BaseModel):
+    name: str = Field(title='Load Case')
+    nodalCoords: List[Node] = Field(title='Deformed Nodal Coordinates')
+    stresses: List[Stress] = Field(title='Stresses')
+    postProcessing: PostProcessing = Field(title='Post Processing')
+
+
+class LoadCaseResults(BaseModel):
+    id: str = Field(title='Model Id')
+    loadCases: List[LoadCaseResult] = Field(title='Load Cases')
+
+
+@router.post(
+    '',
+    response_model=ModelInfo,
+    status_code=201
+)
+def register_model(
+    model: TrussModel,
+    planar: Optional[bool] = Query(
+        None,
+        description='Solve in the x-y plane, by default if every node is in '
+                    'it.',
+    ),
+):
+    model_dict = model.dict()
+    nodal_coords = convert_to_dict(model_dict['nodalCoords'], 'id')
+    connectivity = convert_to_dict(model_dict['connectivity'], 'id')
+
+    try:
+        # Models are factored, the memory of the factors is reserved.
+        plan = truss.admission.plan(
+            nodal_coords,
+            connectivity,
+            planar=planar,
+            solvers=FACTORED_SOLVERS,
+        )
+        with truss.admission.admit(plan['estimated_memory']):
+            id = store.register(
+                convert_to_dict(model_dict['matProp'], 'ele'),
+                nodal_coords,
+                connectivity,
+                model_dict['boundaryConditions'],
+                solver=plan['solver'],
+                planar=planar,
+            )
+            stored = store.load(id)
+    except AdmissionError as e:
+        raise rejection(e)
+    except Exception as e:
+        log.error({e})
+        raise HTTPException(
+            status_code=500,
+            detail=f'Error: {e}',
+        )
+
+    return {'id': id, 'solver': stored.solver, 'nDof': len(stored.free)}
+
+
+@router.post(
+    '/{id}/loads',
+    response_model=LoadCaseResults,
+    response_model_exclude_none=True
+)
+def solve_load_cases(id: str, load_cases: LoadCases):
+    try:
+        meta = store.meta(id)
+    except KeyError:
+        raise HTTPException(
+            status_code=404,
+            detail=f'Model {id} not found.',
+        )
+
+    cases = load_cases.dict()['loadCases']
+    try:
+        # Loading a model factors its stiffness matrix.
+        plan = truss.admission.plan_stats(
+            meta['size'],
+            meta['nnz'],
+            meta['bandwidth'],
+            len(meta['node_ids']),
+            len(meta['element_ids']),
+            solvers=[meta['solver']],
+        )
+        with truss.admission.admit(plan['estimated_memory']):
+            model = store.load(id)
+            results = model.solve([case['forceVector'] for case in cases])
+    except AdmissionError as e:
+        raise rejection(e)
+    except KeyError as e:
+        raise HTTPException(
+            status_code=422,
+            detail=f'Node {e} is not part of model {id}.',
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=422,
+            detail=f'{e}',
+        )
+    except Exception as e:
+        log.error({e})
+        raise HTTPException(
+            status_code=500,
+            detail=f'Error: {e}',
+        )
+
+    return {
+        'id': id,
+        'loadCases': [
+            {
+                'name': case['name'],
+                'nodalCoords': deformed_nodal_coords(r),
+                'stresses': stresses(r),
+                'postProcessing': post_processing(
+                    r,
+                    model.boundary_conditions
+                ),
+            }
+            for case, r in zip(cases, results)
+        ],
+    }
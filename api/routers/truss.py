@@ -1,28 +1,45 @@
 import logging
+import math
 
-from fastapi import APIRouter, HTTPException
+import numpy as np
+from fastapi import APIRouter, Header, HTTPException, Query, Response
 from pydantic import BaseModel, validator, Field
 from typing import List, Optional
 
+from fea.truss.preprocess import clean_truss
+from fea.truss.results import largest
 from fea.truss.truss import Truss
+from ..admission import AdmissionController, AdmissionError, rejection
+from ..batching import BatchDispatcher
+from ..profiling import RequestProfiler
 from .truss_example import TrussExampleInput
 
 log = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Solves small trusses in batches when FEA_BATCH_WINDOW is set.
+dispatcher = BatchDispatcher.from_env()
+
+# Memory and time budgets of this worker.
+admission = AdmissionController.from_env()
+
+# Profiles requests on the admin header or by sampling.
+profiler = RequestProfiler.from_env()
+
 
 class MatProp(BaseModel):
     ele: str = Field(title='Element')
     E: float = Field(title="Young's Modulus")
     A: float = Field(title='Cross Sectional Area')
+    Fy: Optional[float] = Field(None, title='Allowable Stress')
 
 
 class Node(BaseModel):
     id: str = Field(title='Node Id')
     x: float = Field(title='x coord')
     y: float = Field(title='y coord')
-    z: float = Field(title='z coord')
+    z: float = Field(0, title='z coord')
 
 
 class Connect(BaseModel):
@@ -35,14 +52,14 @@ class ForceVector(BaseModel):
     node: str = Field(title='Node')
     u1: float = Field(title='Fx')
     u2: float = Field(title='Fy')
-    u3: float = Field(title='Fz')
+    u3: float = Field(0, title='Fz')
 
 
 class BoundaryCondition(BaseModel):
     node: str = Field(title='Node')
     u1: bool = Field(title='x constraint')
     u2: bool = Field(title='y constraint')
-    u3: bool = Field(title='z constraint')
+    u3: bool = Field(False, title='z constraint')
 
 
 class Stress(BaseModel):
@@ -50,20 +67,42 @@ class Stress(BaseModel):
     vm: float = Field(title='Von Mises Stress')
 
 
-class TrussData(BaseModel):
+class Reaction(BaseModel):
+    node: str = Field(title='Node')
+    u1: float = Field(title='Rx')
+    u2: float = Field(title='Ry')
+    u3: Optional[float] = Field(None, title='Rz')
+
+
+class MemberForce(BaseModel):
+    ele: str = Field(title='Element')
+    force: float = Field(title='Axial Force')
+    energy: float = Field(title='Strain Energy')
+    utilization: Optional[float] = Field(None, title='Utilization Ratio')
+
+
+class Displacement(BaseModel):
+    node: str = Field(title='Node')
+    u1: float = Field(title='Dx')
+    u2: float = Field(title='Dy')
+    u3: Optional[float] = Field(None, title='Dz')
+    magnitude: float = Field(title='Displacement Magnitude')
+
+
+class PostProcessing(BaseModel):
+    reactions: List[Reaction] = Field(title='Support Reactions')
+    memberForces: List[MemberForce] = Field(title='Member Forces')
+    strainEnergy: float = Field(title='Total Strain Energy')
+    equilibriumResidual: float = Field(title='Equilibrium Residual')
+
+
+class TrussModel(BaseModel):
     matProp: List[MatProp] = Field(title='Material Property')
     nodalCoords: List[Node] = Field(title='Nodal Coordinates')
     connectivity: List[Connect] = Field(title='Element Connectivity')
-    forceVector: List[ForceVector] = Field(title='Force Vector')
     boundaryConditions: List[BoundaryCondition] = Field(
         title='Boundary Conditions'
     )
-    stresses: Optional[List[Stress]] = Field(None, title='Stresses')
-
-    class Config:
-        schema_extra = {
-            "example": TrussExampleInput
-        }
 
     @validator('matProp')
     def validate_unique_mat_prop_id(cls, v):
@@ -93,6 +132,20 @@ class TrussData(BaseModel):
         else:
             raise ValueError('Key must be unique.')
 
+
+class TrussData(TrussModel):
+    forceVector: List[ForceVector] = Field(title='Force Vector')
+    stresses: Optional[List[Stress]] = Field(None, title='Stresses')
+    postProcessing: Optional[PostProcessing] = Field(
+        None,
+        title='Post Processing'
+    )
+
+    class Config:
+        schema_extra = {
+            "example": TrussExampleInput
+        }
+
     @validator('stresses')
     def validate_unique_stresses_id(cls, v):
         if check_for_unique_key(v, 'ele'):
@@ -101,6 +154,47 @@ class TrussData(BaseModel):
             raise ValueError('Key must be unique.')
 
 
+class TrussSolution(BaseModel):
+    matProp: Optional[List[MatProp]] = Field(None, title='Material Property')
+    nodalCoords: Optional[List[Node]] = Field(
+        None,
+        title='Deformed Nodal Coordinates'
+    )
+    connectivity: Optional[List[Connect]] = Field(
+        None,
+        title='Element Connectivity'
+    )
+    forceVector: Optional[List[ForceVector]] = Field(
+        None,
+        title='Force Vector'
+    )
+    boundaryConditions: Optional[List[BoundaryCondition]] = Field(
+        None,
+        title='Boundary Conditions'
+    )
+    stresses: Optional[List[Stress]] = Field(None, title='Stresses')
+    displacements: Optional[List[Displacement]] = Field(
+        None,
+        title='Nodal Displacements'
+    )
+    postProcessing: Optional[PostProcessing] = Field(
+        None,
+        title='Post Processing'
+    )
+
+
+# Fields returned when no projection is requested.
+DEFAULT_FIELDS = (
+    'matProp',
+    'nodalCoords',
+    'connectivity',
+    'forceVector',
+    'boundaryConditions',
+    'stresses',
+    'postProcessing',
+)
+
+
 def check_for_unique_key(list, key):
     key_list = [dict(item)[key] for item in list]
     return len(set(key_list)) == len(key_list)
@@ -111,8 +205,56 @@ def truss_root():
     return 'Truss Solver'
 
 
-@router.post('/', response_model=TrussData)
-def truss_solve(truss: TrussData):
+@router.post(
+    '/',
+    response_model=TrussSolution,
+    response_model_exclude_none=True
+)
+def truss_solve(
+    truss: TrussData,
+    response: Response,
+    weld: Optional[float] = Query(None, gt=0),
+    fields: Optional[str] = Query(
+        None,
+        description='Comma separated response fields, all but displacements '
+                    'by default.',
+    ),
+    elements: Optional[str] = Query(
+        None,
+        description='Comma separated ids of the elements to return.',
+    ),
+    nodes: Optional[str] = Query(
+        None,
+        description='Comma separated ids of the nodes to return.',
+    ),
+    top_stresses: Optional[int] = Query(
+        None,
+        ge=1,
+        alias='topStresses',
+        description='Return only the elements with the largest absolute '
+                    'stress, largest first.',
+    ),
+    top_displacements: Optional[int] = Query(
+        None,
+        ge=1,
+        alias='topDisplacements',
+        description='Return only the nodes with the largest displacement, '
+                    'largest first.',
+    ),
+    x_fea_profile: Optional[str] = Header(None),
+):
+    requested = id_list(fields)
+    if requested is None:
+        requested = list(DEFAULT_FIELDS)
+        if top_displacements:
+            requested.append('displacements')
+    unknown = set(requested) - set(TrussSolution.__fields__)
+    if unknown:
+        raise HTTPException(
+            status_code=422,
+            detail=f'Unknown fields: {", ".join(sorted(unknown))}.',
+        )
+
     truss_dict = truss.dict()
 
     mat_prop = convert_to_dict(truss_dict['matProp'], 'ele')
@@ -121,16 +263,54 @@ def truss_solve(truss: TrussData):
     force_vector = truss_dict['forceVector']
     boundary_conditions = truss_dict['boundaryConditions']
 
+    if weld:
+        try:
+            model, _ = clean_truss(
+                mat_prop,
+                nodal_coords,
+                connectivity,
+                force_vector,
+                boundary_conditions,
+                tolerance=weld
+            )
+        except KeyError as e:
+            raise HTTPException(
+                status_code=422,
+                detail=f'Node {e} is not defined.',
+            )
+        mat_prop = model['mat_prop']
+        nodal_coords = model['nodal_coords']
+        connectivity = model['connectivity']
+        force_vector = model['force_vector']
+        boundary_conditions = model['boundary_conditions']
+
     try:
-        t = Truss(
-            mat_prop,
-            nodal_coords,
-            connectivity,
-            force_vector,
-            boundary_conditions
-        )
+        plan = admission.plan(nodal_coords, connectivity, force_vector)
+    except AdmissionError as e:
+        raise rejection(e)
+
+    profiled = profiler.selects(x_fea_profile)
+    solver = plan['solver']
+    solve = None
+    if dispatcher and not profiled and dispatcher.accepts(plan['n_dof']):
+        solver = 'dense'
+        solve = dispatcher.solve
 
-        t.solve_truss()
+    try:
+        with admission.admit(plan['estimated_memory']):
+            with profiler.profile('truss', profiled) as report:
+                t = Truss(
+                    mat_prop,
+                    nodal_coords,
+                    connectivity,
+                    force_vector,
+                    boundary_conditions,
+                    solver=solver
+                )
+
+                results = t.solve_truss(solve)
+    except AdmissionError as e:
+        raise rejection(e)
     except Exception as e:
         log.error({e})
         raise HTTPException(
@@ -138,14 +318,163 @@ def truss_solve(truss: TrussData):
             detail=f'Error: {e}',
         )
 
-    truss.matProp = convert_to_list(t.mat_prop, 'ele')
-    truss.nodalCoords = convert_to_list(t.deformed_nodal_coords, 'id')
-    truss.connectivity = convert_to_list(t.connectivity, 'id')
-    truss.forceVector = t.force_vector
-    truss.boundaryConditions = t.boundary_conditions
-    truss.stresses = [{'ele': s, 'vm': t.stresses[s]} for s in t.stresses]
+    if report:
+        response.headers['X-FEA-Profile'] = report['id']
 
-    return truss
+    # Rows of the result arrays to return, evaluated before any list is
+    # built.
+    element_index = selection(
+        results.stresses,
+        id_list(elements),
+        np.abs(results.stress_array),
+        top_stresses,
+    )
+    magnitude = None
+    if top_displacements or 'displacements' in requested:
+        magnitude = np.linalg.norm(results.displacements, axis=1)
+    node_index = selection(
+        results.deformed_nodal_coords,
+        id_list(nodes),
+        magnitude,
+        top_displacements,
+    )
+
+    solution = {}
+    if 'matProp' in requested:
+        solution['matProp'] = convert_to_list(t.mat_prop, 'ele')
+    if 'nodalCoords' in requested:
+        solution['nodalCoords'] = deformed_nodal_coords(results, node_index)
+    if 'connectivity' in requested:
+        solution['connectivity'] = convert_to_list(t.connectivity, 'id')
+    if 'forceVector' in requested:
+        solution['forceVector'] = t.force_vector
+    if 'boundaryConditions' in requested:
+        solution['boundaryConditions'] = t.boundary_conditions
+    if 'stresses' in requested:
+        solution['stresses'] = stresses(results, element_index)
+    if 'displacements' in requested:
+        solution['displacements'] = displacements(
+            results,
+            magnitude,
+            node_index,
+        )
+    if 'postProcessing' in requested:
+        solution['postProcessing'] = post_processing(
+            results,
+            t.boundary_conditions,
+            element_index,
+            None if node_index is None else set(
+                results.node_ids[n] for n in node_index.tolist()
+            ),
+        )
+
+    return solution
+
+
+def id_list(value):
+    if value is None:
+        return None
+    return [v for v in value.split(',') if v]
+
+
+def selection(view, ids, values, k):
+    """
+    Indices of the rows of view with the given ids, or all rows if None,
+    and of only the k with the largest values if k is given.
+    """
+    index = None
+    if ids is not None:
+        unknown = [id for id in ids if id not in view]
+        if unknown:
+            raise HTTPException(
+                status_code=422,
+                detail=f'Unknown ids: {", ".join(unknown)}.',
+            )
+        index = np.array([view.index(id) for id in ids], dtype=np.int64)
+    if k:
+        index = largest(values, k, index)
+    return index
+
+
+def rows(index, *arrays):
+    # Rows of the arrays as lists, only the indexed ones if index is given.
+    if index is not None:
+        arrays = [array[index] for array in arrays]
+    return [array.tolist() for array in arrays]
+
+
+def deformed_nodal_coords(results, index=None):
+    node_ids = results.node_ids
+    if index is not None:
+        node_ids = [node_ids[n] for n in index.tolist()]
+    coords, = rows(index, results.deformed_coords)
+    return [
+        {'id': id, 'x': x, 'y': y, 'z': z}
+        for id, (x, y, z) in zip(node_ids, coords)
+    ]
+
+
+def stresses(results, index=None):
+    element_ids = results.element_ids
+    if index is not None:
+        element_ids = [element_ids[e] for e in index.tolist()]
+    stress, = rows(index, results.stress_array)
+    return [
+        {'ele': ele, 'vm': vm}
+        for ele, vm in zip(element_ids, stress)
+    ]
+
+
+def displacements(results, magnitude, index=None):
+    node_ids = results.node_ids
+    if index is not None:
+        node_ids = [node_ids[n] for n in index.tolist()]
+    displacement, magnitude = rows(index, results.displacements, magnitude)
+    components = ('u1', 'u2', 'u3')
+    return [
+        {'node': id, **dict(zip(components, u)), 'magnitude': m}
+        for id, u, m in zip(node_ids, displacement, magnitude)
+    ]
+
+
+def post_processing(
+    results,
+    boundary_conditions,
+    element_index=None,
+    node_ids=None
+):
+    element_ids = results.element_ids
+    if element_index is not None:
+        element_ids = [element_ids[e] for e in element_index.tolist()]
+    forces, energy, utilization = rows(
+        element_index,
+        results.axial_force_array,
+        results.energy_array,
+        results.utilization_array,
+    )
+    return {
+        'reactions': [
+            {'node': bc['node'], **results.reactions[bc['node']]}
+            for bc in boundary_conditions
+            if node_ids is None or bc['node'] in node_ids
+        ],
+        'memberForces': [
+            {
+                'ele': ele,
+                'force': force,
+                'energy': e,
+                'utilization': None if math.isnan(u) else u,
+            }
+            for ele, force, e, u in zip(
+                element_ids,
+                forces,
+                energy,
+                utilization,
+            )
+        ],
+        'strainEnergy': results.strain_energy,
+        'equilibriumResidual': results.equilibrium_residual,
+    }
 
 
 def convert_to_dict(list, key):
@@ -190,5 +190,45 @@ TrussExampleOutput = {
             "ele": "ele4",
             "vm": -2121.320343559646
         },
-    ]
+    ],
+    "postProcessing": {
+        "reactions": [{
+                "node": "node1",
+                "u1": -1000.0000000000006,
+                "u2": -1000.0000000000006
+            }, {
+                "node": "node2",
+                "u1": 999.9999999999995,
+                "u2": 2000.0
+            }, {
+                "node": "node3",
+                "u1": 0.0,
+                "u2": 0.0
+            }, {
+                "node": "node4",
+                "u1": 0.0,
+                "u2": 0.0
+            },
+        ],
+        "memberForces": [{
+                "ele": "ele1",
+                "force": 1414.213562373096,
+                "energy": 17.67766952966371
+            }, {
+                "ele": "ele2",
+                "force": -707.1067811865479,
+                "energy": 4.419417382415927
+            }, {
+                "ele": "ele3",
+                "force": 1581.1388300841909,
+                "energy": 98.82117688026202
+            }, {
+                "ele": "ele4",
+                "force": -2121.3203435596424,
+                "energy": 159.09902576697317
+            },
+        ],
+        "strainEnergy": 280.0172895593148,
+        "equilibriumResidual": 2.1024382032131743e-15
+    }
 }
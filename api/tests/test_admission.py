@@ -0,0 +1,111 @@
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from api.admission import AdmissionController, AdmissionError, request_stats
+from api.main import fea_app
+from api.routers import truss
+from api.routers.truss_example import TrussExampleInput
+from fea.truss.generator import generate_truss
+from fea.truss.solver import DEFAULT_PROFILE
+from fea.truss.store import FACTORED_SOLVERS
+
+client = TestClient(fea_app)
+
+
+def test_request_stats():
+    t = generate_truss(10, spatial=True)
+    n_dof, nnz, bandwidth = request_stats(
+        t['nodal_coords'],
+        t['connectivity']
+    )
+    assert n_dof == 3 * len(t['nodal_coords'])
+
+    assert nnz < n_dof**2
+    assert bandwidth < n_dof
+
+    # Planar trusses have 2 degrees of freedom per node.
+    t = generate_truss(10)
+    n_dof, _, _ = request_stats(t['nodal_coords'], t['connectivity'])
+    assert n_dof == 2 * len(t['nodal_coords'])
+
+    with pytest.raises(AdmissionError) as e:
+        request_stats(t['nodal_coords'], {'e0': {'i': 'n0', 'j': 'x'}})
+    assert e.value.status_code == 422
+
+
+def test_plan():
+    t = generate_truss(7500, spatial=True)
+    controller = AdmissionController(memory=2**30, profile=DEFAULT_PROFILE)
+
+    # A 30k node truss is routed away from the dense solver.
+    plan = controller.plan(t['nodal_coords'], t['connectivity'])
+    assert plan['n_dof'] == 90012
+    assert plan['solver'] != 'dense'
+    assert plan['estimated_memory'] <= 2**30
+
+    # Among the solvers of stored models, which are factored.
+    plan = controller.plan(
+        t['nodal_coords'], t['connectivity'], solvers=FACTORED_SOLVERS
+    )
+    assert plan['solver'] in FACTORED_SOLVERS
+
+    controller.memory = 2**20
+    with pytest.raises(AdmissionError) as e:
+        controller.plan(t['nodal_coords'], t['connectivity'])
+    assert e.value.status_code == 413
+    assert 'MB' in e.value.detail
+
+    controller.memory = 2**30
+    controller.time = 1e-6
+    with pytest.raises(AdmissionError) as e:
+        controller.plan(t['nodal_coords'], t['connectivity'])
+    assert e.value.status_code == 413
+    assert 'solve time' in e.value.detail
+
+
+def test_admit():
+    controller = AdmissionController(memory=100, timeout=0.05)
+
+    with controller.admit(80):
+        assert controller.in_use == 80
+        with pytest.raises(AdmissionError) as e:
+            with controller.admit(40):
+                pass
+        assert e.value.status_code == 503
+        assert e.value.retry_after == 1
+
+        # Fits alongside the solve in progress.
+        with controller.admit(20):
+            assert controller.in_use == 100
+    assert controller.in_use == 0
+
+    # Queued until the memory is released.
+    controller.timeout = 5
+    admitted = []
+
+    def wait():
+        with controller.admit(40):
+            admitted.append(controller.in_use)
+
+    with controller.admit(80):
+        waiting = threading.Thread(target=wait)
+        waiting.start()
+        time.sleep(0.05)
+        assert not admitted
+    waiting.join()
+    assert admitted == [40]
+
+
+def test_truss_solve_rejected(monkeypatch):
+    monkeypatch.setattr(
+        truss,
+        'admission',
+        AdmissionController(memory=1024, profile=DEFAULT_PROFILE)
+    )
+    response = client.post('/truss/', json=TrussExampleInput)
+
+    assert response.status_code == 413
+    assert 'available to a worker' in response.json()['detail']
@@ -0,0 +1,86 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from api.batching import BatchDispatcher, batched_solve, pad_size
+from api.main import fea_app
+from api.routers import truss
+from api.routers.truss_example import TrussExampleInput
+
+
+def spd(n, seed):
+    rng = np.random.default_rng(seed)
+    A = rng.standard_normal([n, n])
+    return A @ A.T + n * np.eye(n), rng.standard_normal([n, 1])
+
+
+def test_pad_size():
+    assert pad_size(12, 12) == 12
+    assert pad_size(13, 12) == 24
+    assert pad_size(5, 1) == 5
+
+
+def test_batched_solve():
+    systems = [spd(n, seed) for seed, n in enumerate((5, 9, 12, 9, 30))]
+    results = batched_solve(systems, step=12)
+
+    for (K, F), Q in zip(systems, results):
+        assert Q.shape == F.shape
+        np.testing.assert_allclose(K @ Q, F, atol=1e-10)
+
+
+def test_batched_solve_singular():
+    systems = [spd(4, 0), (np.zeros([4, 4]), np.ones([4, 1])), spd(3, 1)]
+    results = batched_solve(systems, step=4)
+
+    assert isinstance(results[1], np.linalg.LinAlgError)
+    for index in (0, 2):
+        K, F = systems[index]
+        np.testing.assert_allclose(K @ results[index], F, atol=1e-10)
+
+
+def test_dispatcher_batches_concurrent_systems():
+    dispatcher = BatchDispatcher(window=0.2, max_batch=8)
+    systems = [spd(6, seed) for seed in range(8)]
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(lambda s: dispatcher.solve(*s), systems))
+
+    for (K, F), Q in zip(systems, results):
+        np.testing.assert_allclose(K @ Q, F, atol=1e-10)
+    assert dispatcher.solved == 8
+    assert dispatcher.batches < 8
+
+    with pytest.raises(np.linalg.LinAlgError):
+        dispatcher.solve(np.zeros([2, 2]), np.ones([2, 1]))
+
+
+def test_dispatcher_from_env(monkeypatch):
+    monkeypatch.delenv('FEA_BATCH_WINDOW', raising=False)
+    assert BatchDispatcher.from_env() is None
+
+    monkeypatch.setenv('FEA_BATCH_WINDOW', '5')
+    monkeypatch.setenv('FEA_BATCH_SIZE', '16')
+    dispatcher = BatchDispatcher.from_env()
+    assert dispatcher.window == 0.005
+    assert dispatcher.max_batch == 16
+    assert dispatcher.accepts(600)
+    assert not dispatcher.accepts(601)
+
+
+def test_truss_solve_batched(monkeypatch):
+    client = TestClient(fea_app)
+    expected = client.post('/truss/', json=TrussExampleInput).json()
+
+    dispatcher = BatchDispatcher(window=0.001)
+    monkeypatch.setattr(truss, 'dispatcher', dispatcher)
+    response = client.post('/truss/', json=TrussExampleInput)
+
+    assert response.status_code == 200
+    assert dispatcher.solved == 1
+    stresses = zip(response.json()['stresses'], expected['stresses'])
+    for actual, stress in stresses:
+        assert actual['ele'] == stress['ele']
+        assert np.isclose(actual['vm'], stress['vm'])
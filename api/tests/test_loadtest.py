@@ -0,0 +1,44 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from api.main import fea_app
+from api.loadtest import parse_mix, build_payloads, summarize
+
+client = TestClient(fea_app)
+
+
+def test_parse_mix():
+    assert parse_mix('1:60,10:30,100') == [(1, 60), (10, 30), (100, 1)]
+
+    with pytest.raises(ValueError):
+        parse_mix('0:10')
+
+
+def test_build_payloads():
+    payloads = build_payloads([(2, 1), (4, 3)])
+    assert list(payloads) == ['6 nodes', '10 nodes']
+    assert payloads['10 nodes']['weight'] == 3
+
+    response = client.post(
+        '/truss/',
+        data=payloads['6 nodes']['body'],
+        headers={'Content-Type': 'application/json'},
+    )
+    assert response.status_code == 200
+    assert len(response.json()['stresses']) == 9
+
+
+def test_summarize():
+    samples = [('small', 0.001 * (i + 1), True) for i in range(100)]
+    samples.append(('large', 1.0, False))
+    summary = summarize(samples, elapsed=2)
+
+    assert summary['all']['requests'] == 101
+    assert summary['all']['errors'] == 1
+    assert summary['all']['rps'] == 50.5
+    assert summary['small']['p50'] == pytest.approx(50.5)
+    assert summary['small']['p99'] == pytest.approx(99.01)
+    assert summary['large']['p50'] is None
+    json.dumps(summary)
@@ -0,0 +1,115 @@
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from api.admission import AdmissionController
+from api.main import fea_app
+from api.routers import models, truss
+from api.routers.truss_example import TrussExampleInput
+from fea.truss.solver import DEFAULT_PROFILE
+from fea.truss.store import ModelStore
+
+client = TestClient(fea_app)
+
+
+@pytest.fixture(autouse=True)
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(models, 'store', ModelStore(str(tmp_path)))
+
+
+def register(query=''):
+    model = {
+        k: v for k, v in TrussExampleInput.items()
+        if k not in ('forceVector', 'stresses')
+    }
+    return client.post(f'/truss/models{query}', json=model)
+
+
+def test_register_model():
+    response = register()
+    assert response.status_code == 201
+    assert response.json()['id'] == register().json()['id']
+    assert response.json()['nDof'] > 0
+
+
+def test_solve_load_cases():
+    id = register().json()['id']
+    expected = client.post('/truss/', json=TrussExampleInput).json()
+
+    response = client.post(f'/truss/models/{id}/loads', json={
+        'loadCases': [
+            {
+                'name': 'example',
+                'forceVector': TrussExampleInput['forceVector'],
+            },
+            {'name': 'unloaded', 'forceVector': []},
+        ]
+    })
+    assert response.status_code == 200
+
+    example, unloaded = response.json()['loadCases']
+    assert example['name'] == 'example'
+    assert np.allclose(
+        [s['vm'] for s in example['stresses']],
+        [s['vm'] for s in expected['stresses']],
+    )
+    assert example['nodalCoords'][3]['x'] == pytest.approx(
+        expected['nodalCoords'][3]['x']
+    )
+    assert all(s['vm'] == 0 for s in unloaded['stresses'])
+
+
+def test_solve_load_cases_errors():
+    response = client.post('/truss/models/0123abcd/loads', json={
+        'loadCases': []
+    })
+    assert response.status_code == 404
+
+    id = register().json()['id']
+    response = client.post(f'/truss/models/{id}/loads', json={
+        'loadCases': [{
+            'name': 'bad',
+            'forceVector': [{'node': 'x', 'u1': 1, 'u2': 0, 'u3': 0}],
+        }]
+    })
+    assert response.status_code == 422
+
+
+def test_solve_load_cases_out_of_plane():
+    load_cases = {
+        'loadCases': [{
+            'name': 'out of plane',
+            'forceVector': [{'node': 'node4', 'u1': 0, 'u2': 0, 'u3': 5}],
+        }]
+    }
+
+    # The model is planar, out of plane loads are rejected as by Truss.
+    id = register().json()['id']
+    response = client.post(f'/truss/models/{id}/loads', json=load_cases)
+    assert response.status_code == 422
+    assert 'planar' in response.json()['detail']
+
+    spatial = register('?planar=false').json()['id']
+    assert spatial != id
+    response = client.post(f'/truss/models/{spatial}/loads', json=load_cases)
+    assert response.status_code == 200
+
+
+def test_solve_load_cases_rejected(monkeypatch):
+    id = register().json()['id']
+    models.store._cache.clear()
+    monkeypatch.setattr(
+        truss,
+        'admission',
+        AdmissionController(memory=1024, profile=DEFAULT_PROFILE)
+    )
+    response = client.post(f'/truss/models/{id}/loads', json={
+        'loadCases': [{
+            'name': 'example',
+            'forceVector': TrussExampleInput['forceVector'],
+        }]
+    })
+
+    # Rejected before the model is loaded and factored.
+    assert response.status_code == 413
+    assert not models.store._cache
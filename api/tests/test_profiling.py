@@ -0,0 +1,57 @@
+from fastapi.testclient import TestClient
+
+from api.main import fea_app
+from api.profiling import MAX_RATE, RequestProfiler
+from api.routers import truss
+from api.routers.truss_example import TrussExampleInput
+
+client = TestClient(fea_app)
+
+
+def test_selects():
+    profiler = RequestProfiler(token='secret')
+    assert profiler.selects('secret')
+    assert not profiler.selects('guess')
+    assert not profiler.selects()
+
+    # Sampling is bounded by the rate limit and the interval.
+    profiler = RequestProfiler(rate=1, interval=3600)
+    assert profiler.rate == MAX_RATE
+    profiler.rate = 1
+    assert profiler.selects()
+    assert not profiler.selects()
+
+
+def test_profiler_from_env(monkeypatch):
+    monkeypatch.delenv('FEA_PROFILE_TOKEN', raising=False)
+    monkeypatch.delenv('FEA_PROFILE_RATE', raising=False)
+    profiler = RequestProfiler.from_env()
+    assert not profiler.selects('anything')
+
+    monkeypatch.setenv('FEA_PROFILE_TOKEN', 'secret')
+    monkeypatch.setenv('FEA_PROFILE_RATE', '0.01')
+    profiler = RequestProfiler.from_env()
+    assert profiler.token == 'secret'
+    assert profiler.rate == 0.01
+
+
+def test_truss_solve_profiled(monkeypatch, tmp_path):
+    monkeypatch.setattr(
+        truss,
+        'profiler',
+        RequestProfiler(token='secret', path=str(tmp_path))
+    )
+    expected = client.post('/truss/', json=TrussExampleInput)
+    assert 'X-FEA-Profile' not in expected.headers
+
+    response = client.post(
+        '/truss/',
+        json=TrussExampleInput,
+        headers={'X-FEA-Profile': 'secret'}
+    )
+    assert response.status_code == 200
+    assert response.json() == expected.json()
+
+    id = response.headers['X-FEA-Profile']
+    assert (tmp_path / f'{id}.prof').exists()
+    assert (tmp_path / f'{id}.txt').exists()
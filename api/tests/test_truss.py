@@ -93,3 +93,111 @@ def test_validate_unique_stresses_id():
 
     assert response.status_code == 422
     assert response.json()['detail'][0]['type'] == 'value_error'
+
+
+def test_truss_solve_planar():
+    planar_truss = deepcopy(TrussExampleInput)
+    for node in planar_truss['nodalCoords']:
+        del node['z']
+    for f in planar_truss['forceVector']:
+        del f['u3']
+    for bc in planar_truss['boundaryConditions']:
+        del bc['u3']
+
+    response = client.post(
+        '/truss/',
+        json=planar_truss
+    )
+    expected = client.post('/truss/', json=TrussExampleInput).json()
+
+    assert response.status_code == 200
+    assert response.json()['nodalCoords'] == expected['nodalCoords']
+    assert response.json()['stresses'] == expected['stresses']
+
+
+def test_truss_solve_out_of_plane():
+    # Solved in 3D, the loaded node is fixed out of plane.
+    truss = deepcopy(TrussExampleInput)
+    truss['forceVector'][0]['u3'] = 5
+
+    response = client.post('/truss/', json=truss)
+    expected = client.post('/truss/', json=TrussExampleInput).json()
+
+    assert response.status_code == 200
+    assert response.json()['stresses'] == expected['stresses']
+
+
+def test_truss_solve_weld():
+    dirty_truss = deepcopy(TrussExampleInput)
+    dirty_truss['nodalCoords'].append(
+        {'id': 'node5', 'x': 0, 'y': 1e-9, 'z': 0}
+    )
+    dirty_truss['connectivity'].append(
+        {'id': 'ele5', 'i': 'node3', 'j': 'node5'}
+    )
+    dirty_truss['matProp'].append({'ele': 'ele5', 'E': 2000000, 'A': 2})
+
+    response = client.post('/truss/?weld=1e-6', json=dirty_truss)
+    expected = client.post('/truss/', json=TrussExampleInput).json()
+
+    assert response.status_code == 200
+    assert response.json()['connectivity'] == expected['connectivity']
+    assert response.json()['stresses'] == expected['stresses']
+
+    response = client.post('/truss/?weld=0', json=dirty_truss)
+    assert response.status_code == 422
+
+
+def test_truss_solve_projection():
+    expected = client.post('/truss/', json=TrussExampleInput).json()
+
+    response = client.post(
+        '/truss/?fields=stresses,displacements&elements=ele3,ele1',
+        json=TrussExampleInput
+    )
+    assert response.status_code == 200
+    assert set(response.json()) == {'stresses', 'displacements'}
+    assert response.json()['stresses'] == [
+        expected['stresses'][2],
+        expected['stresses'][0],
+    ]
+    assert len(response.json()['displacements']) == 4
+
+    response = client.post(
+        '/truss/?fields=postProcessing&elements=ele2&nodes=node1',
+        json=TrussExampleInput
+    )
+    post_processing = response.json()['postProcessing']
+    assert post_processing['memberForces'] == [
+        expected['postProcessing']['memberForces'][1]
+    ]
+    assert [r['node'] for r in post_processing['reactions']] == ['node1']
+
+    for query in ('fields=stress', 'elements=ele9', 'nodes=node9'):
+        response = client.post(f'/truss/?{query}', json=TrussExampleInput)
+        assert response.status_code == 422
+
+
+def test_truss_solve_top_k():
+    expected = client.post('/truss/', json=TrussExampleInput).json()
+    largest = sorted(expected['stresses'], key=lambda s: -abs(s['vm']))
+
+    response = client.post(
+        '/truss/?fields=stresses&topStresses=2',
+        json=TrussExampleInput
+    )
+    assert response.status_code == 200
+    assert response.json()['stresses'] == largest[:2]
+
+    response = client.post(
+        '/truss/?topDisplacements=1',
+        json=TrussExampleInput
+    )
+    displacements = response.json()['displacements']
+    assert len(displacements) == 1
+    assert len(response.json()['nodalCoords']) == 1
+    assert displacements[0]['node'] == response.json()['nodalCoords'][0]['id']
+    assert displacements[0]['magnitude'] > 0
+
+    response = client.post('/truss/?topStresses=0', json=TrussExampleInput)
+    assert response.status_code == 422
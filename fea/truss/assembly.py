@@ -0,0 +1,139 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+log = logging.getLogger(__name__)
+
+# Smallest number of elements worth handing to a separate thread.
+MIN_CHUNK = 256
+
+
+def color_elements(pairs):
+    """
+    Greedy coloring of the elements such that no two elements of the same
+    color share a node.
+
+    pairs is an (n_elements, 2) array of node indices. Returns an array with
+    the color of each element.
+    """
+    n_nodes = int(pairs.max()) + 1 if len(pairs) else 0
+    # Bit k of used[node] is set once an element of color k touches the node.
+    used = [0] * n_nodes
+    colors = np.empty(len(pairs), dtype=np.int64)
+    for e, (i, j) in enumerate(pairs.tolist()):
+        taken = used[i] | used[j]
+        color = (~taken & (taken + 1)).bit_length() - 1
+        colors[e] = color
+        used[i] |= 1 << color
+        used[j] |= 1 << color
+
+    return colors
+
+
+def color_groups(colors):
+    order = np.argsort(colors, kind='stable')
+    bounds = np.flatnonzero(np.diff(colors[order])) + 1
+    return np.split(order, bounds)
+
+
+def scatter_add(K, dofs, blocks, workers=1, pairs=None, band=None):
+    """
+    Scatter-add element blocks into the matrix K in place.
+
+    dofs is an (n_elements, k) array of global degrees of freedom and blocks
+    the (n_elements, k, k) element matrices. With more than one worker the
+    elements are colored using pairs, their (n_elements, 2) node indices, and
+    every color group is split across a thread pool. Elements of the same
+    color never write to the same entry, so the threads need no locking.
+
+    If band is given, K is a symmetric matrix with half bandwidth band in
+    LAPACK upper banded storage, K[band + r - c, c] for r <= c, and degrees
+    of freedom that are negative are left out.
+    """
+    k = dofs.shape[1]
+    if band is None:
+        rows = np.repeat(dofs, k, axis=1)
+        cols = np.tile(dofs, k)
+        values = blocks.reshape(len(blocks), k*k)
+        valid = None
+    else:
+        # Each pair of local degrees of freedom once, as an upper entry.
+        a, b = np.triu_indices(k)
+        lower = np.minimum(dofs[:, a], dofs[:, b])
+        cols = np.maximum(dofs[:, a], dofs[:, b])
+        rows = band + lower - cols
+        values = blocks[:, a, b]
+        valid = lower >= 0
+
+    if workers <= 1 or len(dofs) < 2 * MIN_CHUNK:
+        if valid is None:
+            np.add.at(K, (rows, cols), values)
+        else:
+            np.add.at(K, (rows[valid], cols[valid]), values[valid])
+        return K
+
+    log.info(f'Scatter-adding element blocks with {workers} workers.')
+    groups = color_groups(color_elements(pairs))
+    log.debug(f'Elements split into {len(groups)} colors.')
+
+    def scatter(chunk):
+        if valid is None:
+            K[rows[chunk], cols[chunk]] += values[chunk]
+        else:
+            keep = valid[chunk]
+            K[rows[chunk][keep], cols[chunk][keep]] += values[chunk][keep]
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for group in groups:
+            n_chunks = min(workers, max(1, len(group) // MIN_CHUNK))
+            list(executor.map(scatter, np.array_split(group, n_chunks)))
+
+    return K
+
+
+def axial_matvec(x, i, j, k, C):
+    """
+    Product of the stiffness matrix of a set of axial elements with x,
+    computed element by element without assembling the matrix.
+
+    x is an (n_nodes, DOF) array of nodal values, i and j the node indices
+    of each element, k its axial stiffness E*A/L and C its (n_elements, DOF)
+    direction cosines.
+    """
+    return axial_scatter(k * elongation(x, i, j, C), i, j, C, len(x))
+
+
+def nodal_blocks(i, j, k, C, n):
+    """
+    (n, DOF, DOF) diagonal blocks of the stiffness matrix of a set of axial
+    elements, k C C^T at each of their nodes.
+    """
+    outer = k[:, None, None] * C[:, :, None] * C[:, None, :]
+    DOF = C.shape[1]
+    blocks = np.empty([n, DOF, DOF])
+    for a in range(DOF):
+        for b in range(DOF):
+            blocks[:, a, b] = (
+                np.bincount(i, outer[:, a, b], minlength=n)
+                + np.bincount(j, outer[:, a, b], minlength=n)
+            )
+    return blocks
+
+
+def elongation(x, i, j, C):
+    return np.einsum('ed,ed->e', C, x[j] - x[i])
+
+
+def axial_scatter(f, i, j, C, n):
+    """
+    (n, DOF) nodal forces of axial element forces f, positive in tension.
+    """
+    f = f[:, None] * C
+    y = np.empty([n, C.shape[1]], dtype=f.dtype)
+    for d in range(C.shape[1]):
+        y[:, d] = (
+            np.bincount(j, f[:, d], minlength=n)
+            - np.bincount(i, f[:, d], minlength=n)
+        )
+    return y
@@ -0,0 +1,65 @@
+import logging
+
+import numpy as np
+from scipy import sparse
+from scipy.sparse.csgraph import reverse_cuthill_mckee
+
+log = logging.getLogger(__name__)
+
+
+def node_order(pairs, n_nodes):
+    """
+    Reverse Cuthill-McKee ordering of the nodes, which keeps the stiffness
+    matrix banded. pairs is an (n, 2) array of connected node indices.
+    """
+    graph = sparse.csr_matrix(
+        (np.ones(len(pairs)), (pairs[:, 0], pairs[:, 1])),
+        shape=(n_nodes, n_nodes)
+    )
+    return reverse_cuthill_mckee(graph, symmetric_mode=False)
+
+
+def matrix_stats(pairs, n_nodes, DOF, order=None):
+    """
+    Size, number of nonzeros and half bandwidth, once the nodes are
+    numbered in order, of the stiffness matrix of nodes coupled by pairs.
+    """
+    # Each distinct pair of connected nodes couples two DOF x DOF blocks.
+    pairs = np.sort(pairs, axis=1)
+    pairs = pairs[pairs[:, 0] != pairs[:, 1]]
+    n_pairs = len(np.unique(pairs[:, 0]*n_nodes + pairs[:, 1]))
+    nnz = DOF**2 * (n_nodes + 2*n_pairs)
+
+    if order is None:
+        order = node_order(pairs, n_nodes)
+    rank = np.empty(n_nodes, dtype=np.int64)
+    rank[order] = np.arange(n_nodes)
+    spread = np.abs(rank[pairs[:, 1]] - rank[pairs[:, 0]]).max(initial=0)
+    bandwidth = DOF*int(spread) + DOF - 1
+
+    return n_nodes * DOF, nnz, bandwidth
+
+
+def bandwidth(positions):
+    """
+    Half bandwidth of a matrix assembled from blocks at positions, an
+    (n_blocks, k) array of equation numbers, negative for equations left out.
+    """
+    if not positions.size:
+        return 0
+    high = positions.max(axis=1)
+    low = np.where(positions < 0, high[:, None], positions).min(axis=1)
+    return int(max((high - low).max(initial=0), 0))
+
+
+def norm_inf(ab):
+    """
+    Infinity norm of a symmetric matrix in upper banded storage.
+    """
+    b = ab.shape[0] - 1
+    A = np.abs(ab)
+    # Row j holds the upper entries of column j, transposed.
+    rows = A.sum(axis=0)
+    for d in range(1, b + 1):
+        rows[:-d] += A[b - d, d:]
+    return rows.max(initial=0)
@@ -0,0 +1,97 @@
+"""
+Benchmark the solvers on this machine and save a solver profile.
+
+    python -m fea.truss.calibration [profile_path]
+"""
+import logging
+import sys
+import time
+
+import numpy as np
+
+from . import solver
+from .generator import generate_truss
+from .truss import Truss
+
+log = logging.getLogger(__name__)
+
+
+def best_time(func, repeat=3):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def reduced_lattice(n_bays, storage='sparse'):
+    t = Truss(**generate_truss(n_bays, spatial=True), solver=storage)
+    t.create_nodes()
+    t.create_elements()
+    t.select_solver()
+    t.assemblage()
+    K_reduced, forces_reduced, free = t.reduced_system()
+    n_dof, nnz, bandwidth = t.matrix_stats()
+    return K_reduced, forces_reduced, nnz, bandwidth
+
+
+def calibrate(path=None, dense_sizes=(400, 800), lattice_bays=(50, 200)):
+    log.info('Calibrating solver profile.')
+    profile = dict(solver.DEFAULT_PROFILE)
+    rng = np.random.default_rng(0)
+
+    rates = []
+    for n in dense_sizes:
+        A = rng.standard_normal([n, n])
+        A = A @ A.T + n * np.eye(n)
+        b = rng.standard_normal([n, 1])
+        rates.append(2 / 3 * n**3 / best_time(lambda: np.linalg.solve(A, b)))
+    profile['dense_flops'] = float(max(rates))
+
+    banded_rates = []
+    sparse_rates = []
+    spmv_rates = []
+    iterations = []
+    for n_bays in lattice_bays:
+        ab, F, nnz, bandwidth = reduced_lattice(n_bays, 'banded')
+        n = ab.shape[1]
+        b = ab.shape[0] - 1
+        elapsed = best_time(lambda: solver.solve(ab, F, 'banded'))
+        banded_rates.append(n * b**2 / elapsed)
+
+        K, F, nnz, bandwidth = reduced_lattice(n_bays)
+        n = K.shape[0]
+        elapsed = best_time(lambda: solver.solve(K, F, 'sparse'))
+        sparse_rates.append(2 * n * bandwidth**2 / elapsed)
+
+        x = F.ravel()
+        elapsed = best_time(lambda: [K.dot(x) for _ in range(20)])
+        spmv_rates.append(20 * 2 * K.nnz / elapsed)
+
+        diagonal = K.diagonal()
+        _, count = solver.conjugate_gradient(
+            K.dot,
+            F.ravel(),
+            precondition=lambda r: r / diagonal,
+        )
+        iterations.append((n, count))
+
+    profile['banded_flops'] = float(max(banded_rates))
+    profile['sparse_flops'] = float(max(sparse_rates))
+    profile['spmv_flops'] = float(max(spmv_rates))
+
+    (n1, i1), (n2, i2) = iterations[0], iterations[-1]
+    if n2 != n1:
+        profile['cg_exponent'] = float(np.log(i2 / i1) / np.log(n2 / n1))
+    profile['cg_coefficient'] = float(i2 / n2**profile['cg_exponent'])
+
+    log.info(f'Calibrated solver profile: {profile}')
+    if path is not False:
+        solver.save_profile(profile, path)
+
+    return profile
+
+
+if __name__ == '__main__':
+    calibrate(sys.argv[1] if len(sys.argv) > 1 else None)
@@ -0,0 +1,305 @@
+import logging
+import numpy as np
+from scipy import sparse
+
+from . import assembly, solver
+
+log = logging.getLogger(__name__)
+
+COMPONENTS = ('u1', 'u2', 'u3')
+
+
+def rayleigh_coefficients(ratio, omega_1, omega_2):
+    """
+    Mass and stiffness proportional Rayleigh damping coefficients giving the
+    damping ratio at the circular frequencies omega_1 and omega_2.
+    """
+    a0 = 2 * ratio * omega_1 * omega_2 / (omega_1 + omega_2)
+    a1 = 2 * ratio / (omega_1 + omega_2)
+    return a0, a1
+
+
+class DynamicAnalysis():
+    """
+    DynamicAnalysis class, integrate the equations of motion
+    M a + C v + K u = F(t) of a truss with the HHT-alpha method, the Newmark
+    average acceleration method when alpha is 0.
+
+    The mass matrix is lumped, half the mass of each element at each of its
+    nodes, and the damping is Rayleigh damping C = a0 M + a1 K. With a fixed
+    time step the effective matrix is factored once with the solver selected
+    for the truss, the sparse solver for iterative and matrix-free trusses,
+    and each step costs one back substitution and one element by element
+    product with K. Superelements add stiffness but no mass.
+
+    ...
+
+    Attributes
+    ----------
+    truss : Truss
+        Truss to analyse, with its loads and boundary conditions.
+    dt : float
+        Time step.
+    alpha : float
+        HHT-alpha parameter, between -1/3 and 0. Negative values damp the
+        high frequencies numerically.
+    beta : float
+        Newmark beta, (1 - alpha)^2 / 4.
+    gamma : float
+        Newmark gamma, 1/2 - alpha.
+    damping : tuple
+        Rayleigh damping coefficients (a0, a1).
+    mass : ndarray
+        Lumped mass of each degree of freedom.
+    free : ndarray
+        Unconstrained degrees of freedom.
+    elapsed : float
+        Time at the end of the last step.
+    u, v, a : ndarray
+        Displacements, velocities and accelerations of every degree of
+        freedom at the end of the last step.
+    time : ndarray
+        Time of each recorded step.
+    history : ndarray
+        (n_steps + 1, n_recorded) displacements of the recorded degrees of
+        freedom, memory-mapped when written to a file.
+    stress_envelope : ndarray
+        (2, n_elements) smallest and largest axial stress of each element.
+
+    Methods
+    -------
+    lumped_mass(density)
+    factorize()
+    run(n_steps, forces, record, path)
+
+    """
+
+    def __init__(
+        self,
+        truss,
+        dt,
+        alpha=0,
+        damping=(0, 0),
+        density=None
+    ):
+        if not -1/3 <= alpha <= 0:
+            raise ValueError('alpha must be between -1/3 and 0.')
+        self.truss = truss
+        self.dt = dt
+        self.alpha = alpha
+        self.beta = (1 - alpha)**2 / 4
+        self.gamma = 0.5 - alpha
+        self.damping = tuple(damping)
+        self.elapsed = 0
+        self.time = None
+        self.history = None
+        self.stress_envelope = None
+
+        t = truss
+        t.create_nodes()
+        t.create_elements()
+        t.select_solver()
+        if t.solver_info['solver'] in ('iterative', 'matrix-free'):
+            # The effective matrix is factored once for every step, not
+            # solved iteratively at each step.
+            log.info('Factoring with the sparse solver for the time steps.')
+            t.solver = 'sparse'
+            t.select_solver()
+        t.assemblage()
+        self.table = t.element_table()
+        self._superelements = t.superelement_blocks()
+        self.size = len(t.nodes) * t.DOF
+        self.mass = self.lumped_mass(density)
+        self.u = np.zeros(self.size)
+        self.v = np.zeros(self.size)
+        self.a = np.zeros(self.size)
+        self._solve = self.factorize()
+
+    def lumped_mass(self, density=None):
+        """
+        Mass of each degree of freedom from the density 'rho' of each
+        element in mat_prop, or density if not given.
+        """
+        t = self.truss
+        rho = np.array([
+            t.mat_prop[id].get('rho', density) for id in t.elements
+        ], dtype=float)
+        if np.isnan(rho).any():
+            raise ValueError(
+                'Give the density rho of every element in mat_prop, or a '
+                'default density.'
+            )
+
+        half = 0.5 * rho * self.table['A'] * self.table['L']
+        n = len(t.nodes)
+        nodal = (
+            np.bincount(self.table['i'], half, minlength=n)
+            + np.bincount(self.table['j'], half, minlength=n)
+        )
+        return np.repeat(nodal, t.DOF)
+
+    def factorize(self):
+        log.info('Factoring the effective stiffness matrix.')
+        t = self.truss
+        a0, a1 = self.damping
+        dt, alpha = self.dt, self.alpha
+        K_reduced, _, self.free = t.reduced_system()
+        method = t.solver_info['solver']
+        mass = self.mass[self.free]
+
+        # M + (1 + alpha) (gamma dt C + beta dt^2 K), solved for the
+        # accelerations.
+        m = 1 + (1 + alpha) * self.gamma * dt * a0
+        k = (1 + alpha) * (self.gamma * dt * a1 + self.beta * dt**2)
+        if method == 'banded':
+            effective = k * K_reduced.astype(np.float64)
+            effective[-1] += m * mass
+        elif sparse.issparse(K_reduced):
+            effective = k * K_reduced.astype(np.float64)
+            effective = (effective + sparse.diags(m * mass)).tocsr()
+        else:
+            effective = k * K_reduced.astype(np.float64)
+            effective[np.diag_indices_from(effective)] += m * mass
+
+        return solver.factorize(effective, method)
+
+    def elongation(self, x):
+        table = self.table
+        return assembly.elongation(
+            x.reshape(-1, self.truss.DOF), table['i'], table['j'], table['C']
+        )
+
+    def internal_forces(self, x, elongation):
+        """
+        Product of K with x, from the elongation of the elements under x.
+        """
+        table = self.table
+        y = assembly.axial_scatter(
+            table['k'] * elongation,
+            table['i'],
+            table['j'],
+            table['C'],
+            len(self.truss.nodes),
+        ).ravel()
+        for dofs, block in self._superelements:
+            y[dofs] += block @ x[dofs]
+        return y
+
+    def forces(self, load, time):
+        if callable(load):
+            F = load(time)
+        else:
+            F = load
+        if np.ndim(F) == 0:
+            # A scale factor on the loads of the truss.
+            return F * self._static
+        return np.asarray(F, dtype=float).ravel()
+
+    def record_dofs(self, record):
+        if record is None:
+            return np.arange(self.size)
+        DOF = self.truss.DOF
+        return np.array([
+            DOF * self.truss.nodes[node].index + COMPONENTS.index(component)
+            for node, component in record
+        ], dtype=np.int64)
+
+    def run(self, n_steps, forces=1, record=None, path=None):
+        """
+        Integrate n_steps time steps from the current state.
+
+        forces is a scale factor on the loads of the truss, a function of
+        time returning a scale factor or a full force vector, or an
+        (n_steps + 1, n_dof) array of force vectors. record is a list of
+        (node_id, 'u1' | 'u2' | 'u3') whose displacements are kept, every
+        degree of freedom by default, and path a .npy file they are
+        streamed to.
+        """
+        log.info(f'Integrating {n_steps} time steps of {self.dt}.')
+        dt, alpha, beta, gamma = self.dt, self.alpha, self.beta, self.gamma
+        a0, a1 = self.damping
+        free = self.free
+        mass = self.mass[free]
+        start = self.elapsed
+        self._static = self.truss.force_matrix().ravel()
+
+        def load(step):
+            if isinstance(forces, np.ndarray) and forces.ndim == 2:
+                return forces[step]
+            return self.forces(forces, start + step * dt)
+
+        dofs = self.record_dofs(record)
+        shape = (n_steps + 1, len(dofs))
+        if path is None:
+            self.history = np.zeros(shape)
+        else:
+            self.history = np.lib.format.open_memmap(
+                path, mode='w+', dtype=np.float64, shape=shape
+            )
+
+        u, v, a = self.u, self.v, self.a
+        F = load(0)
+        # Initial accelerations in equilibrium with the initial state.
+        eu, ev = self.elongation(u), self.elongation(v)
+        unbalanced = (
+            F - self.internal_forces(u + a1 * v, eu + a1 * ev)
+            - a0 * self.mass * v
+        )
+        a[free] = np.divide(
+            unbalanced[free], mass, out=np.zeros(len(free)), where=mass > 0
+        )
+        ea = self.elongation(a)
+
+        table = self.table
+        self.history[0] = u[dofs]
+        stress = table['E'] * eu / table['L']
+        self.stress_envelope = envelope = np.stack([stress, stress])
+
+        for step in range(1, n_steps + 1):
+            F_next = load(step)
+            u_predicted = u + dt * v + dt**2 * (0.5 - beta) * a
+            v_predicted = v + (1 - gamma) * dt * a
+
+            # Element elongations are linear in the nodal values and are
+            # updated alongside them, so each step gathers them only for the
+            # new accelerations.
+            eu_predicted = eu + dt * ev + dt**2 * (0.5 - beta) * ea
+            ev_predicted = ev + (1 - gamma) * dt * ea
+
+            # Internal and damping forces at t_n+1+alpha of the predictors,
+            # with a single product with K.
+            combined = (
+                (1 + alpha) * (u_predicted + a1 * v_predicted)
+                - alpha * (u + a1 * v)
+            )
+            e_combined = (
+                (1 + alpha) * (eu_predicted + a1 * ev_predicted)
+                - alpha * (eu + a1 * ev)
+            )
+            rhs = (
+                (1 + alpha) * F_next - alpha * F
+                - self.internal_forces(combined, e_combined)
+                - a0 * self.mass * ((1 + alpha) * v_predicted - alpha * v)
+            )
+
+            a = np.zeros(self.size)
+            a[free] = np.ravel(self._solve(rhs[free]))
+            ea = self.elongation(a)
+            u = u_predicted + beta * dt**2 * a
+            v = v_predicted + gamma * dt * a
+            eu = eu_predicted + beta * dt**2 * ea
+            ev = ev_predicted + gamma * dt * ea
+            F = F_next
+
+            self.history[step] = u[dofs]
+            stress = table['E'] * eu / table['L']
+            np.minimum(envelope[0], stress, out=envelope[0])
+            np.maximum(envelope[1], stress, out=envelope[1])
+
+        if path is not None:
+            self.history.flush()
+        self.u, self.v, self.a = u, v, a
+        self.time = start + dt * np.arange(n_steps + 1)
+        self.elapsed = self.time[-1]
+        log.info('Finished the time history analysis.')
+        return self.history
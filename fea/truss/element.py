@@ -24,6 +24,8 @@ class Element():
         Young's modulus [MPa].
     A : float
         Cross sectional area of the element [mm^2].
+    Fy : float
+        Allowable stress [MPa], or None if not given.
     L : float
         Length of the element.
     Cx : float
@@ -32,6 +34,8 @@ class Element():
         Direction cosine in y.
     Cz : float
         Direction cosine in z.
+    DOF : int
+        Degrees of freedom per node, 2 for a planar truss.
     K : ndarray
         Stiffness matrix for the element in global coordinates.
 
@@ -42,13 +46,15 @@ class Element():
 
     """
 
-    def __init__(self, id, index, nodei, nodej, mat_prop):
+    def __init__(self, id, index, nodei, nodej, mat_prop, DOF=3):
         self.id = id
         self.index = index
         self.nodei = nodei
         self.nodej = nodej
         self.E = mat_prop['E']
         self.A = mat_prop['A']
+        self.Fy = mat_prop.get('Fy')
+        self.DOF = DOF
 
         # Calculated element properties.
         log.debug(f'Calculating element[{self.id}] length.')
@@ -72,6 +78,15 @@ class Element():
         Cz = self.Cz
 
         log.debug(f'Calculating element[{self.id}] stiffness matrix.')
+        if self.DOF == 2:
+            self.K = E * A / L * np.array([
+                [ Cx**2,  Cx*Cy, -Cx**2, -Cx*Cy],  # noqa: E201
+                [ Cx*Cy,  Cy**2, -Cx*Cy, -Cy**2],  # noqa: E201
+                [-Cx**2, -Cx*Cy,  Cx**2,  Cx*Cy],  # noqa: E201
+                [-Cx*Cy, -Cy**2,  Cx*Cy,  Cy**2],  # noqa: E201
+            ])
+            return
+
         self.K = E * A / L * np.array([
             [ Cx**2,  Cx*Cy,  Cx*Cz, -Cx**2, -Cx*Cy, -Cx*Cz],  # noqa: E201
             [ Cx*Cy,  Cy**2,  Cy*Cz, -Cx*Cy, -Cy**2, -Cy*Cz],  # noqa: E201
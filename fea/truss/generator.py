@@ -0,0 +1,111 @@
+import logging
+
+log = logging.getLogger(__name__)
+
+
+def generate_truss(
+    n_bays,
+    bay_length=1000,
+    height=1000,
+    width=1000,
+    E=200000,
+    A=100,
+    load=-1000,
+    spatial=False
+):
+    """
+    Generate a simply supported girder truss with n_bays panels.
+
+    The planar girder is a Warren truss with verticals lying in the x-y plane.
+    The spatial girder is a box truss with every face and every cross-section
+    triangulated. Nodes are numbered along the span so that the assembled
+    stiffness matrix is banded.
+
+    Returns a dictionary of keyword arguments for Truss.
+    """
+    log.debug(f'Generating truss with {n_bays} bays.')
+    if spatial:
+        offsets = [(0, 0), (height, 0), (0, width), (height, width)]
+    else:
+        offsets = [(0, 0), (height, 0)]
+    per_station = len(offsets)
+
+    mat_prop = {}
+    nodal_coords = {}
+    connectivity = {}
+    force_vector = []
+    boundary_conditions = []
+
+    def node_id(station, k):
+        return f'n{station*per_station + k}'
+
+    def add_element(i, j):
+        id = f'e{len(connectivity)}'
+        connectivity[id] = {'i': i, 'j': j}
+        mat_prop[id] = {'E': E, 'A': A}
+
+    for station in range(n_bays + 1):
+        for k, (y, z) in enumerate(offsets):
+            nodal_coords[node_id(station, k)] = {
+                'x': station * bay_length,
+                'y': y,
+                'z': z,
+            }
+
+    for station in range(n_bays + 1):
+        # Cross-section members, triangulated.
+        if spatial:
+            add_element(node_id(station, 0), node_id(station, 1))
+            add_element(node_id(station, 2), node_id(station, 3))
+            add_element(node_id(station, 0), node_id(station, 2))
+            add_element(node_id(station, 1), node_id(station, 3))
+            add_element(node_id(station, 0), node_id(station, 3))
+        else:
+            add_element(node_id(station, 0), node_id(station, 1))
+
+        if station == n_bays:
+            break
+
+        # Chords along the span.
+        for k in range(per_station):
+            add_element(node_id(station, k), node_id(station + 1, k))
+
+        # Alternating diagonals on every longitudinal face.
+        a, b = (0, 1) if station % 2 == 0 else (1, 0)
+        add_element(node_id(station, a), node_id(station + 1, b))
+        if spatial:
+            add_element(node_id(station, a + 2), node_id(station + 1, b + 2))
+            add_element(node_id(station, a*2), node_id(station + 1, b*2))
+            add_element(
+                node_id(station, a*2 + 1),
+                node_id(station + 1, b*2 + 1)
+            )
+
+    for station in range(1, n_bays):
+        for k, (y, z) in enumerate(offsets):
+            if y == 0:
+                force_vector.append({
+                    'node': node_id(station, k),
+                    'u1': 0,
+                    'u2': load,
+                    'u3': 0,
+                })
+
+    for station in range(n_bays + 1):
+        for k, (y, z) in enumerate(offsets):
+            pinned = station == 0 and y == 0
+            roller = station == n_bays and y == 0
+            boundary_conditions.append({
+                'node': node_id(station, k),
+                'u1': pinned,
+                'u2': pinned or roller,
+                'u3': not spatial or pinned or (roller and z == 0),
+            })
+
+    return {
+        'mat_prop': mat_prop,
+        'nodal_coords': nodal_coords,
+        'connectivity': connectivity,
+        'force_vector': force_vector,
+        'boundary_conditions': boundary_conditions,
+    }
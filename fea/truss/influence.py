@@ -0,0 +1,189 @@
+import logging
+import numpy as np
+from scipy import sparse
+
+from . import solver
+
+log = logging.getLogger(__name__)
+
+COMPONENTS = ('u1', 'u2', 'u3')
+
+
+class InfluenceLines():
+    """
+    InfluenceLines class, stresses in every member of a truss per unit load
+    at each node of a load path, and envelopes of moving loads.
+
+    A unit load is applied at every node of the path at once, as the columns
+    of one right-hand side solved against a single factorization of the
+    stiffness matrix. Between nodes the load is shared by the two adjacent
+    nodes, as by deck stringers, so influence lines are linear between
+    nodes.
+
+    ...
+
+    Attributes
+    ----------
+    truss : Truss
+        Truss carrying the loads, with its boundary conditions. Its own
+        loads are ignored.
+    path : list
+        Ids of the loaded nodes, in order along the path.
+    component : str
+        Direction of the loads, 'u1', 'u2' or 'u3'.
+    unit : float
+        Value of the unit load, -1 for gravity loads along -u2.
+    stations : ndarray
+        Distance along the path of each of its nodes.
+    stress : ndarray
+        (n_elements, n_path) stress in each element per unit load at each
+        node of the path.
+
+    Methods
+    -------
+    compute()
+    at(positions)
+    response(loads, spacings, direction)
+    envelope(loads, spacings, direction)
+
+    """
+
+    def __init__(self, truss, path, component='u2', unit=-1.0):
+        if len(path) < 2:
+            raise ValueError('A load path needs at least 2 nodes.')
+        self.truss = truss
+        self.path = list(path)
+        self.component = component
+        self.unit = unit
+        self.stress = None
+
+        t = truss
+        t.create_nodes()
+        if COMPONENTS.index(component) >= t.DOF:
+            raise ValueError(
+                f'Load along {component} on a planar truss, solve it with '
+                'planar=False.'
+            )
+        coords = t.coords[[t.nodes[id].index for id in self.path]]
+        self.stations = np.concatenate([
+            [0], np.cumsum(np.linalg.norm(np.diff(coords, axis=0), axis=1))
+        ])
+        if not (np.diff(self.stations) > 0).all():
+            raise ValueError('Load path nodes must be distinct.')
+
+    def compute(self):
+        log.info(f'Computing influence lines of {len(self.path)} positions.')
+        t = self.truss
+        t.create_elements()
+        t.select_solver()
+        if t.solver_info['solver'] in ('iterative', 'matrix-free'):
+            # Every unit load is solved against the same factorization.
+            log.info('Factoring with the sparse solver for the unit loads.')
+            t.solver = 'sparse'
+            t.select_solver()
+        t.assemblage()
+        K_reduced, _, free = t.reduced_system()
+        method = t.solver_info['solver']
+
+        DOF = t.DOF
+        size = len(t.nodes) * DOF
+        loaded = np.array([
+            DOF * t.nodes[id].index + COMPONENTS.index(self.component)
+            for id in self.path
+        ], dtype=np.int64)
+        forces = np.zeros([size, len(self.path)])
+        forces[loaded, np.arange(len(self.path))] = self.unit
+
+        log.info('Solving the unit loads.')
+        Q = np.zeros_like(forces)
+        Q[free] = solver.factorize(K_reduced, method)(forces[free])
+
+        table = t.element_table()
+        q = Q.reshape(len(t.nodes), DOF, -1)
+        elongation = np.einsum(
+            'ed,edp->ep', table['C'], q[table['j']] - q[table['i']]
+        )
+        self.stress = (table['E'] / table['L'])[:, None] * elongation
+        return self.stress
+
+    def interpolation(self, positions, loads=None):
+        """
+        (n_path, n_positions) sparse matrix sharing the load at each
+        position between the nodes of the path on either side of it.
+        Positions off the path carry no load. positions may have a column
+        per load, each with its value in loads.
+        """
+        positions = np.asarray(positions, dtype=float)
+        if positions.ndim == 1:
+            positions = positions[:, None]
+        if loads is None:
+            loads = np.ones(positions.shape[1])
+        s = self.stations
+        column = np.broadcast_to(
+            np.arange(len(positions))[:, None], positions.shape
+        )
+        value = np.broadcast_to(
+            np.asarray(loads, dtype=float), positions.shape
+        )
+
+        on_path = (positions >= s[0]) & (positions <= s[-1])
+        x, column, value = positions[on_path], column[on_path], value[on_path]
+        node = np.clip(np.searchsorted(s, x, side='right') - 1, 0, len(s) - 2)
+        weight = (x - s[node]) / (s[node + 1] - s[node])
+
+        rows = np.concatenate([node, node + 1])
+        columns = np.concatenate([column, column])
+        values = np.concatenate([value * (1 - weight), value * weight])
+        return sparse.coo_matrix(
+            (values, (rows, columns)),
+            shape=(len(s), len(positions)),
+        ).tocsr()
+
+    def at(self, positions):
+        """
+        (n_elements, n_positions) stress per unit load at each distance
+        along the path.
+        """
+        if self.stress is None:
+            self.compute()
+        return (self.interpolation(positions).T @ self.stress.T).T
+
+    def response(self, loads, spacings=(), direction=1):
+        """
+        Stress in every element for each position of a train of loads.
+
+        loads are the axle loads, in units of the unit load, from the lead
+        axle back, spacings the distances between consecutive axles, and
+        direction 1 if the train moves along the path and -1 against it.
+
+        The stress is linear between the positions where an axle is at a
+        node of the path, so only those positions are evaluated. Returns
+        the lead axle positions and the (n_elements, n_positions) stresses.
+        """
+        if self.stress is None:
+            self.compute()
+        loads = np.asarray(loads, dtype=float)
+        if len(spacings) != len(loads) - 1:
+            raise ValueError('Give a spacing between each pair of axles.')
+        offsets = -direction * np.concatenate([[0], np.cumsum(spacings)])
+
+        lead = np.unique((self.stations[:, None] - offsets).ravel())
+        W = self.interpolation(lead[:, None] + offsets, loads)
+        return lead, (W.T @ self.stress.T).T
+
+    def envelope(self, loads, spacings=(), direction=1):
+        """
+        Largest and smallest stress in every element as a train of loads
+        crosses the path, and the lead axle positions causing them.
+        """
+        log.info(f'Computing the envelope of a train of {len(loads)} loads.')
+        lead, stress = self.response(loads, spacings, direction)
+        high = stress.argmax(axis=1)
+        low = stress.argmin(axis=1)
+        elements = np.arange(len(stress))
+        return {
+            'max': stress[elements, high],
+            'min': stress[elements, low],
+            'max_position': lead[high],
+            'min_position': lead[low],
+        }
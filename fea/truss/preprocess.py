@@ -0,0 +1,269 @@
+import heapq
+import logging
+import numpy as np
+from scipy import sparse
+from scipy.sparse import csgraph
+from scipy.spatial import cKDTree
+
+log = logging.getLogger(__name__)
+
+
+def coordinates(nodal_coords):
+    return np.array([
+        (n['x'], n['y'], n.get('z', 0)) for n in nodal_coords.values()
+    ], dtype=float).reshape(-1, 3)
+
+
+def weld_nodes(coords, tolerance=1e-6):
+    """
+    Index of the node each node is merged into. Nodes closer than
+    tolerance, directly or through a chain of such nodes, are merged into
+    the first of them.
+    """
+    n = len(coords)
+    pairs = np.array(
+        list(cKDTree(coords).query_pairs(tolerance)), dtype=np.int64
+    ).reshape(-1, 2)
+    graph = sparse.coo_matrix(
+        (np.ones(len(pairs)), (pairs[:, 0], pairs[:, 1])),
+        shape=(n, n),
+    )
+    _, labels = csgraph.connected_components(graph, directed=False)
+    _, first = np.unique(labels, return_index=True)
+    return first[labels]
+
+
+def duplicates(i, j):
+    """
+    Whether each member connects the same pair of nodes as an earlier one.
+    """
+    n = max(i.max(initial=0), j.max(initial=0)) + 1
+    key = np.minimum(i, j) * n + np.maximum(i, j)
+    _, first = np.unique(key, return_index=True)
+    duplicate = np.ones(len(i), dtype=bool)
+    duplicate[first] = False
+    return duplicate
+
+
+def sweep(coords, start, end, key, tolerance=1e-6):
+    """
+    Move the start of members overlapping a shorter member that starts at
+    the same node, along the same direction key, to the far node of the
+    shorter member, until no such overlaps are left.
+
+    The members of each (node, direction) group are kept in a heap by the
+    position of their end along the direction. Groups are visited in order
+    along their direction, and all but the shortest members of a group move
+    on together, the smaller heap merged into the larger, so each member is
+    moved to its final node in O(log^2 N).
+    """
+    n_nodes = len(coords)
+    start = start.copy()
+
+    # Label of each direction, and a unit vector along it.
+    by_key = np.lexsort(key.T[::-1])
+    change = np.ones(len(key), dtype=bool)
+    change[1:] = (key[by_key][1:] != key[by_key][:-1]).any(axis=1)
+    label = np.empty(len(key), dtype=np.int64)
+    label[by_key] = np.cumsum(change) - 1
+    directions = key[by_key][change].astype(float)
+    directions /= np.linalg.norm(directions, axis=1)[:, None]
+    position = np.einsum('ed,ed->e', coords[end], directions[label])
+
+    group = label * n_nodes + start
+    order = np.argsort(group, kind='stable')
+    sorted_group = group[order]
+    groups, first, counts = np.unique(
+        sorted_group, return_index=True, return_counts=True
+    )
+
+    def place(g):
+        d = g // n_nodes
+        return d, coords[g % n_nodes] @ directions[d], g
+
+    # Groups with more than one member, and those members move to.
+    queue = [place(g) for g in groups[counts > 1].tolist()]
+    heapq.heapify(queue)
+    queued = set(g for _, _, g in queue)
+    arrivals = {}
+    while queue:
+        _, x, g = heapq.heappop(queue)
+        k = np.searchsorted(groups, g)
+        members = arrivals.pop(g, [])
+        if k < len(groups) and groups[k] == g:
+            for e in order[first[k]:first[k] + counts[k]].tolist():
+                heapq.heappush(members, (position[e], e))
+
+        # Members as long as the shortest are duplicates, not overlaps.
+        shortest = members[0][0]
+        while members and members[0][0] <= shortest + tolerance:
+            _, e = heapq.heappop(members)
+            start[e] = g % n_nodes
+        if not members:
+            continue
+
+        target = g // n_nodes * n_nodes + end[e]
+        waiting = arrivals.get(target, [])
+        if len(waiting) > len(members):
+            members, waiting = waiting, members
+        for member in waiting:
+            heapq.heappush(members, member)
+        arrivals[target] = members
+        if target not in queued:
+            queued.add(target)
+            heapq.heappush(queue, place(target))
+
+    return start
+
+
+def trim_overlaps(coords, i, j, tolerance=1e-6, angle=1e-6):
+    """
+    Shorten members overlapping a shorter collinear member that starts at
+    the same node, so that they start at its other end instead, until no
+    such overlaps are left. Members are collinear if their directions agree
+    within angle, in radians. Each end of the members is moved to its final
+    node in one sweep, in O(N log N). Returns the new end nodes and whether
+    each member was trimmed.
+    """
+    i, j = i.copy(), j.copy()
+    d = coords[j] - coords[i]
+    L = np.linalg.norm(d, axis=1)
+    valid = np.flatnonzero(L > 0)
+    key = np.round(d[valid] / L[valid, None] / angle).astype(np.int64)
+
+    # Members oriented along the same direction of their line, with the
+    # first nonzero component of its key positive.
+    flip = key[np.arange(len(key)), np.argmax(key != 0, axis=1)] < 0
+    key[flip] *= -1
+    start = np.where(flip, j[valid], i[valid])
+    end = np.where(flip, i[valid], j[valid])
+
+    new_start = sweep(coords, start, end, key, tolerance)
+    new_end = sweep(coords, end, new_start, -key, tolerance)
+
+    i[valid] = np.where(flip, new_end, new_start)
+    j[valid] = np.where(flip, new_start, new_end)
+    trimmed = np.zeros(len(i), dtype=bool)
+    trimmed[valid] = (new_start != start) | (new_end != end)
+    return i, j, trimmed
+
+
+def clean_truss(
+    mat_prop,
+    nodal_coords,
+    connectivity,
+    force_vector=(),
+    boundary_conditions=(),
+    tolerance=1e-6,
+    overlaps=True
+):
+    """
+    Weld coincident nodes and remove degenerate members of a truss.
+
+    Nodes within tolerance of each other are merged with a KD-tree, in
+    O(N log N). Members are remapped to the merged nodes, members shorter
+    than tolerance and duplicate members are removed, and with overlaps
+    members overlapping a shorter collinear member are trimmed. Loads on
+    merged nodes are summed and their boundary conditions combined.
+
+    Returns the keyword arguments for Truss of the cleaned truss, and a
+    report of the merged nodes and the removed and trimmed members.
+    """
+    log.info(f'Cleaning truss with {len(nodal_coords)} nodes.')
+    ids = list(nodal_coords)
+    index = {id: k for k, id in enumerate(ids)}
+    coords = coordinates(nodal_coords)
+    target = weld_nodes(coords, tolerance)
+    merged = {
+        ids[k]: ids[target[k]]
+        for k in np.flatnonzero(target != np.arange(len(ids)))
+    }
+
+    element_ids = list(connectivity)
+    i = np.array(
+        [index[c['i']] for c in connectivity.values()], dtype=np.int64
+    )
+    j = np.array(
+        [index[c['j']] for c in connectivity.values()], dtype=np.int64
+    )
+    original = (i, j)
+    i, j = target[i], target[j]
+
+    removed = {}
+    keep = np.ones(len(i), dtype=bool)
+    trimmed = np.zeros(len(i), dtype=bool)
+
+    def remove(degenerate, reason):
+        for e in np.flatnonzero(keep)[degenerate]:
+            removed[element_ids[e]] = reason
+            keep[e] = False
+
+    def length():
+        kept = keep.nonzero()
+        return np.linalg.norm(coords[j[kept]] - coords[i[kept]], axis=1)
+
+    remove(length() <= tolerance, 'zero length')
+    remove(duplicates(i[keep], j[keep]), 'duplicate')
+    if overlaps:
+        kept = np.flatnonzero(keep)
+        i[kept], j[kept], trimmed[kept] = trim_overlaps(
+            coords, i[kept], j[kept], tolerance
+        )
+        # Members trimmed to another member, or to nothing.
+        remove(length() <= tolerance, 'overlapping')
+        remove(duplicates(i[keep], j[keep]), 'overlapping')
+    trimmed &= keep
+
+    log.info(
+        f'Merged {len(merged)} nodes, removed {len(removed)} members and '
+        f'trimmed {trimmed.sum()} members.'
+    )
+
+    forces = {}
+    for f in force_vector:
+        node = merged.get(f['node'], f['node'])
+        if node in forces:
+            total = forces[node]
+            for key in ('u1', 'u2', 'u3'):
+                if key in f:
+                    total[key] = total.get(key, 0) + f[key]
+        else:
+            forces[node] = {**f, 'node': node}
+
+    constraints = {}
+    for bc in boundary_conditions:
+        node = merged.get(bc['node'], bc['node'])
+        if node in constraints:
+            combined = constraints[node]
+            for key in ('u1', 'u2', 'u3'):
+                if key in bc:
+                    combined[key] = combined.get(key, False) or bc[key]
+        else:
+            constraints[node] = {**bc, 'node': node}
+
+    changed = (i != original[0]) | (j != original[1])
+    model = {
+        'mat_prop': {
+            element_ids[e]: mat_prop[element_ids[e]]
+            for e in np.flatnonzero(keep)
+        },
+        'nodal_coords': {
+            id: c for id, c in nodal_coords.items() if id not in merged
+        },
+        'connectivity': {
+            element_ids[e]: {
+                **connectivity[element_ids[e]],
+                'i': ids[i[e]],
+                'j': ids[j[e]],
+            } if changed[e] else connectivity[element_ids[e]]
+            for e in np.flatnonzero(keep)
+        },
+        'force_vector': list(forces.values()),
+        'boundary_conditions': list(constraints.values()),
+    }
+    report = {
+        'merged_nodes': merged,
+        'removed_members': removed,
+        'trimmed_members': [element_ids[e] for e in np.flatnonzero(trimmed)],
+    }
+    return model, report
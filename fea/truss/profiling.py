@@ -0,0 +1,130 @@
+import cProfile
+import io
+import logging
+import os
+import pstats
+import re
+import threading
+import time
+import tracemalloc
+import uuid
+from contextlib import contextmanager
+
+log = logging.getLogger(__name__)
+
+PROFILE_PATH = os.environ.get(
+    'FEA_PROFILE_DIR',
+    os.path.join(os.path.expanduser('~'), '.fea', 'profiles'),
+)
+
+# cProfile and tracemalloc hooks are process wide, so one profile runs at a
+# time.
+_lock = threading.Lock()
+
+
+def profile_id(name):
+    name = re.sub(r'[^A-Za-z0-9_-]', '_', name)
+    stamp = time.strftime('%Y%m%d-%H%M%S')
+    return f'{name}-{stamp}-{uuid.uuid4().hex[:8]}'
+
+
+def allocation_summary(snapshot, top=25):
+    """
+    Lines of the top memory allocating source lines of a tracemalloc
+    snapshot, excluding the profiler's own allocations.
+    """
+    snapshot = snapshot.filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, __file__),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap*>'),
+    ])
+    stats = snapshot.statistics('lineno')
+    lines = [
+        f'{s.size / 2**20:10.3f} MB {s.count:10d} blocks  '
+        f'{s.traceback[0].filename}:{s.traceback[0].lineno}'
+        for s in stats[:top]
+    ]
+    rest = sum(s.size for s in stats[top:])
+    lines.append(f'{rest / 2**20:10.3f} MB in {len(stats[top:])} other lines')
+    return lines
+
+
+@contextmanager
+def profile(name='solve', path=None, top=25, frames=1, blocking=True):
+    """
+    Profile the block with cProfile and trace its allocations with
+    tracemalloc, e.g.
+
+        with profile('customer-model') as report:
+            t.solve_truss()
+
+    The cProfile stats are saved to <path>/<id>.prof, readable with pstats
+    or snakeviz, and a summary of the top functions and allocating lines to
+    <path>/<id>.txt. Yields a dict filled on exit with the id, the paths,
+    the elapsed time and the peak traced memory. Only the calling thread is
+    profiled, but tracemalloc traces the whole process, so the allocations
+    and peak include those of other threads running at the same time, such
+    as concurrent requests. If another profile is running, waits for it, or
+    with blocking=False runs the block unprofiled and yields None.
+    """
+    if not _lock.acquire(blocking):
+        log.info(f'Another profile is running, not profiling {name}.')
+        yield None
+        return
+
+    path = path or PROFILE_PATH
+    report = {'id': profile_id(name)}
+    tracing = tracemalloc.is_tracing()
+    profiler = cProfile.Profile()
+    snapshot = None
+    try:
+        # Starting or clearing the traces also resets the peak.
+        if tracing:
+            tracemalloc.clear_traces()
+        else:
+            tracemalloc.start(frames)
+        log.info(f'Profiling {report["id"]}.')
+        start = time.perf_counter()
+        profiler.enable()
+        try:
+            yield report
+        finally:
+            profiler.disable()
+            report['elapsed'] = time.perf_counter() - start
+            _, report['peak_memory'] = tracemalloc.get_traced_memory()
+            snapshot = tracemalloc.take_snapshot()
+    finally:
+        if not tracing:
+            tracemalloc.stop()
+        try:
+            if snapshot is not None:
+                save(profiler, snapshot, path, report, top)
+        except OSError as e:
+            log.error(f'Could not save profile {report["id"]}: {e}')
+        finally:
+            _lock.release()
+
+
+def save(profiler, snapshot, path, report, top=25):
+    os.makedirs(path, exist_ok=True)
+    report['profile'] = os.path.join(path, f'{report["id"]}.prof')
+    report['summary'] = os.path.join(path, f'{report["id"]}.txt')
+    profiler.dump_stats(report['profile'])
+
+    functions = io.StringIO()
+    stats = pstats.Stats(profiler, stream=functions)
+    stats.sort_stats('cumulative').print_stats(top)
+    with open(report['summary'], 'w') as f:
+        f.write(
+            f'{report["id"]}\n'
+            f'elapsed {report["elapsed"]:.3f} s, '
+            f'peak traced memory {report["peak_memory"] / 2**20:.3f} MB\n\n'
+            'Top allocations, of every thread of the process\n'
+        )
+        f.write('\n'.join(allocation_summary(snapshot, top)))
+        f.write('\n\nTop functions\n')
+        f.write(functions.getvalue())
+    log.info(
+        f'Saved profile {report["id"]}, {report["elapsed"]:.3f} s and '
+        f'{report["peak_memory"] / 2**20:.1f} MB peak, to {path}.'
+    )
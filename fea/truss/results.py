@@ -0,0 +1,201 @@
+from collections.abc import Mapping
+
+import numpy as np
+
+
+def largest(values, k, index=None):
+    """
+    Indices of the k largest values, largest first and ties by index, among
+    index or all values. Only the values at least as large as the k-th
+    largest are sorted.
+    """
+    if index is None:
+        index = np.arange(len(values))
+    index = np.asarray(index, dtype=np.int64)
+    candidates = values[index]
+    if k < len(index):
+        # Every value tied with the k-th largest, not an arbitrary one.
+        kth = -np.partition(-candidates, k - 1)[k - 1]
+        index = index[candidates >= kth]
+    return index[np.lexsort((index, -values[index]))][:k]
+
+
+class ArrayView(Mapping):
+    """
+    ArrayView class, represent a read-only dictionary view over the rows of
+    an array. Entries are built only when accessed.
+
+    ...
+
+    Attributes
+    ----------
+    ids : list
+        Id of each row of the array.
+    array : ndarray
+        Array backing the view.
+    fields : tuple
+        Names of the columns of the array, or None for a 1d array.
+
+    """
+
+    def __init__(self, ids, array, fields=None):
+        self.ids = ids
+        self.array = array
+        self.fields = fields
+        self._index = None
+
+    def index(self, id):
+        if self._index is None:
+            self._index = {id: i for i, id in enumerate(self.ids)}
+        return self._index[id]
+
+    def __getitem__(self, id):
+        row = self.array[self.index(id)]
+        if self.fields is None:
+            return float(row)
+        return dict(zip(self.fields, row.tolist()))
+
+    def __iter__(self):
+        return iter(self.ids)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, id):
+        try:
+            self.index(id)
+        except KeyError:
+            return False
+        return True
+
+    def __array__(self, dtype=None, copy=None):
+        if dtype is None:
+            return self.array
+        return self.array.astype(dtype)
+
+    def __repr__(self):
+        return f'{type(self).__name__}({dict(self)})'
+
+
+class TrussResults():
+    """
+    TrussResults class, represent the solution of a truss backed by arrays.
+
+    The arrays are views of the solver output where possible, and export to
+    NumPy or any buffer consumer without copying.
+
+    ...
+
+    Attributes
+    ----------
+    node_ids : list
+        Id of each node, in node index order.
+    element_ids : list
+        Id of each element, in element index order.
+    coords : ndarray
+        (n_nodes, 3) undeformed nodal coordinates.
+    displacements : ndarray
+        (n_nodes, DOF) nodal displacements, a view of the displacement vector.
+    deformed_coords : ndarray
+        (n_nodes, 3) deformed nodal coordinates.
+    stress_array : ndarray
+        (n_elements,) axial stress of each element.
+    deformed_nodal_coords : ArrayView
+        {'node_id': {'x': ..., 'y': ..., 'z': ...}, ...}
+    nodal_displacements : ArrayView
+        {'node_id': {'u1': ..., 'u2': ..., 'u3': ...}, ...}
+    stresses : ArrayView
+        {'ele_id': ..., ...}
+    reaction_array : ndarray
+        (n_nodes, DOF) support reactions, or None if not post-processed.
+    axial_force_array : ndarray
+        (n_elements,) axial force of each element.
+    energy_array : ndarray
+        (n_elements,) strain energy of each element.
+    utilization_array : ndarray
+        (n_elements,) stress to allowable stress ratio of each element.
+    strain_energy : float
+        Total strain energy.
+    equilibrium_residual : float
+        Relative out of balance force at the free degrees of freedom.
+    reactions : ArrayView
+        {'node_id': {'u1': ..., 'u2': ..., 'u3': ...}, ...}
+    axial_forces : ArrayView
+        {'ele_id': ..., ...}
+    utilization : ArrayView
+        {'ele_id': ..., ...}
+
+    Methods
+    -------
+    to_numpy()
+
+    """
+
+    def __init__(
+        self,
+        node_ids,
+        element_ids,
+        coords,
+        Q,
+        stress_array,
+        reactions=None,
+        axial_forces=None,
+        element_energy=None,
+        utilization=None,
+        equilibrium_residual=None
+    ):
+        self.node_ids = node_ids
+        self.element_ids = element_ids
+        self.coords = coords
+        self.displacements = Q.reshape(len(node_ids), -1)
+        DOF = self.displacements.shape[1]
+        self.deformed_coords = coords.copy()
+        self.deformed_coords[:, :DOF] += self.displacements
+        self.stress_array = stress_array
+
+        self.deformed_nodal_coords = ArrayView(
+            node_ids,
+            self.deformed_coords,
+            ('x', 'y', 'z'),
+        )
+        self.nodal_displacements = ArrayView(
+            node_ids,
+            self.displacements,
+            ('u1', 'u2', 'u3')[:DOF],
+        )
+        self.stresses = ArrayView(element_ids, stress_array)
+
+        self.reaction_array = reactions
+        self.axial_force_array = axial_forces
+        self.energy_array = element_energy
+        self.utilization_array = utilization
+        self.equilibrium_residual = equilibrium_residual
+        self.strain_energy = None
+        self.reactions = None
+        self.axial_forces = None
+        self.utilization = None
+        if reactions is not None:
+            self.reactions = ArrayView(
+                node_ids,
+                reactions,
+                ('u1', 'u2', 'u3')[:DOF],
+            )
+        if axial_forces is not None:
+            self.axial_forces = ArrayView(element_ids, axial_forces)
+        if element_energy is not None:
+            self.strain_energy = float(element_energy.sum())
+        if utilization is not None:
+            self.utilization = ArrayView(element_ids, utilization)
+
+    def to_numpy(self):
+        arrays = {
+            'coords': self.coords,
+            'displacements': self.displacements,
+            'deformed_coords': self.deformed_coords,
+            'stresses': self.stress_array,
+            'reactions': self.reaction_array,
+            'axial_forces': self.axial_force_array,
+            'element_energy': self.energy_array,
+            'utilization': self.utilization_array,
+        }
+        return {k: v for k, v in arrays.items() if v is not None}
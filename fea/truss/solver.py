@@ -0,0 +1,384 @@
+import json
+import logging
+import os
+
+import numpy as np
+from scipy import linalg
+from scipy.sparse import linalg as splinalg
+
+from . import banded
+
+log = logging.getLogger(__name__)
+
+PROFILE_PATH = os.environ.get(
+    'FEA_SOLVER_PROFILE',
+    os.path.join(os.path.expanduser('~'), '.fea', 'solver_profile.json'),
+)
+
+# Conservative defaults, used until the machine has been calibrated.
+DEFAULT_PROFILE = {
+    # Sustained dense LU factorization rate [flop/s].
+    'dense_flops': 2e9,
+    # Banded Cholesky factorization rate [flop/s].
+    'banded_flops': 1e9,
+    # Sparse direct factorization rate [flop/s].
+    'sparse_flops': 2e8,
+    # Sparse matrix-vector product rate [flop/s].
+    'spmv_flops': 2e8,
+    # Conjugate gradient iterations, c * n_dof ** p.
+    'cg_coefficient': 2.0,
+    'cg_exponent': 0.75,
+    # Fraction of the available memory a single solve may use.
+    'memory_fraction': 0.5,
+}
+
+SOLVERS = {
+    'dense': 'dense',
+    'banded': 'banded',
+    'sparse': 'sparse',
+    'iterative': 'sparse',
+    # Element by element products, the stiffness matrix is never assembled.
+    'matrix-free': 'elements',
+}
+
+
+# Loaded profiles, keyed by path and modification time.
+_profiles = {}
+
+
+def load_profile(path=None):
+    path = path or PROFILE_PATH
+    try:
+        key = (path, os.stat(path).st_mtime)
+    except OSError:
+        return dict(DEFAULT_PROFILE)
+
+    if key not in _profiles:
+        profile = dict(DEFAULT_PROFILE)
+        with open(path) as f:
+            profile.update(json.load(f))
+        _profiles[key] = profile
+
+    return dict(_profiles[key])
+
+
+def save_profile(profile, path=None):
+    path = path or PROFILE_PATH
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(profile, f, indent=2)
+    log.info(f'Saved solver profile to {path}.')
+    return path
+
+
+def available_memory():
+    """
+    Available system memory in bytes, or None if it cannot be determined.
+    """
+    try:
+        with open('/proc/meminfo') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+
+    try:
+        return os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def cg_iterations(n_dof, profile):
+    return min(
+        n_dof,
+        profile['cg_coefficient'] * n_dof ** profile['cg_exponent']
+    )
+
+
+def estimate(solver, n_dof, nnz, bandwidth, profile, itemsize=8):
+    """
+    Estimate the peak memory [bytes] and time [s] of a solve.
+
+    n_dof is the size of the system, nnz the number of nonzeros of the
+    assembled stiffness matrix, bandwidth its half bandwidth and itemsize
+    the size of its entries in bytes.
+    """
+    n = float(n_dof)
+    b = float(min(bandwidth, n_dof))
+    # Sparse entries carry a 4 byte index.
+    entry = itemsize + 4
+    if solver == 'dense':
+        # Assemblage matrix, reduced copy and factors.
+        memory = 3 * itemsize * n**2
+        time = 2 / 3 * n**3 / profile['dense_flops']
+    elif solver == 'banded':
+        # Upper band and its Cholesky factor.
+        memory = 2 * itemsize * (b + 1) * n
+        time = n * b**2 / profile['banded_flops']
+    elif solver == 'sparse':
+        # Fill of the factors is bounded by the envelope of the matrix.
+        fill = n * b
+        memory = entry * nnz + 2 * entry * fill
+        time = 2 * n * b**2 / profile['sparse_flops']
+    elif solver == 'iterative':
+        memory = 2 * entry * nnz + 6 * 8 * n
+        time = (
+            cg_iterations(n_dof, profile) * 2 * nnz / profile['spmv_flops']
+        )
+    elif solver == 'matrix-free':
+        # Element table, about 80 bytes for the 2 DOF x DOF blocks of each
+        # element, conjugate gradient vectors and nodal preconditioner
+        # blocks. Gathering and scattering costs about twice a sparse
+        # product.
+        memory = 5 * nnz + 16 * 8 * n
+        time = (
+            cg_iterations(n_dof, profile) * 4 * nnz / profile['spmv_flops']
+        )
+    else:
+        raise ValueError(f'Unknown solver: {solver}')
+
+    return memory, time
+
+
+def select_solver(
+    n_dof,
+    nnz,
+    bandwidth,
+    solver='auto',
+    profile=None,
+    memory=None,
+    itemsize=8
+):
+    """
+    Select the storage format and solver for a system.
+
+    Picks the fastest solver whose estimated memory fits in the memory budget,
+    or the leanest one if none fits. Returns a dictionary describing the
+    selection.
+    """
+    profile = profile or load_profile()
+    if memory is None:
+        memory = available_memory()
+    budget = memory * profile['memory_fraction'] if memory else None
+
+    estimates = {
+        s: estimate(s, n_dof, nnz, bandwidth, profile, itemsize)
+        for s in SOLVERS
+    }
+
+    if solver != 'auto':
+        if solver not in SOLVERS:
+            raise ValueError(f'Unknown solver: {solver}')
+        selected = solver
+        reason = 'requested'
+    else:
+        fits = [
+            s for s in SOLVERS
+            if budget is None or estimates[s][0] <= budget
+        ]
+        if fits:
+            selected = min(fits, key=lambda s: estimates[s][1])
+            reason = 'fastest within memory budget'
+        else:
+            selected = min(SOLVERS, key=lambda s: estimates[s][0])
+            reason = 'no solver fits memory budget, using leanest'
+            log.warning(
+                f'No solver fits the memory budget of {budget:.3g} bytes.'
+            )
+
+    log.info(f'Selected {selected} solver ({reason}).')
+    return {
+        'solver': selected,
+        'storage': SOLVERS[selected],
+        'reason': reason,
+        'n_dof': n_dof,
+        'nnz': nnz,
+        'bandwidth': bandwidth,
+        'memory_budget': budget,
+        'estimated_memory': estimates[selected][0],
+        'estimated_time': estimates[selected][1],
+    }
+
+
+def conjugate_gradient(
+    matvec,
+    b,
+    precondition=None,
+    tol=1e-10,
+    max_iterations=None,
+    x0=None
+):
+    """
+    Preconditioned conjugate gradient for a symmetric positive definite
+    operator, starting from x0 or zero. Returns the solution and the number
+    of iterations.
+
+    Raises an ArithmeticError if it does not converge.
+    """
+    max_iterations = max_iterations or 10 * len(b)
+    if x0 is None:
+        x = np.zeros_like(b)
+        r = b.copy()
+    else:
+        x = np.array(x0, dtype=np.result_type(x0, b))
+        r = b - matvec(x)
+    z = precondition(r) if precondition else r
+    p = z.copy()
+    rz = r @ z
+    threshold = tol * np.linalg.norm(b)
+    if np.linalg.norm(r) <= threshold:
+        return x, 0
+
+    for iteration in range(1, max_iterations + 1):
+        Ap = matvec(p)
+        alpha = rz / (p @ Ap)
+        x += alpha * p
+        r -= alpha * Ap
+        if np.linalg.norm(r) <= threshold:
+            return x, iteration
+        z = precondition(r) if precondition else r
+        rz_new = r @ z
+        p *= rz_new / rz
+        p += z
+        rz = rz_new
+
+    raise ArithmeticError(
+        f'Conjugate gradient did not converge in {max_iterations} iterations.'
+    )
+
+
+def norm_inf(K, solver):
+    if solver == 'banded':
+        return float(banded.norm_inf(K))
+    return float(np.asarray(abs(K).sum(axis=1)).max(initial=0))
+
+
+def solve(K, F, solver):
+    """
+    Solve K Q = F with the selected solver. K is an ndarray for the dense
+    solver, the upper band of K for the banded solver and a scipy sparse
+    matrix otherwise.
+    """
+    if solver == 'dense':
+        return np.linalg.solve(K, F)
+
+    if solver == 'banded':
+        # Symmetric positive definite banded solve, LAPACK pbsv.
+        return linalg.solveh_banded(K, F)
+
+    if solver == 'sparse':
+        return splinalg.spsolve(K.tocsc(), F).reshape(F.shape)
+
+    if solver == 'iterative':
+        diagonal = K.diagonal()
+        Q, iterations = conjugate_gradient(
+            K.dot,
+            F.ravel(),
+            precondition=lambda r: r / diagonal,
+        )
+        log.info(f'Conjugate gradient converged in {iterations} iterations.')
+        return Q.reshape(F.shape)
+
+    raise ValueError(f'Unknown solver: {solver}')
+
+
+def factorize(K, solver):
+    """
+    Factor K once with the selected solver and return a function solving
+    K x = b for any b. The factorization keeps the precision of K.
+    """
+    if solver == 'dense':
+        factor = linalg.cho_factor(K)
+        return lambda b: linalg.cho_solve(factor, b)
+
+    if solver == 'banded':
+        factor = linalg.cholesky_banded(K)
+        return lambda b: linalg.cho_solve_banded((factor, False), b)
+
+    if solver == 'sparse':
+        return splinalg.splu(K.tocsc()).solve
+
+    if solver == 'iterative':
+        diagonal = K.diagonal()
+        return lambda b: conjugate_gradient(
+            K.dot,
+            b,
+            precondition=lambda r: r / diagonal,
+            tol=1e-6,
+        )[0]
+
+    if solver == 'matrix-free':
+        raise ValueError(
+            'The matrix-free solver does not assemble or factor the '
+            'stiffness matrix.'
+        )
+
+    raise ValueError(f'Unknown solver: {solver}')
+
+
+def block_preconditioner(blocks, fixed, method='block-jacobi'):
+    """
+    Function applying the inverse of the diagonal, or with block-jacobi of
+    the nodal diagonal blocks, of a stiffness matrix given as
+    (n_nodes, DOF, DOF) blocks. Fixed degrees of freedom are identity rows.
+    """
+    n, DOF, _ = blocks.shape
+    fixed = fixed.reshape(n, DOF)
+    blocks = np.where(fixed[:, :, None] | fixed[:, None, :], 0, blocks)
+    diagonal = np.arange(DOF)
+    blocks[:, diagonal, diagonal] += fixed
+
+    if method == 'jacobi':
+        inverse = 1 / blocks[:, diagonal, diagonal].ravel()
+        if not np.isfinite(inverse).all():
+            raise ArithmeticError('Stiffness matrix has a zero diagonal.')
+        return lambda r: inverse * r
+
+    if method == 'block-jacobi':
+        try:
+            inverse = np.linalg.inv(blocks)
+        except np.linalg.LinAlgError:
+            raise ArithmeticError('Stiffness matrix has a singular block.')
+        return lambda r: np.einsum(
+            'nij,nj->ni', inverse, r.reshape(n, DOF)
+        ).ravel()
+
+    raise ValueError(f'Unknown preconditioner: {method}')
+
+
+def refine(solve_low, matvec, F, norm_K, max_iterations=30):
+    """
+    Mixed-precision iterative refinement.
+
+    solve_low solves the system in single precision and matvec computes the
+    product with the system matrix in double precision. Corrections are
+    computed in single precision from double precision residuals until the
+    residual is at the level of double precision roundoff, using the
+    stopping test of LAPACK dsgesv with norm_K the infinity norm of the
+    matrix. Returns the solution and the number of refinement steps.
+
+    Raises an ArithmeticError if the refinement stagnates, which happens
+    when the system is too poorly conditioned for single precision.
+    """
+    x = solve_low(F.astype(np.float32)).astype(np.float64)
+    tolerance = np.sqrt(len(F)) * np.finfo(np.float64).eps * norm_K
+    previous = np.inf
+    for iteration in range(max_iterations + 1):
+        r = F - matvec(x)
+        norm_r = np.abs(r).max(initial=0)
+        if not np.isfinite(norm_r):
+            raise ArithmeticError('Mixed-precision solve diverged.')
+        if norm_r <= tolerance * np.abs(x).max(initial=0):
+            return x, iteration
+        if norm_r > 0.5 * previous:
+            raise ArithmeticError(
+                'Iterative refinement stagnated, the system is too poorly '
+                'conditioned for single precision.'
+            )
+        previous = norm_r
+        x += solve_low(r.astype(np.float32))
+
+    raise ArithmeticError(
+        f'Iterative refinement did not converge in {max_iterations} steps.'
+    )
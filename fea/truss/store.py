@@ -0,0 +1,334 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from scipy import linalg, sparse
+from scipy.sparse import linalg as splinalg
+
+from . import assembly, banded
+from .results import TrussResults
+from .truss import Truss
+
+log = logging.getLogger(__name__)
+
+STORE_PATH = os.environ.get(
+    'FEA_MODEL_STORE',
+    os.path.join(os.path.expanduser('~'), '.fea', 'models'),
+)
+
+# Solvers models are factored with, once when loaded.
+FACTORED_SOLVERS = ('dense', 'banded', 'sparse')
+
+
+def model_id(model):
+    encoded = json.dumps(model, sort_keys=True).encode()
+    return hashlib.sha256(encoded).hexdigest()[:32]
+
+
+class ModelStore():
+    """
+    ModelStore class, persist assembled and factored trusses on disk so that
+    load cases can be solved against them without reassembly.
+
+    Each model is a directory of .npy arrays, memory-mapped when loaded, and
+    a meta.json. The id of a model is a hash of its definition, so
+    registering the same model twice, from any process, gives the same id.
+
+    ...
+
+    Attributes
+    ----------
+    path : str
+        Directory holding the models.
+    cache_size : int
+        Number of loaded models kept in memory.
+
+    Methods
+    -------
+    register(mat_prop, nodal_coords, connectivity, boundary_conditions,
+             solver, planar)
+    exists(id)
+    meta(id)
+    load(id)
+
+    """
+
+    def __init__(self, path=None, cache_size=64):
+        self.path = path or STORE_PATH
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        # Models are loaded from concurrent requests.
+        self._lock = threading.Lock()
+
+    def model_path(self, id):
+        if not id.isalnum():
+            raise KeyError(id)
+        return os.path.join(self.path, id)
+
+    def exists(self, id):
+        try:
+            return os.path.isdir(self.model_path(id))
+        except KeyError:
+            return False
+
+    def register(
+        self,
+        mat_prop,
+        nodal_coords,
+        connectivity,
+        boundary_conditions,
+        solver='auto',
+        planar=None
+    ):
+        model = {
+            'mat_prop': mat_prop,
+            'nodal_coords': nodal_coords,
+            'connectivity': connectivity,
+            'boundary_conditions': boundary_conditions,
+        }
+        if planar is not None:
+            model['planar'] = planar
+        id = model_id(model)
+        if self.exists(id):
+            log.info(f'Model {id} is already registered.')
+            return id
+
+        log.info(f'Registering model {id}.')
+        if solver in ('iterative', 'matrix-free'):
+            # Stored models are factored once, for any number of load cases.
+            solver = 'sparse'
+        t = Truss(
+            mat_prop,
+            nodal_coords,
+            connectivity,
+            [],
+            boundary_conditions,
+            solver=solver,
+            planar=planar
+        )
+        t.create_nodes()
+        t.create_elements()
+        t.select_solver()
+        t.assemblage()
+        K_reduced, _, free = t.reduced_system()
+        method = t.solver_info['solver']
+
+        arrays = {'coords': t.coords, 'free': free}
+        table = t.element_table()
+        for key, value in table.items():
+            arrays[f'table_{key}'] = value
+        size, nnz, bandwidth = banded.matrix_stats(
+            np.column_stack([table['i'], table['j']]), len(t.nodes), t.DOF
+        )
+
+        log.info('Factoring the reduced stiffness matrix.')
+        if method == 'dense':
+            arrays['factor'], _ = linalg.cho_factor(K_reduced)
+        elif method == 'banded':
+            arrays['factor'] = linalg.cholesky_banded(K_reduced)
+        else:
+            # SuperLU factors cannot be saved, the matrix is factored again
+            # when the model is loaded.
+            K_reduced = sparse.csc_matrix(K_reduced)
+            arrays['data'] = K_reduced.data
+            arrays['indices'] = K_reduced.indices
+            arrays['indptr'] = K_reduced.indptr
+
+        meta = {
+            'id': id,
+            'solver': method,
+            'DOF': t.DOF,
+            'n_dof': len(free),
+            'size': size,
+            'nnz': nnz,
+            'bandwidth': bandwidth,
+            'node_ids': list(t.nodes),
+            'element_ids': list(t.elements),
+            'constrained': [int(d) for d in t.constrained_dofs()],
+            'boundary_conditions': boundary_conditions,
+        }
+
+        # Written to a temporary directory and renamed into place, so a
+        # model is never seen half written.
+        os.makedirs(self.path, exist_ok=True)
+        tmp = tempfile.mkdtemp(dir=self.path, prefix='.tmp-')
+        for name, array in arrays.items():
+            np.save(os.path.join(tmp, f'{name}.npy'), np.asarray(array))
+        with open(os.path.join(tmp, 'meta.json'), 'w') as f:
+            json.dump(meta, f)
+        try:
+            os.rename(tmp, self.model_path(id))
+        except OSError:
+            # Registered concurrently by another process.
+            shutil.rmtree(tmp, ignore_errors=True)
+
+        return id
+
+    def meta(self, id):
+        """
+        Description of a registered model, with the size, number of
+        nonzeros and half bandwidth of its stiffness matrix to estimate the
+        cost of loading it.
+        """
+        if not self.exists(id):
+            raise KeyError(id)
+        with open(os.path.join(self.model_path(id), 'meta.json')) as f:
+            return json.load(f)
+
+    def load(self, id):
+        with self._lock:
+            if id in self._cache:
+                self._cache.move_to_end(id)
+                return self._cache[id]
+
+        if not self.exists(id):
+            raise KeyError(id)
+        # Loaded outside the lock, a model being factored does not block
+        # the others.
+        model = StoredModel(self.model_path(id))
+        with self._lock:
+            self._cache[id] = model
+            self._cache.move_to_end(id)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return model
+
+
+class StoredModel():
+    """
+    StoredModel class, represent a registered truss loaded from the model
+    store, with its arrays memory-mapped.
+
+    ...
+
+    Attributes
+    ----------
+    id : str
+        Id of the model.
+    solver : str
+        Solver the system was factored with.
+    node_ids : list
+        Id of each node, in node index order.
+    element_ids : list
+        Id of each element, in element index order.
+    boundary_conditions : list
+        List of dict representing the boundary condition constraints.
+    coords : ndarray
+        (n_nodes, 3) undeformed nodal coordinates.
+    free : ndarray
+        Unconstrained degrees of freedom, in equation order.
+    table : dict
+        Element table of the truss, see Truss.element_table.
+
+    Methods
+    -------
+    force_matrix(force_vectors)
+    solve(force_vectors)
+
+    """
+
+    def __init__(self, path):
+        with open(os.path.join(path, 'meta.json')) as f:
+            meta = json.load(f)
+        self.id = meta['id']
+        self.solver = meta['solver']
+        self.DOF = meta['DOF']
+        self.node_ids = meta['node_ids']
+        self.element_ids = meta['element_ids']
+        self.boundary_conditions = meta['boundary_conditions']
+        self.constrained = np.array(meta['constrained'], dtype=np.int64)
+        self._index = {id: i for i, id in enumerate(self.node_ids)}
+
+        def load(name):
+            return np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r')
+
+        self.coords = load('coords')
+        self.free = load('free')
+        self.table = {
+            key: load(f'table_{key}')
+            for key in ('i', 'j', 'k', 'C', 'E', 'A', 'L', 'Fy')
+        }
+
+        if self.solver == 'dense':
+            factor = (load('factor'), False)
+            self._solve = lambda b: linalg.cho_solve(factor, b)
+        elif self.solver == 'banded':
+            factor = (load('factor'), False)
+            self._solve = lambda b: linalg.cho_solve_banded(factor, b)
+        else:
+            n = meta['n_dof']
+            K = sparse.csc_matrix(
+                (load('data'), load('indices'), load('indptr')),
+                shape=(n, n),
+            )
+            self._solve = splinalg.splu(K).solve
+
+    def force_matrix(self, force_vectors):
+        DOF = self.DOF
+        forces = np.zeros([len(self.node_ids) * DOF, len(force_vectors)])
+        for case, force_vector in enumerate(force_vectors):
+            for f in force_vector:
+                node_index = self._index[f['node']]
+                forces[DOF*node_index + 0, case] += f['u1']
+                forces[DOF*node_index + 1, case] += f['u2']
+                if DOF == 3:
+                    forces[DOF*node_index + 2, case] += f.get('u3', 0)
+                elif f.get('u3'):
+                    raise ValueError(
+                        f'Out of plane force on node {f["node"]} of planar '
+                        f'model {self.id}, register it with planar=False.'
+                    )
+        return forces
+
+    def solve(self, force_vectors):
+        """
+        Solve every load case, a force vector as for Truss, with the stored
+        factorization. Returns a TrussResults for each load case.
+        """
+        log.info(f'Solving {len(force_vectors)} load cases on {self.id}.')
+        DOF = self.DOF
+        table = self.table
+        forces = self.force_matrix(force_vectors)
+        Q = np.zeros_like(forces)
+        Q[self.free] = self._solve(forces[self.free])
+
+        results = []
+        for case in range(len(force_vectors)):
+            q = Q[:, case].reshape(-1, DOF)
+            elongation = np.einsum(
+                'ed,ed->e', table['C'], q[table['j']] - q[table['i']]
+            )
+            stress = table['E'] * elongation / table['L']
+
+            unbalanced = assembly.axial_matvec(
+                q, table['i'], table['j'], table['k'], table['C']
+            ).ravel() - forces[:, case]
+            reactions = np.zeros_like(unbalanced)
+            reactions[self.constrained] = unbalanced[self.constrained]
+            unbalanced[self.constrained] = 0
+            residual = np.linalg.norm(unbalanced)
+            load = np.linalg.norm(forces[:, case])
+
+            axial_forces = stress * table['A']
+            results.append(TrussResults(
+                self.node_ids,
+                self.element_ids,
+                self.coords,
+                Q[:, case],
+                stress,
+                reactions=reactions.reshape(-1, DOF),
+                axial_forces=axial_forces,
+                element_energy=0.5 * axial_forces * elongation,
+                utilization=np.abs(stress) / table['Fy'],
+                equilibrium_residual=float(
+                    residual / load if load else residual
+                ),
+            ))
+
+        return results
@@ -0,0 +1,318 @@
+import logging
+import numpy as np
+from scipy import linalg
+from .truss import Truss
+
+log = logging.getLogger(__name__)
+
+
+class Substructure():
+    """
+    Substructure class, represent a reusable truss module statically condensed
+    to its boundary nodes.
+
+    ...
+
+    Attributes
+    ----------
+    mat_prop : dict
+        Material property dictionary.
+        {'ele_id' : {'E': ..., 'A': ...}, ...}
+    nodal_coords : dict
+        Dictionary representing the coordinates of each node, in the local
+        coordinate system of the substructure.
+        {'node_id': {'x': ..., 'y': ..., 'z': ...}, ...}
+    connectivity : dict
+        Dictionary representing the 2 nodes associated with each element.
+        {'ele_id' : {'i': 'nodei_id', 'j': 'nodej_id'}, ...}
+    boundary_nodes : list
+        Ids of the nodes connecting the substructure to its parent truss.
+    boundary_conditions : list
+        List of dict representing constraints on interior nodes.
+        [{'node': ..., 'u1': ..., 'u2': ..., 'u3': ...}, ...]
+    truss : Truss
+        Truss used to assemble the substructure stiffness matrix.
+    boundary_dofs : ndarray
+        Degrees of freedom of the boundary nodes.
+    interior_dofs : ndarray
+        Unconstrained degrees of freedom of the interior nodes.
+    K_condensed : ndarray
+        Stiffness matrix condensed to the boundary degrees of freedom.
+    transfer : ndarray
+        Interior displacements per unit boundary displacement.
+
+    Methods
+    -------
+    condense()
+    interior_displacements(boundary_displacements, forces)
+
+    """
+
+    def __init__(
+        self,
+        mat_prop,
+        nodal_coords,
+        connectivity,
+        boundary_nodes,
+        boundary_conditions=None
+    ):
+        self.mat_prop = mat_prop
+        self.nodal_coords = nodal_coords
+        self.connectivity = connectivity
+        self.boundary_nodes = list(boundary_nodes)
+        self.boundary_conditions = boundary_conditions or []
+        self.truss = None
+        self.boundary_dofs = np.zeros([])
+        self.interior_dofs = np.zeros([])
+        self.K_condensed = None
+        self.transfer = None
+        self._interior_factor = None
+
+    def condense(self):
+        if self.K_condensed is not None:
+            return self.K_condensed
+
+        log.info('Condensing substructure to its boundary nodes.')
+        self.truss = Truss(
+            self.mat_prop,
+            self.nodal_coords,
+            self.connectivity,
+            [],
+            [],
+            solver='dense',
+            planar=False
+        )
+        t = self.truss
+        DOF = t.DOF
+        t.create_nodes()
+        t.create_elements()
+        t.assemblage()
+
+        boundary = [t.nodes[node].index for node in self.boundary_nodes]
+        self.boundary_dofs = (
+            DOF*np.array(boundary, dtype=np.int64)[:, None] + np.arange(DOF)
+        ).ravel()
+
+        constraints = []
+        for bc in self.boundary_conditions:
+            if bc['node'] in self.boundary_nodes:
+                raise ValueError(
+                    f'Boundary node {bc["node"]} must be constrained in the '
+                    'parent truss.'
+                )
+            node_index = t.nodes[bc['node']].index
+            for k, u in enumerate(('u1', 'u2', 'u3')):
+                if bc[u]:
+                    constraints.append(DOF*node_index + k)
+
+        self.interior_dofs = np.setdiff1d(
+            np.arange(len(t.nodes) * DOF),
+            np.concatenate([self.boundary_dofs, constraints]).astype(int)
+        )
+
+        b = self.boundary_dofs
+        i = self.interior_dofs
+        K_bb = t.K[np.ix_(b, b)]
+        K_bi = t.K[np.ix_(b, i)]
+        K_ii = t.K[np.ix_(i, i)]
+
+        # Static condensation with the Schur complement of the interior. The
+        # interior is factored once, for the condensation and every recovery
+        # of interior displacements.
+        try:
+            self._interior_factor = linalg.cho_factor(K_ii)
+        except np.linalg.LinAlgError:
+            raise ValueError(
+                'Substructure interior is unstable, constrain the interior '
+                'degrees of freedom that have no stiffness.'
+            )
+        self.transfer = -linalg.cho_solve(self._interior_factor, K_bi.T)
+        self.K_condensed = K_bb + K_bi @ self.transfer
+
+        return self.K_condensed
+
+    def interior_displacements(self, boundary_displacements, forces=None):
+        """
+        Interior displacements, in local coordinates, for the given boundary
+        displacements and interior nodal forces (both local, by DOF).
+        """
+        self.condense()
+        q = self.transfer @ boundary_displacements
+        if forces is not None:
+            q += linalg.cho_solve(
+                self._interior_factor, forces[self.interior_dofs]
+            )
+        return q
+
+
+class Superelement():
+    """
+    Superelement class, represent an instance of a condensed substructure
+    placed in a parent truss.
+
+    Local coordinates x of the substructure map to rotation @ x + translation
+    in the parent truss.
+
+    ...
+
+    Attributes
+    ----------
+    id : str
+        Id for the superelement.
+    substructure : Substructure
+        Substructure being instanced.
+    node_map : dict
+        Parent node id of each boundary node of the substructure.
+        {'sub_node_id': 'parent_node_id', ...}
+    rotation : ndarray
+        3x3 rotation from substructure to parent coordinates.
+    translation : ndarray
+        Translation from substructure to parent coordinates.
+    force_vector : list
+        List of dict representing forces, in parent coordinates, on the
+        interior nodes of the substructure.
+        [{'node': ..., 'u1': ..., 'u2': ..., 'u3': ...}, ...]
+
+    Methods
+    -------
+    stiffness()
+    dofs(nodes, DOF)
+    loads()
+    recover(truss)
+
+    """
+
+    def __init__(
+        self,
+        id,
+        substructure,
+        node_map,
+        rotation=None,
+        translation=None,
+        force_vector=None
+    ):
+        self.id = id
+        self.substructure = substructure
+        self.node_map = node_map
+        self.rotation = np.eye(3) if rotation is None else np.asarray(
+            rotation, dtype=float
+        )
+        self.translation = np.zeros(3) if translation is None else np.asarray(
+            translation, dtype=float
+        )
+        self.force_vector = force_vector or []
+        self._stiffness = None
+
+        if not np.allclose(self.rotation @ self.rotation.T, np.eye(3)):
+            raise ValueError(f'Superelement[{id}] rotation is not orthogonal.')
+
+        missing = set(substructure.boundary_nodes) - set(node_map)
+        if missing:
+            raise ValueError(
+                f'Superelement[{id}] boundary nodes {sorted(missing)} are not '
+                'mapped to parent nodes.'
+            )
+
+    def placed_coords(self, node):
+        c = self.substructure.nodal_coords[node]
+        return (
+            self.rotation @ (c['x'], c['y'], c.get('z', 0))
+            + self.translation
+        )
+
+    def check_placement(self, nodes, tolerance=1e-6):
+        for sub_node in self.substructure.boundary_nodes:
+            parent = nodes[self.node_map[sub_node]]
+            placed = self.placed_coords(sub_node)
+            if not np.allclose(
+                placed, (parent.x, parent.y, parent.z), atol=tolerance
+            ):
+                raise ValueError(
+                    f'Superelement[{self.id}] node {sub_node} is placed at '
+                    f'{placed.tolist()}, not at parent node {parent.id}.'
+                )
+
+    def transform(self):
+        n = len(self.substructure.boundary_nodes)
+        return np.kron(np.eye(n), self.rotation)
+
+    def stiffness(self):
+        # Condensed stiffness in parent coordinates, transformed once.
+        if self._stiffness is None:
+            T = self.transform()
+            self._stiffness = T @ self.substructure.condense() @ T.T
+        return self._stiffness
+
+    def dofs(self, nodes, DOF):
+        parent = np.array([
+            nodes[self.node_map[node]].index
+            for node in self.substructure.boundary_nodes
+        ], dtype=np.int64)
+        return (DOF*parent[:, None] + np.arange(DOF)).ravel()
+
+    def local_forces(self):
+        s = self.substructure
+        s.condense()
+        DOF = s.truss.DOF
+        forces = np.zeros(len(s.truss.nodes) * DOF)
+        for f in self.force_vector:
+            node_index = s.truss.nodes[f['node']].index
+            local = self.rotation.T @ (f['u1'], f['u2'], f.get('u3', 0))
+            forces[DOF*node_index:DOF*node_index + DOF] += local
+        return forces
+
+    def loads(self):
+        """
+        Interior forces condensed to the boundary, in parent coordinates.
+        """
+        s = self.substructure
+        forces = self.local_forces()
+        if not forces.any():
+            return np.zeros(len(s.boundary_dofs))
+
+        # f_b - K_bi K_ii^-1 f_i
+        condensed = (
+            forces[s.boundary_dofs] + s.transfer.T @ forces[s.interior_dofs]
+        )
+        return self.transform() @ condensed
+
+    def recover(self, truss):
+        """
+        Recover displacements, deformed coordinates and stresses of every
+        node and element of the substructure from a solved parent truss.
+        """
+        log.info(f'Recovering superelement[{self.id}] interior results.')
+        s = self.substructure
+        t = s.truss
+        DOF = t.DOF
+
+        parent_dofs = self.dofs(truss.nodes, truss.DOF)
+        q_boundary = self.transform().T @ truss.Q[parent_dofs, 0]
+
+        q = np.zeros(len(t.nodes) * DOF)
+        q[s.boundary_dofs] = q_boundary
+        q[s.interior_dofs] = s.interior_displacements(
+            q_boundary,
+            self.local_forces()
+        )
+        q = q.reshape(-1, DOF)
+
+        displacements = {}
+        deformed_nodal_coords = {}
+        for id, node in t.nodes.items():
+            u = self.rotation @ q[node.index]
+            x = self.placed_coords(id) + u
+            displacements[id] = dict(zip(('u1', 'u2', 'u3'), u.tolist()))
+            deformed_nodal_coords[id] = dict(zip(('x', 'y', 'z'), x.tolist()))
+
+        stresses = {}
+        for id, ele in t.elements.items():
+            C = np.array([ele.Cx, ele.Cy, ele.Cz])
+            elongation = C @ (q[ele.nodej.index] - q[ele.nodei.index])
+            stresses[id] = ele.E * elongation / ele.L
+
+        return {
+            'displacements': displacements,
+            'deformed_nodal_coords': deformed_nodal_coords,
+            'stresses': stresses,
+        }
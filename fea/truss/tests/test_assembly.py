@@ -0,0 +1,39 @@
+import numpy as np
+from fea.truss.assembly import color_elements, scatter_add
+from fea.truss.generator import generate_truss
+from fea.truss.truss import Truss
+
+
+def test_color_elements():
+    pairs = np.array([[0, 1], [1, 2], [2, 3], [3, 0], [0, 2]])
+    colors = color_elements(pairs)
+    assert list(colors) == [0, 1, 0, 1, 2]
+
+    for c in set(colors):
+        nodes = pairs[colors == c].ravel()
+        assert len(nodes) == len(set(nodes))
+
+
+def test_scatter_add():
+    dofs = np.array([[0, 1], [1, 2]])
+    blocks = np.array([
+        [[1.0, -1.0], [-1.0, 1.0]],
+        [[2.0, -2.0], [-2.0, 2.0]],
+    ])
+    K = scatter_add(np.zeros([3, 3]), dofs, blocks)
+    assert (K == np.array([
+        [ 1, -1,  0],  # noqa: E201
+        [-1,  3, -2],
+        [ 0, -2,  2],  # noqa: E201
+    ])).all()
+
+
+def test_parallel_assemblage():
+    truss = generate_truss(60, spatial=True)
+    serial = Truss(**truss, solver='dense')
+    serial.solve_truss()
+    parallel = Truss(**truss, solver='dense', workers=4)
+    parallel.solve_truss()
+
+    assert np.allclose(parallel.K, serial.K)
+    assert np.allclose(parallel.Q, serial.Q)
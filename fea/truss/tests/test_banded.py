@@ -0,0 +1,58 @@
+import random
+
+import numpy as np
+from fea.truss import banded
+from fea.truss.assembly import scatter_add
+from fea.truss.generator import generate_truss
+from fea.truss.truss import Truss
+
+
+def to_band(K, b):
+    n = len(K)
+    ab = np.zeros([b + 1, n])
+    for c in range(n):
+        for r in range(max(0, c - b), c + 1):
+            ab[b + r - c, c] = K[r, c]
+    return ab
+
+
+def test_banded_scatter_add():
+    dofs = np.array([[0, 1], [2, 1], [3, 2]])
+    blocks = np.array([[[1.0, -1.0], [-1.0, 1.0]]]) * np.array([1, 2, 3])[
+        :, None, None
+    ]
+    K = scatter_add(np.zeros([4, 4]), dofs, blocks)
+    ab = scatter_add(np.zeros([2, 4]), dofs, blocks, band=1)
+    assert (ab == to_band(K, 1)).all()
+
+    # Negative equation numbers are left out.
+    ab = scatter_add(np.zeros([2, 3]), dofs - 1, blocks, band=1)
+    assert (ab == to_band(K[1:, 1:], 1)).all()
+
+
+def test_bandwidth_and_norm():
+    assert banded.bandwidth(np.array([[0, 3], [2, 1], [-1, 4]])) == 3
+
+    K = np.array([
+        [4.0, -1.0, 0.0],
+        [-1.0, 4.0, -2.0],
+        [0.0, -2.0, 5.0],
+    ])
+    assert banded.norm_inf(to_band(K, 1)) == np.abs(K).sum(axis=1).max()
+
+
+def test_node_order():
+    truss = generate_truss(20)
+    ids = list(truss['nodal_coords'])
+    random.Random(0).shuffle(ids)
+    truss['nodal_coords'] = {id: truss['nodal_coords'][id] for id in ids}
+
+    t = Truss(**truss, solver='banded')
+    t.solve_truss()
+    n_dof, nnz, bandwidth = t.matrix_stats()
+    assert t.solver_info['band'] <= bandwidth <= 11
+    assert t.K.shape == (t.solver_info['band'] + 1, 2 * 42 - 3)
+
+    reference = Truss(**truss, solver='dense')
+    reference.solve_truss()
+    assert np.allclose(t.Q, reference.Q)
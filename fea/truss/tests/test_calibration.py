@@ -0,0 +1,14 @@
+from fea.truss import solver
+from fea.truss.calibration import calibrate
+
+
+def test_calibrate(tmp_path):
+    path = str(tmp_path / 'profile.json')
+    profile = calibrate(path, dense_sizes=(50, 100), lattice_bays=(5, 20))
+
+    assert profile['dense_flops'] > 0
+    assert profile['banded_flops'] > 0
+    assert profile['sparse_flops'] > 0
+    assert profile['spmv_flops'] > 0
+    assert profile['cg_coefficient'] > 0
+    assert solver.load_profile(path) == profile
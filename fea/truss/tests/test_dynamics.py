@@ -0,0 +1,97 @@
+import numpy as np
+import pytest
+from fea.truss.dynamics import DynamicAnalysis, rayleigh_coefficients
+from fea.truss.generator import generate_truss
+from fea.truss.truss import Truss
+
+
+def bar(F=1000):
+    return Truss(
+        {'e0': {'E': 200000, 'A': 100, 'rho': 7.85e-9}},
+        {'n0': {'x': 0, 'y': 0, 'z': 0}, 'n1': {'x': 1000, 'y': 0, 'z': 0}},
+        {'e0': {'i': 'n0', 'j': 'n1'}},
+        [{'node': 'n1', 'u1': F, 'u2': 0}],
+        [
+            {'node': 'n0', 'u1': True, 'u2': True},
+            {'node': 'n1', 'u1': False, 'u2': True},
+        ]
+    )
+
+
+def test_rayleigh_coefficients():
+    a0, a1 = rayleigh_coefficients(0.05, 10, 100)
+    for omega in (10, 100):
+        assert np.isclose(a0 / (2 * omega) + a1 * omega / 2, 0.05)
+
+
+def test_step_load():
+    # Single degree of freedom, u = F/k (1 - cos wt).
+    k = 200000 * 100 / 1000
+    m = 0.5 * 7.85e-9 * 100 * 1000
+    omega = np.sqrt(k / m)
+    dt = 2 * np.pi / omega / 200
+
+    analysis = DynamicAnalysis(bar(), dt)
+    history = analysis.run(400, record=[('n1', 'u1')])
+
+    expected = 1000 / k * (1 - np.cos(omega * analysis.time))
+    np.testing.assert_allclose(history[:, 0], expected, atol=2e-3 * 1000 / k)
+    assert np.isclose(analysis.stress_envelope[1, 0], 2 * 1000 / 100)
+
+
+@pytest.mark.parametrize(
+    'solver', ['dense', 'banded', 'sparse', 'iterative', 'matrix-free']
+)
+def test_damped_response_settles_to_static(solver):
+    truss = generate_truss(4)
+    static = Truss(**truss, solver=solver)
+    static.solve_truss()
+
+    analysis = DynamicAnalysis(
+        Truss(**truss, solver=solver),
+        dt=1e-3,
+        alpha=-0.1,
+        damping=rayleigh_coefficients(0.5, 50, 500),
+        density=7.85e-9,
+    )
+    analysis.run(400)
+
+    np.testing.assert_allclose(
+        analysis.u,
+        static.Q.ravel(),
+        atol=1e-4 * np.abs(static.Q).max()
+    )
+
+
+def test_force_history(tmp_path):
+    truss = generate_truss(4)
+    t = Truss(**truss)
+    analysis = DynamicAnalysis(t, dt=1e-4, density=7.85e-9)
+    record = [('n5', 'u2'), ('n4', 'u1')]
+    path = str(tmp_path / 'history.npy')
+
+    # A load moving along the bottom chord.
+    def moving(time):
+        F = np.zeros(len(t.nodes) * t.DOF)
+        node = min(int(time / 1e-3), 4)
+        F[t.DOF * t.nodes[f'n{2 * node}'].index + 1] = -1000
+        return F
+
+    history = analysis.run(60, moving, record=record, path=path)
+    np.testing.assert_array_equal(np.load(path), history)
+    assert history.shape == (61, 2)
+    assert analysis.elapsed == pytest.approx(6e-3)
+
+    # Continues from the last state.
+    analysis.run(10, np.zeros([11, len(t.nodes) * t.DOF]), record=record)
+    assert analysis.time[0] == pytest.approx(6e-3)
+    assert analysis.history[0].tolist() == history[-1].tolist()
+
+
+def test_invalid_parameters():
+    with pytest.raises(ValueError):
+        DynamicAnalysis(bar(), 1e-5, alpha=-0.5)
+
+    t = Truss(**generate_truss(2))
+    with pytest.raises(ValueError):
+        DynamicAnalysis(t, 1e-5)
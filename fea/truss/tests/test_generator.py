@@ -0,0 +1,25 @@
+from fea.truss.generator import generate_truss
+from fea.truss.truss import Truss
+
+
+def test_generate_planar_truss():
+    truss = generate_truss(4)
+    assert len(truss['nodal_coords']) == 10
+    assert len(truss['connectivity']) == 17
+    assert len(truss['force_vector']) == 3
+
+    t = Truss(**truss)
+    t.solve_truss()
+    # Bottom chord in tension, top chord in compression at midspan.
+    assert t.stresses['e5'] > 0
+    assert t.stresses['e6'] < 0
+
+
+def test_generate_spatial_truss():
+    truss = generate_truss(3, spatial=True)
+    assert len(truss['nodal_coords']) == 16
+    assert len(truss['connectivity']) == 44
+
+    t = Truss(**truss)
+    t.solve_truss()
+    assert len(t.stresses) == 44
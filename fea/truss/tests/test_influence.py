@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+from fea.truss.generator import generate_truss
+from fea.truss.influence import InfluenceLines
+from fea.truss.truss import Truss
+
+n_bays = 6
+truss = generate_truss(n_bays)
+# Bottom chord nodes, from support to support.
+path = [f'n{2 * k}' for k in range(n_bays + 1)]
+
+
+def single_load(node, value):
+    t = Truss(**{
+        **truss,
+        'force_vector': [{'node': node, 'u1': 0, 'u2': value, 'u3': 0}],
+    })
+    t.solve_truss()
+    return t.stress_array
+
+
+@pytest.mark.parametrize('solver', ['dense', 'banded', 'iterative'])
+def test_influence_lines(solver):
+    lines = InfluenceLines(Truss(**truss, solver=solver), path)
+    stress = lines.compute()
+
+    assert stress.shape == (len(truss['connectivity']), len(path))
+    np.testing.assert_allclose(lines.stations, 1000 * np.arange(len(path)))
+    for k, node in enumerate(path):
+        np.testing.assert_allclose(
+            stress[:, k], single_load(node, -1), atol=1e-12
+        )
+
+    # Linear between nodes.
+    np.testing.assert_allclose(
+        lines.at([1250])[:, 0],
+        0.75 * stress[:, 1] + 0.25 * stress[:, 2]
+    )
+    assert not lines.at([-1, 6001]).any()
+
+
+def test_envelope():
+    lines = InfluenceLines(Truss(**truss), path)
+    loads = [35, 145, 145]
+    spacings = [1300, 900]
+    envelope = lines.envelope(loads, spacings)
+
+    # Brute force, the train stepped along the whole path.
+    offsets = np.concatenate([[0], np.cumsum(spacings)])
+    lead = np.arange(0, 6000 + offsets[-1] + 1, 10.0)
+    stress = sum(
+        load * lines.at(lead - offset) for load, offset in zip(loads, offsets)
+    )
+    np.testing.assert_allclose(envelope['max'], stress.max(axis=1))
+    np.testing.assert_allclose(envelope['min'], stress.min(axis=1))
+
+    # The critical positions reproduce the extremes.
+    for e in range(len(stress)):
+        at_max = sum(
+            load * lines.at([envelope['max_position'][e] - offset])[e, 0]
+            for load, offset in zip(loads, offsets)
+        )
+        assert np.isclose(at_max, envelope['max'][e])
+
+    # A single axle gives the influence line itself.
+    single = lines.envelope([1])
+    np.testing.assert_allclose(single['max'], lines.stress.max(axis=1))
+
+    reverse = lines.envelope(loads[::-1], spacings[::-1], direction=-1)
+    np.testing.assert_allclose(reverse['max'], envelope['max'])
+
+
+def test_invalid_path():
+    with pytest.raises(ValueError):
+        InfluenceLines(Truss(**truss), ['n0'])
+    with pytest.raises(ValueError):
+        InfluenceLines(Truss(**truss), ['n0', 'n0'])
+    with pytest.raises(ValueError):
+        InfluenceLines(Truss(**truss), path, component='u3')
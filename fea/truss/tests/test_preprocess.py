@@ -0,0 +1,96 @@
+import numpy as np
+from fea.truss.generator import generate_truss
+from fea.truss.preprocess import clean_truss, trim_overlaps, weld_nodes
+from fea.truss.truss import Truss
+
+
+def test_weld_nodes():
+    coords = np.array([
+        [0, 0, 0],
+        [1, 0, 0],
+        [0, 0, 1e-7],
+        [1, 0, 5e-7],
+        [1, 0, 1e-6],
+    ])
+
+    # Nodes 3 and 4 are merged into 1 through a chain.
+    assert (weld_nodes(coords, 1e-6) == [0, 1, 0, 1, 1]).all()
+    assert (weld_nodes(coords, 1e-8) == [0, 1, 2, 3, 4]).all()
+
+
+def test_trim_overlaps():
+    coords = np.array([[0, 0, 0], [1, 0, 0], [2, 0, 0], [3, 0, 0]])
+    i = np.array([0, 1, 0, 3])
+    j = np.array([1, 2, 3, 2])
+
+    # 0-3 is trimmed to 1-3 and then to 2-3, a duplicate of the last member.
+    i, j, trimmed = trim_overlaps(coords, i, j)
+    assert i.tolist() == [0, 1, 2, 3]
+    assert j.tolist() == [1, 2, 3, 2]
+    assert trimmed.tolist() == [False, False, True, False]
+
+    # Every member from node 0 is trimmed to its last segment at once.
+    coords = np.column_stack([np.arange(6), np.zeros(6), np.zeros(6)])
+    i, j, trimmed = trim_overlaps(coords, np.zeros(5, int), np.arange(1, 6))
+    assert i.tolist() == [0, 1, 2, 3, 4]
+    assert trimmed.sum() == 4
+
+
+def test_trim_overlaps_not_collinear():
+    # A longer member from the same node in a nearby direction is kept,
+    # with a length tolerance of 1 mm.
+    coords = np.array([[0, 0, 0], [600, 800, 0], [1400, 1400, 0]])
+    i, j, trimmed = trim_overlaps(
+        coords, np.array([0, 0]), np.array([1, 2]), tolerance=1.0
+    )
+    assert i.tolist() == [0, 0]
+    assert j.tolist() == [1, 2]
+    assert not trimmed.any()
+
+
+def test_clean_truss():
+    truss = generate_truss(4)
+    expected = Truss(**truss)
+    expected.solve_truss()
+
+    dirty = {key: value.copy() for key, value in truss.items()}
+    dirty['nodal_coords']['copy'] = {
+        **truss['nodal_coords']['n2'], 'x': 1000 + 1e-9
+    }
+    dirty['connectivity'].update({
+        'reversed': {'i': 'n2', 'j': 'n0'},
+        'zero': {'i': 'n2', 'j': 'copy'},
+        'chord': {'i': 'n0', 'j': 'n4'},
+        'welded': {'i': 'copy', 'j': 'n3'},
+    })
+    for id in ('reversed', 'zero', 'chord', 'welded'):
+        dirty['mat_prop'][id] = {'E': 1, 'A': 1}
+    dirty['force_vector'] = truss['force_vector'] + [
+        {'node': 'copy', 'u1': 0, 'u2': -1000, 'u3': 0}
+    ]
+    dirty['boundary_conditions'] = truss['boundary_conditions'] + [
+        {'node': 'copy', 'u1': False, 'u2': False, 'u3': True}
+    ]
+
+    model, report = clean_truss(**dirty)
+
+    assert report['merged_nodes'] == {'copy': 'n2'}
+    assert report['removed_members'] == {
+        'zero': 'zero length',
+        'reversed': 'duplicate',
+        'welded': 'duplicate',
+        'chord': 'overlapping',
+    }
+    assert model['nodal_coords'] == truss['nodal_coords']
+    assert model['connectivity'] == truss['connectivity']
+    assert len(model['boundary_conditions']) == len(truss['nodal_coords'])
+
+    # The load on the welded node is applied to n2.
+    assert [f['node'] for f in model['force_vector']].count('n2') == 1
+    t = Truss(**model)
+    t.solve_truss()
+    np.testing.assert_allclose(
+        t.reactions.sum(axis=0),
+        expected.reactions.sum(axis=0) + [0, 1000],
+        atol=1e-6
+    )
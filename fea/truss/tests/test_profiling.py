@@ -0,0 +1,72 @@
+import pstats
+import threading
+import tracemalloc
+
+import pytest
+
+from fea.truss.generator import generate_truss
+from fea.truss.profiling import profile
+from fea.truss.truss import Truss
+
+
+def test_profile(tmp_path):
+    t = Truss(**generate_truss(10, spatial=True))
+    with profile('customer model', str(tmp_path)) as report:
+        t.solve_truss()
+
+    assert report['id'].startswith('customer_model-')
+    assert report['elapsed'] > 0
+    assert report['peak_memory'] > 0
+
+    stats = pstats.Stats(report['profile'])
+    assert any(f[2] == 'solve_truss' for f in stats.stats)
+    with open(report['summary']) as f:
+        summary = f.read()
+    assert 'Top allocations' in summary
+    assert 'solve_truss' in summary
+
+
+def test_profile_busy(tmp_path):
+    started = threading.Event()
+    release = threading.Event()
+
+    def hold():
+        with profile('first', str(tmp_path)):
+            started.set()
+            release.wait()
+
+    thread = threading.Thread(target=hold)
+    thread.start()
+    started.wait()
+    # Profiles do not overlap, the block runs unprofiled.
+    with profile('second', str(tmp_path), blocking=False) as report:
+        assert report is None
+    release.set()
+    thread.join()
+
+    assert [p.name.split('-')[0] for p in tmp_path.glob('*.prof')] == [
+        'first'
+    ]
+
+
+def test_profile_failure(tmp_path, monkeypatch):
+    start = tracemalloc.start
+
+    def failing_start(frames):
+        start(frames)
+        raise RuntimeError('no tracing')
+
+    monkeypatch.setattr(tracemalloc, 'start', failing_start)
+    with pytest.raises(RuntimeError):
+        with profile('setup', str(tmp_path)):
+            pass
+    monkeypatch.undo()
+    assert not tracemalloc.is_tracing()
+
+    # The lock is released and a block that fails is still profiled.
+    with pytest.raises(ValueError):
+        with profile('block', str(tmp_path), blocking=False) as report:
+            assert report is not None
+            raise ValueError
+    assert not tracemalloc.is_tracing()
+    assert (tmp_path / f'{report["id"]}.prof').exists()
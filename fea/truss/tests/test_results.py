@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+from fea.truss.generator import generate_truss
+from fea.truss.results import ArrayView, TrussResults, largest
+from fea.truss.truss import Truss
+
+
+def test_array_view():
+    array = np.array([[1.0, 2.0], [3.0, 4.0]])
+    view = ArrayView(['a', 'b'], array, ('u1', 'u2'))
+
+    assert list(view) == ['a', 'b']
+    assert len(view) == 2
+    assert view['b'] == {'u1': 3.0, 'u2': 4.0}
+    assert 'c' not in view
+    assert np.asarray(view) is array
+
+    with pytest.raises(KeyError):
+        view['c']
+
+    array[1, 0] = 5.0
+    assert view['b']['u1'] == 5.0
+
+
+def test_largest():
+    values = np.array([3.0, -1.0, 7.0, 5.0, 7.0])
+    assert largest(values, 2).tolist() == [2, 4]
+    assert largest(values, 3, [0, 1, 3]).tolist() == [3, 0, 1]
+    assert largest(values, 10).tolist() == [2, 4, 3, 0, 1]
+    assert largest(values, 1, []).tolist() == []
+
+    # Ties at the k-th value are broken by index.
+    tied = np.array([1.0, 2.0, 2.0, 2.0, 0.0, 2.0])
+    assert largest(tied, 2).tolist() == [1, 2]
+    assert largest(tied, 2, [5, 3, 0]).tolist() == [3, 5]
+
+
+def test_truss_results():
+    node_ids = ['n0', 'n1']
+    Q = np.array([[0.0], [0.0], [0.0], [1.0], [2.0], [3.0]])
+    results = TrussResults(
+        node_ids,
+        ['e0'],
+        np.array([[0.0, 0.0, 0.0], [1.0, 0.0, 0.0]]),
+        Q,
+        np.array([10.0]),
+    )
+
+    assert np.shares_memory(results.displacements, Q)
+    assert results.deformed_nodal_coords['n1'] == {'x': 2, 'y': 2, 'z': 3}
+    assert results.nodal_displacements['n1'] == {'u1': 1, 'u2': 2, 'u3': 3}
+    assert dict(results.stresses) == {'e0': 10.0}
+
+    arrays = results.to_numpy()
+    assert arrays['stresses'] is results.stress_array
+    assert memoryview(arrays['deformed_coords']).shape == (2, 3)
+
+
+def test_solve_truss_results():
+    truss = generate_truss(3)
+    t = Truss(**truss)
+    results = t.solve_truss()
+
+    assert results is t.results
+    assert t.nodal_coords['n3'] == {'x': 1000, 'y': 1000, 'z': 0}
+    assert np.shares_memory(results.displacements, t.Q)
+    assert t.stresses['e2'] == results.stress_array[2]
+    assert t.deformed_nodal_coords['n3']['x'] == 1000 + t.Q[3 * t.DOF, 0]
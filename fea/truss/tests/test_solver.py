@@ -0,0 +1,158 @@
+import numpy as np
+import pytest
+from fea.truss import solver
+from fea.truss.generator import generate_truss
+from fea.truss.truss import Truss
+
+
+def test_select_solver_small_model():
+    info = solver.select_solver(12, 144, 11, memory=1e9)
+    assert info['solver'] == 'dense'
+    assert info['storage'] == 'dense'
+    assert info['estimated_memory'] == 3 * 8 * 12**2
+
+
+def test_select_solver_large_model():
+    info = solver.select_solver(150000, 6000000, 30, memory=64e9)
+    assert info['storage'] == 'banded'
+
+    info = solver.select_solver(150000, 6000000, 20000, memory=64e9)
+    assert info['solver'] == 'iterative'
+
+
+def test_select_solver_memory_budget():
+    profile = dict(solver.DEFAULT_PROFILE, dense_flops=1e15)
+    info = solver.select_solver(20000, 800000, 600, profile=profile,
+                                memory=1e8)
+    assert info['solver'] != 'dense'
+    assert info['estimated_memory'] <= info['memory_budget']
+
+
+def test_select_solver_requested():
+    info = solver.select_solver(12, 144, 11, solver='iterative')
+    assert info['solver'] == 'iterative'
+    assert info['reason'] == 'requested'
+
+    with pytest.raises(ValueError):
+        solver.select_solver(12, 144, 11, solver='magic')
+
+
+def test_conjugate_gradient():
+    A = np.array([[4.0, 1.0], [1.0, 3.0]])
+    b = np.array([1.0, 2.0])
+    x, iterations = solver.conjugate_gradient(A.dot, b)
+    assert np.allclose(x, np.linalg.solve(A, b))
+    assert iterations <= 2
+
+    with pytest.raises(ArithmeticError):
+        solver.conjugate_gradient(A.dot, b, max_iterations=1)
+
+    # Warm started from the solution.
+    _, iterations = solver.conjugate_gradient(A.dot, b, x0=x)
+    assert iterations == 0
+
+
+@pytest.mark.parametrize(
+    'method',
+    ['banded', 'sparse', 'iterative', 'matrix-free']
+)
+def test_truss_solvers_agree(method):
+    truss = generate_truss(6, spatial=True)
+    dense = Truss(**truss, solver='dense')
+    dense.solve_truss()
+    other = Truss(**truss, solver=method)
+    other.solve_truss()
+
+    assert other.solver_info['solver'] == method
+    assert other.storage == solver.SOLVERS[method]
+    assert np.allclose(other.Q, dense.Q)
+    assert np.allclose(
+        [other.stresses[e] for e in other.stresses],
+        [dense.stresses[e] for e in dense.stresses],
+    )
+
+
+@pytest.mark.parametrize('preconditioner', ['jacobi', 'block-jacobi'])
+@pytest.mark.parametrize('spatial', [False, True])
+def test_matrix_free(preconditioner, spatial):
+    truss = generate_truss(30, spatial=spatial)
+    dense = Truss(**truss, solver='dense')
+    dense.solve_truss()
+    t = Truss(**truss, solver='matrix-free', preconditioner=preconditioner)
+    t.solve_truss()
+
+    assert t.K is None
+    np.testing.assert_allclose(t.Q, dense.Q, atol=1e-8 * np.abs(dense.Q).max())
+    np.testing.assert_allclose(t.reactions, dense.reactions, atol=1e-6)
+    assert t.solver_info['iterations'] > 0
+
+
+def test_block_preconditioner():
+    blocks = np.array([[[4.0, 1.0], [1.0, 3.0]], [[2.0, 0.5], [0.5, 1.0]]])
+    fixed = np.array([False, False, False, True])
+    precondition = solver.block_preconditioner(blocks, fixed)
+    r = np.array([1.0, 2.0, 3.0, 4.0])
+    np.testing.assert_allclose(
+        precondition(r),
+        np.concatenate([np.linalg.solve(blocks[0], r[:2]), [1.5, 4.0]])
+    )
+
+    jacobi = solver.block_preconditioner(blocks, fixed, 'jacobi')
+    np.testing.assert_allclose(jacobi(r), [0.25, 2 / 3, 1.5, 4.0])
+
+    with pytest.raises(ArithmeticError):
+        solver.block_preconditioner(np.zeros([1, 2, 2]), fixed[:2])
+
+
+def test_profile_round_trip(tmp_path):
+    path = str(tmp_path / 'profile.json')
+    assert solver.load_profile(path) == solver.DEFAULT_PROFILE
+
+    solver.save_profile(dict(solver.DEFAULT_PROFILE, dense_flops=1), path)
+    assert solver.load_profile(path)['dense_flops'] == 1
+
+
+def test_refine():
+    A = np.array([[4.0, 1.0], [1.0, 3.0]])
+    b = np.array([1.0, 2.0])
+    A_low = A.astype(np.float32)
+    x, steps = solver.refine(
+        lambda r: np.linalg.solve(A_low, r),
+        A.dot,
+        b,
+        np.abs(A).sum(axis=1).max(),
+    )
+    assert np.allclose(x, np.linalg.solve(A, b), rtol=1e-14)
+    assert steps >= 1
+
+
+@pytest.mark.parametrize(
+    'method',
+    ['dense', 'banded', 'sparse', 'iterative']
+)
+def test_truss_mixed_precision(method):
+    truss = generate_truss(20, spatial=True)
+    double = Truss(**truss, solver=method)
+    double.solve_truss()
+    mixed = Truss(**truss, solver=method, precision='mixed')
+    mixed.solve_truss()
+
+    assert mixed.K.dtype == np.float32
+    assert mixed.solver_info['precision'] == 'mixed'
+    error = np.abs(mixed.Q - double.Q).max() / np.abs(double.Q).max()
+    assert error < 1e-10
+
+
+def test_truss_mixed_precision_fallback():
+    truss = generate_truss(10)
+    for e in list(truss['mat_prop'])[1::2]:
+        truss['mat_prop'][e]['A'] = 1e-6
+    double = Truss(**truss, solver='dense')
+    double.solve_truss()
+    mixed = Truss(**truss, solver='dense', precision='mixed')
+    mixed.solve_truss()
+
+    assert mixed.K.dtype == np.float64
+    assert mixed.solver_info['precision'] == 'double'
+    assert 'precision_fallback' in mixed.solver_info
+    assert np.allclose(mixed.Q, double.Q)
@@ -0,0 +1,74 @@
+import threading
+
+import numpy as np
+import pytest
+from fea.truss.generator import generate_truss
+from fea.truss.store import ModelStore
+from fea.truss.truss import Truss
+
+
+def model(truss):
+    return {k: v for k, v in truss.items() if k != 'force_vector'}
+
+
+@pytest.mark.parametrize('solver', ['dense', 'banded', 'sparse'])
+def test_model_store(tmp_path, solver):
+    truss = generate_truss(5, spatial=True)
+    store = ModelStore(str(tmp_path))
+    id = store.register(**model(truss), solver=solver)
+
+    assert store.exists(id)
+    assert store.register(**model(truss)) == id
+    assert not store.exists('missing')
+
+    stored = ModelStore(str(tmp_path)).load(id)
+    assert stored.solver == solver
+    assert isinstance(stored.coords, np.memmap)
+
+    # Two load cases against the stored factorization.
+    reversed_loads = [
+        {**f, 'u2': -f['u2']} for f in truss['force_vector']
+    ]
+    results = stored.solve([truss['force_vector'], reversed_loads])
+
+    t = Truss(**truss, solver='dense')
+    expected = t.solve_truss()
+    assert np.allclose(results[0].displacements, expected.displacements)
+    assert np.allclose(results[0].stress_array, expected.stress_array)
+    assert np.allclose(results[1].stress_array, -expected.stress_array)
+    assert np.allclose(results[0].reaction_array, t.reactions)
+    assert np.isclose(results[0].strain_energy, t.strain_energy)
+    assert results[0].equilibrium_residual < 1e-10
+
+
+def test_model_store_load_missing(tmp_path):
+    store = ModelStore(str(tmp_path))
+    with pytest.raises(KeyError):
+        store.load('0123abcd')
+    with pytest.raises(KeyError):
+        store.load('../models')
+
+
+def test_model_store_concurrent_load(tmp_path):
+    store = ModelStore(str(tmp_path), cache_size=1)
+    ids = [
+        store.register(**model(generate_truss(n)), solver='sparse')
+        for n in (2, 3, 4)
+    ]
+    errors = []
+
+    # Concurrent loads evicting each other from the cache.
+    def load(id):
+        try:
+            for _ in range(50):
+                assert store.load(id).id == id
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=load, args=(id,)) for id in ids * 2]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+    assert len(store._cache) == 1
@@ -0,0 +1,164 @@
+import numpy as np
+import pytest
+from fea.truss.solver import SOLVERS
+from fea.truss.generator import generate_truss
+from fea.truss.substructure import Substructure, Superelement
+from fea.truss.truss import Truss
+
+# Two bay module, connected to its parent at its end verticals.
+module = generate_truss(2)
+substructure = Substructure(
+    module['mat_prop'],
+    module['nodal_coords'],
+    module['connectivity'],
+    ['n0', 'n1', 'n4', 'n5'],
+    [
+        {'node': 'n2', 'u1': False, 'u2': False, 'u3': True},
+        {'node': 'n3', 'u1': False, 'u2': False, 'u3': True},
+    ],
+)
+
+# Equivalent four bay girder, the shared vertical counted twice.
+full = generate_truss(4)
+full['mat_prop']['e8']['A'] *= 2
+
+
+def parent_truss(full):
+    nodes = ['n0', 'n1', 'n4', 'n5', 'n8', 'n9']
+    t = Truss(
+        {},
+        {n: full['nodal_coords'][n] for n in nodes},
+        {},
+        [f for f in full['force_vector'] if f['node'] == 'n4'],
+        [bc for bc in full['boundary_conditions'] if bc['node'] in nodes],
+    )
+    for id, offset in (('bay1', 0), ('bay2', 2000)):
+        t.add_superelement(Superelement(
+            id,
+            substructure,
+            {
+                'n0': f'n{offset // 500}',
+                'n1': f'n{offset // 500 + 1}',
+                'n4': f'n{offset // 500 + 4}',
+                'n5': f'n{offset // 500 + 5}',
+            },
+            translation=[offset, 0, 0],
+            force_vector=[
+                {'node': 'n2', 'u1': 0, 'u2': -1000, 'u3': 0},
+            ],
+        ))
+    return t
+
+
+def test_condense():
+    K = substructure.condense()
+    assert K.shape == (12, 12)
+    assert np.allclose(K, K.T)
+    assert substructure.condense() is K
+
+    # Interior loads are solved with the factor of the interior kept from
+    # the condensation.
+    interior = substructure.interior_dofs
+    forces = np.zeros(len(substructure.truss.nodes) * 3)
+    forces[interior[0]] = 1000
+    K_interior = substructure.truss.K[np.ix_(interior, interior)]
+    np.testing.assert_allclose(
+        substructure.interior_displacements(np.zeros(12), forces),
+        np.linalg.solve(K_interior, forces[interior]),
+    )
+
+
+def test_superelement_truss():
+    reference = Truss(**full)
+    reference.solve_truss()
+    t = parent_truss(full)
+    t.solve_truss()
+
+    for node in t.nodes:
+        assert np.allclose(
+            list(t.deformed_nodal_coords[node].values()),
+            list(reference.deformed_nodal_coords[node].values()),
+        )
+
+    results = t.superelements['bay2'].recover(t)
+    assert np.allclose(
+        list(results['deformed_nodal_coords']['n2'].values()),
+        list(reference.deformed_nodal_coords['n6'].values()),
+    )
+    # Module element e5 is the bottom chord e13 of the reference girder.
+    assert results['stresses']['e5'] == pytest.approx(
+        reference.stresses['e13']
+    )
+
+
+@pytest.mark.parametrize('solver', ['dense', 'sparse', 'matrix-free'])
+def test_superelement_solvers(solver):
+    reference = parent_truss(full)
+    reference.solve_truss()
+    t = parent_truss(full)
+    t.solver = solver
+    t.solve_truss()
+    assert t.storage == SOLVERS[solver]
+    assert np.allclose(t.Q, reference.Q)
+    assert len(t.superelements['bay1'].recover(t)['stresses']) == 9
+
+
+def test_superelement_placement():
+    t = parent_truss(full)
+    t.superelements['bay2'].translation = np.array([1000, 0, 0])
+
+    with pytest.raises(ValueError):
+        t.solve_truss()
+
+
+def test_superelement_rotation():
+    R = np.array([[0, -1, 0], [1, 0, 0], [0, 0, 1]])
+    rotated = Substructure(
+        module['mat_prop'],
+        {
+            n: dict(zip('xyz', R @ (c['x'], c['y'], c['z'])))
+            for n, c in module['nodal_coords'].items()
+        },
+        module['connectivity'],
+        substructure.boundary_nodes,
+        substructure.boundary_conditions,
+    )
+    s = Superelement(
+        'bay',
+        substructure,
+        {n: n for n in substructure.boundary_nodes},
+        rotation=R,
+    )
+    assert np.allclose(s.stiffness(), rotated.condense())
+
+
+def test_superelement_planar_nodes():
+    planar = Substructure(
+        module['mat_prop'],
+        {
+            n: {'x': c['x'], 'y': c['y']}
+            for n, c in module['nodal_coords'].items()
+        },
+        module['connectivity'],
+        substructure.boundary_nodes,
+        substructure.boundary_conditions,
+    )
+    s = Superelement(
+        'bay',
+        planar,
+        {n: n for n in planar.boundary_nodes},
+        translation=[1000, 0, 0],
+        force_vector=[{'node': 'n2', 'u1': 0, 'u2': -1000}],
+    )
+    n4 = module['nodal_coords']['n4']
+    assert s.placed_coords('n4').tolist() == [n4['x'] + 1000, n4['y'], 0]
+    assert np.allclose(s.loads(), Superelement(
+        'bay',
+        substructure,
+        {n: n for n in substructure.boundary_nodes},
+        force_vector=[{'node': 'n2', 'u1': 0, 'u2': -1000, 'u3': 0}],
+    ).loads())
+
+    # The stiffness in parent coordinates is transformed once.
+    assert np.allclose(s.stiffness(), substructure.condense())
+    assert s.stiffness() is s.stiffness()
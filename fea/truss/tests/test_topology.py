@@ -0,0 +1,116 @@
+import numpy as np
+import pytest
+from fea.truss.topology import TopologyOptimizer, ground_structure
+from fea.truss.truss import Truss
+
+
+def grid(nx, ny, spacing=1000):
+    return {
+        f'n{a}_{b}': {'x': a * spacing, 'y': b * spacing, 'z': 0}
+        for a in range(nx)
+        for b in range(ny)
+    }
+
+
+def cantilever(nx=7, ny=4, max_length=3000):
+    nodal_coords = grid(nx, ny)
+    mat_prop, connectivity = ground_structure(nodal_coords, max_length)
+    fixed = [f'n0_{b}' for b in range(ny)]
+    boundary_conditions = [
+        {'node': id, 'u1': id in fixed, 'u2': id in fixed, 'u3': True}
+        for id in nodal_coords
+    ]
+    force_vector = [
+        {'node': f'n{nx - 1}_{ny // 2}', 'u1': 0, 'u2': -1000, 'u3': 0}
+    ]
+    return Truss(
+        mat_prop,
+        nodal_coords,
+        connectivity,
+        force_vector,
+        boundary_conditions
+    )
+
+
+def test_ground_structure():
+    mat_prop, connectivity = ground_structure(grid(3, 3))
+
+    # All 36 pairs, less the 6 pairs spanning a row or column through the
+    # middle node and the 2 diagonals through the center.
+    assert len(connectivity) == 36 - 6 - 2
+    assert set(mat_prop) == set(connectivity)
+    pairs = {(c['i'], c['j']) for c in connectivity.values()}
+    assert ('n0_0', 'n0_2') not in pairs
+    assert ('n0_0', 'n1_2') in pairs
+
+    _, connectivity = ground_structure(grid(3, 3), max_length=1000)
+    assert len(connectivity) == 12
+
+    # Members in nearby directions are not collinear, with a length
+    # tolerance of 1 mm and planar nodes.
+    nodal_coords = {
+        'a': {'x': 0, 'y': 0},
+        'b': {'x': 600, 'y': 800},
+        'c': {'x': 1400, 'y': 1400},
+    }
+    _, connectivity = ground_structure(nodal_coords, tolerance=1.0)
+    pairs = {(c['i'], c['j']) for c in connectivity.values()}
+    assert pairs == {('a', 'b'), ('a', 'c'), ('b', 'c')}
+
+
+@pytest.mark.parametrize('method', ['iterative', 'sparse'])
+def test_topology_optimizer(method):
+    t = cantilever()
+    optimizer = TopologyOptimizer(t, volume_fraction=0.05, method=method)
+    history = optimizer.optimize(max_iterations=100)
+
+    assert history[-1]['compliance'] < 0.5 * history[0]['compliance']
+    assert np.isclose(history[-1]['volume'], optimizer.volume, rtol=1e-3)
+    assert history[-1]['members'] < len(t.connectivity) / 2
+    assert history[-1]['change'] < 1e-3
+
+    # The pruned structure behaves as the optimized ground structure. Nodes
+    # joining collinear members are mechanisms, which conjugate gradients
+    # tolerate.
+    pruned = Truss(**optimizer.to_truss(), solver='iterative')
+    pruned.solve_truss()
+    compliance = pruned.force_matrix().ravel() @ pruned.Q.ravel()
+    assert np.isclose(compliance, optimizer.compliance, rtol=1e-4)
+    assert len(pruned.connectivity) == history[-1]['members']
+
+
+def test_topology_optimizer_assembly():
+    optimizer = TopologyOptimizer(cantilever(4, 3, 1500))
+    optimizer.remove(np.arange(5))
+
+    # Reused pattern against a fresh assembly of the remaining members.
+    t = Truss(**optimizer.to_truss(), solver='dense')
+    t.create_nodes()
+    t.create_elements()
+    t.assemblage()
+    K, _, free = t.reduced_system()
+    K_pattern = optimizer.assemble().toarray()
+    index = [list(optimizer.truss.nodes).index(id) for id in t.nodes]
+    DOF = t.DOF
+    dofs = (DOF * np.array(index)[:, None] + np.arange(DOF)).ravel()
+    position = {dof: k for k, dof in enumerate(optimizer.free)}
+    reduced = [position[dof] for dof in dofs[free]]
+    np.testing.assert_allclose(
+        K_pattern[np.ix_(reduced, reduced)],
+        K,
+        rtol=1e-6,
+        atol=1e-6 * np.abs(K).max()
+    )
+
+
+def test_topology_optimizer_mat_prop_order():
+    t = cantilever(4, 3, 1500)
+    ids = list(t.connectivity)
+    t.mat_prop = {
+        id: {'E': 200000, 'A': 100 + k} for k, id in enumerate(ids)
+    }
+    t.mat_prop = dict(reversed(list(t.mat_prop.items())))
+
+    # Properties follow the connectivity, in any mat_prop order.
+    optimizer = TopologyOptimizer(t)
+    assert optimizer.A.tolist() == [100 + k for k in range(len(ids))]
@@ -1,4 +1,6 @@
 import numpy as np
+import pytest
+from fea.truss.generator import generate_truss
 from fea.truss.truss import Truss
 
 mat_prop = {
@@ -38,7 +40,8 @@ t = Truss(
     nodal_coords,
     connectivity,
     force_vector,
-    boundary_conditions
+    boundary_conditions,
+    planar=False
 )
 
 
@@ -161,3 +164,74 @@ def test_solve_truss():
         'node3': {'x': 50.0265, 'y': 50.0088, 'z': 0.0},
         'node4': {'x': 200.3479, 'y': 99.4400, 'z': 0.0}
     }
+
+
+def test_post_process():
+    truss = generate_truss(6)
+    truss['mat_prop']['e0']['Fy'] = 250
+    t = Truss(**truss)
+    results = t.solve_truss()
+
+    # Reactions balance the applied loads.
+    applied = np.zeros(3)
+    for f in truss['force_vector']:
+        applied += (f['u1'], f['u2'], f['u3'])
+    np.testing.assert_allclose(
+        t.reactions.sum(axis=0),
+        -applied[:t.DOF],
+        atol=1e-9 * np.abs(applied).max()
+    )
+    assert t.equilibrium_residual < 1e-12
+
+    # Clapeyron's theorem, the strain energy is half the work of the loads.
+    work = 0.5 * t.Q.ravel() @ t.force_matrix().ravel()
+    assert np.isclose(t.strain_energy, work)
+    assert np.isclose(results.strain_energy, work)
+
+    np.testing.assert_allclose(
+        t.axial_forces,
+        t.stress_array * np.array([p['A'] for p in t.mat_prop.values()])
+    )
+    assert results.utilization['e0'] == abs(t.stress_array[0]) / 250
+    assert np.isnan(results.utilization['e1'])
+
+    sparse = Truss(**truss, solver='sparse')
+    sparse.solve_truss()
+    np.testing.assert_allclose(sparse.reactions, t.reactions, atol=1e-6)
+
+
+def test_planar_truss():
+    truss = generate_truss(6)
+    planar = Truss(**truss)
+    spatial = Truss(**truss, planar=False)
+    planar.solve_truss()
+    spatial.solve_truss()
+
+    assert planar.planar and planar.DOF == 2
+    assert planar.Q.shape == (2 * len(planar.nodes), 1)
+    np.testing.assert_allclose(
+        planar.Q.reshape(-1, 2),
+        spatial.Q.reshape(-1, 3)[:, :2]
+    )
+    np.testing.assert_allclose(planar.stress_array, spatial.stress_array)
+    assert planar.deformed_nodal_coords == spatial.deformed_nodal_coords
+
+    # No out of plane constraints are needed.
+    boundary_conditions = [
+        {k: v for k, v in bc.items() if k != 'u3'}
+        for bc in truss['boundary_conditions']
+    ]
+    t = Truss(**{**truss, 'boundary_conditions': boundary_conditions})
+    t.solve_truss()
+    np.testing.assert_allclose(t.Q, planar.Q)
+
+    # Out of plane loads are solved in 3D, unless planar is forced.
+    out_of_plane = [{**truss['force_vector'][0], 'u3': 10}]
+    t = Truss(**{**truss, 'force_vector': out_of_plane})
+    assert not t.planar and t.DOF == 3
+    t = Truss(**{**truss, 'force_vector': out_of_plane}, planar=True)
+    with pytest.raises(ValueError):
+        t.solve_truss()
+
+    with pytest.raises(ValueError):
+        Truss(**generate_truss(2, spatial=True), planar=True)
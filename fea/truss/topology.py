@@ -0,0 +1,378 @@
+import logging
+import numpy as np
+from scipy import sparse
+from scipy.spatial import cKDTree
+
+from . import solver
+from .preprocess import coordinates
+
+log = logging.getLogger(__name__)
+
+
+def ground_structure(
+    nodal_coords,
+    max_length=None,
+    E=200000,
+    A=100,
+    tolerance=1e-6,
+    angle=1e-6
+):
+    """
+    Generate the members of a ground structure between candidate nodes.
+
+    Every pair of nodes closer than max_length, or every pair if None, is
+    connected, except members overlapping a shorter collinear member that
+    starts at the same node. Members shorter than tolerance are left out,
+    and members are collinear if their directions agree within angle, in
+    radians. Returns the mat_prop and connectivity dictionaries for Truss.
+    """
+    ids = list(nodal_coords)
+    coords = coordinates(nodal_coords)
+
+    if max_length is None:
+        i, j = np.triu_indices(len(ids), 1)
+    else:
+        pairs = sorted(cKDTree(coords).query_pairs(max_length))
+        pairs = np.array(pairs, dtype=np.int64).reshape(-1, 2)
+        i, j = pairs[:, 0], pairs[:, 1]
+
+    d = coords[j] - coords[i]
+    L = np.linalg.norm(d, axis=1)
+    keep = L > tolerance
+    i, j, d, L = i[keep], j[keep], d[keep], L[keep]
+
+    # A member is kept if it is the shortest one leaving each of its nodes
+    # in its direction.
+    direction = np.round(d / L[:, None] / angle).astype(np.int64)
+    shortest = np.ones(len(i), dtype=bool)
+    for node, sign in ((i, 1), (j, -1)):
+        keys = np.column_stack([node, sign * direction])
+        _, group = np.unique(keys, axis=0, return_inverse=True)
+        group = group.ravel()
+        order = np.lexsort((L, group))
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = group[order][1:] != group[order][:-1]
+        shortest[order[~first]] = False
+
+    log.info(f'Generated ground structure with {shortest.sum()} members.')
+    mat_prop = {}
+    connectivity = {}
+    for k, (a, b) in enumerate(zip(i[shortest], j[shortest])):
+        id = f'g{k}'
+        connectivity[id] = {'i': ids[a], 'j': ids[b]}
+        mat_prop[id] = {'E': E, 'A': A}
+
+    return mat_prop, connectivity
+
+
+class TopologyOptimizer():
+    """
+    TopologyOptimizer class, minimize the compliance of a ground structure
+    for a given volume of material by optimality criteria updates of the
+    member areas.
+
+    The area of each member is x * A, with A its area in mat_prop, and its
+    stiffness is proportional to x ** penalty (SIMP). The sparsity pattern
+    of the reduced stiffness matrix is computed once, and each iteration
+    only recomputes its values. Members reaching x_min are removed from the
+    assembly buffers.
+
+    ...
+
+    Attributes
+    ----------
+    truss : Truss
+        Truss holding the ground structure, loads and boundary conditions.
+    volume_fraction : float
+        Volume of material as a fraction of the volume of the ground
+        structure at full area.
+    penalty : float
+        SIMP penalty on the stiffness, 1 for a truss sizing problem.
+    x_min : float
+        Smallest relative area, members below it are removed.
+    move : float
+        Largest change of relative area per iteration.
+    damping : float
+        Exponent of the optimality criteria update.
+    prune : bool
+        Whether to remove vanishing members.
+    method : str
+        'iterative' for conjugate gradients warm started from the previous
+        iteration, or 'sparse' for the sparse direct solver.
+    tol : float
+        Relative residual of the conjugate gradient solves.
+    x : ndarray
+        Relative area of each member, 0 once removed.
+    active : ndarray
+        Whether each member is still part of the structure.
+    compliance : float
+        Work of the loads on the current design.
+    history : list
+        Compliance, volume and number of members of each iteration.
+
+    Methods
+    -------
+    assemble()
+    analyse()
+    update(strain_energy)
+    remove(members)
+    optimize(max_iterations, tol)
+    areas()
+    to_truss()
+
+    """
+
+    def __init__(
+        self,
+        truss,
+        volume_fraction=0.1,
+        penalty=1,
+        x_min=1e-4,
+        move=0.2,
+        damping=0.5,
+        prune=True,
+        method='iterative',
+        tol=1e-8
+    ):
+        self.truss = truss
+        self.volume_fraction = volume_fraction
+        self.penalty = penalty
+        self.x_min = x_min
+        self.move = move
+        self.damping = damping
+        self.prune = prune
+        self.method = method
+        self.tol = tol
+        self.compliance = None
+        self._q = None
+        self.history = []
+
+        t = truss
+        DOF = t.DOF
+        t.create_nodes()
+        index = {id: node.index for id, node in t.nodes.items()}
+        self.i = np.array(
+            [index[c['i']] for c in t.connectivity.values()], dtype=np.int64
+        )
+        self.j = np.array(
+            [index[c['j']] for c in t.connectivity.values()], dtype=np.int64
+        )
+        self.E = np.array(
+            [t.mat_prop[id]['E'] for id in t.connectivity], dtype=float
+        )
+        self.A = np.array(
+            [t.mat_prop[id]['A'] for id in t.connectivity], dtype=float
+        )
+
+        d = t.coords[self.j] - t.coords[self.i]
+        self.L = np.linalg.norm(d, axis=1)
+        self.C = d[:, :DOF] / self.L[:, None]
+
+        n_members = len(self.L)
+        self.x = np.full(n_members, float(volume_fraction))
+        self.active = np.ones(n_members, dtype=bool)
+        self.volume = volume_fraction * (self.A * self.L).sum()
+
+        self.forces = t.force_matrix().ravel()
+        size = len(t.nodes) * DOF
+        self.free = np.setdiff1d(np.arange(size), t.constrained_dofs())
+        self._pattern(size)
+
+    def _pattern(self, size):
+        log.info('Computing the sparsity pattern of the ground structure.')
+        DOF = self.truss.DOF
+        n_free = len(self.free)
+        position = np.full(size, -1, dtype=np.int64)
+        position[self.free] = np.arange(n_free)
+
+        dofs = np.concatenate([
+            DOF*self.i[:, None] + np.arange(DOF),
+            DOF*self.j[:, None] + np.arange(DOF),
+        ], axis=1)
+        dofs = position[dofs]
+        k = dofs.shape[1]
+        rows = np.repeat(dofs, k, axis=1).ravel()
+        cols = np.tile(dofs, k).ravel()
+
+        # Element stiffness per unit E*A/L, outer product of [-C, C].
+        c = np.concatenate([-self.C, self.C], axis=1)
+        values = (c[:, :, None] * c[:, None, :]).ravel()
+
+        valid = (rows >= 0) & (cols >= 0)
+        keys, slot = np.unique(
+            rows[valid] * n_free + cols[valid],
+            return_inverse=True,
+        )
+        self._element = np.repeat(np.arange(len(self.L)), k*k)[valid]
+        self._values = values[valid]
+        self._slot = slot.ravel()
+
+        self._structure(keys)
+
+    def _structure(self, keys):
+        # CSR index arrays of the reduced stiffness matrix from the sorted
+        # row major keys row * n + col of its nonzeros.
+        n = len(self.free)
+        self._keys = keys
+        self._indices = keys % n
+        self._indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(keys // n, minlength=n), out=self._indptr[1:])
+        self._diagonal = np.searchsorted(keys, np.arange(n) * (n + 1))
+        self._data = np.zeros(len(keys))
+
+    def stiffness(self):
+        return self.E * self.A * self.x**self.penalty / self.L
+
+    def assemble(self):
+        data = self._data
+        data[:] = np.bincount(
+            self._slot,
+            self.stiffness()[self._element] * self._values,
+            minlength=len(data),
+        )
+        # Keeps nodes left without members, and mechanisms formed by
+        # removed members, from making the system singular.
+        diagonal = data[self._diagonal]
+        data[self._diagonal] += 1e-9 * diagonal.max(initial=0)
+        n = len(self.free)
+        return sparse.csr_matrix(
+            (data, self._indices, self._indptr),
+            shape=(n, n),
+        )
+
+    def analyse(self):
+        K = self.assemble()
+        F = self.forces[self.free]
+        if self.method == 'iterative':
+            # Warm started from the displacements of the previous design.
+            diagonal = K.diagonal()
+            try:
+                self._q, iterations = solver.conjugate_gradient(
+                    K.dot,
+                    F,
+                    precondition=lambda r: r / diagonal,
+                    tol=self.tol,
+                    x0=self._q,
+                )
+                log.debug(f'Conjugate gradient took {iterations} iterations.')
+            except ArithmeticError as e:
+                log.warning(f'{e} Falling back to the sparse direct solver.')
+                self.method = 'sparse'
+        if self.method != 'iterative':
+            self._q = solver.solve(K, F[:, None], self.method).ravel()
+
+        Q = np.zeros_like(self.forces)
+        Q[self.free] = self._q
+        self.compliance = float(self.forces @ Q)
+
+        q = Q.reshape(-1, self.truss.DOF)
+        elongation = np.einsum('ed,ed->e', self.C, q[self.j] - q[self.i])
+        return 0.5 * self.stiffness() * elongation**2
+
+    def update(self, strain_energy):
+        active = self.active
+        x = self.x[active]
+        # -dC/dx over dV/dx, per unit Lagrange multiplier.
+        sensitivity = (
+            2 * self.penalty * strain_energy[active] / x
+            / (self.A[active] * self.L[active])
+        )
+        lower = np.maximum(self.x_min, x - self.move)
+        upper = np.minimum(1, x + self.move)
+        volume = self.A[active] * self.L[active]
+
+        # Bisection on the Lagrange multiplier of the volume constraint.
+        low, high = 0, max(sensitivity.max(initial=0), 1e-300)
+        while (high - low) > 1e-12 * high:
+            multiplier = 0.5 * (low + high)
+            x_new = np.clip(
+                x * (sensitivity / multiplier)**self.damping,
+                lower,
+                upper,
+            )
+            if volume @ x_new > self.volume:
+                low = multiplier
+            else:
+                high = multiplier
+
+        change = np.abs(x_new - x).max(initial=0)
+        self.x[active] = x_new
+        return change
+
+    def remove(self, members):
+        log.debug(f'Removing {len(members)} vanishing members.')
+        self.active[members] = False
+        self.x[members] = 0
+        keep = self.active[self._element]
+        self._element = self._element[keep]
+        self._values = self._values[keep]
+
+        # Drop the nonzeros no member contributes to any more, keeping the
+        # diagonal.
+        used = np.zeros(len(self._keys), dtype=bool)
+        used[self._slot[keep]] = True
+        used[self._diagonal] = True
+        self._slot = (np.cumsum(used) - 1)[self._slot[keep]]
+        self._structure(self._keys[used])
+
+    def optimize(self, max_iterations=100, tol=1e-4):
+        log.info('Optimizing the ground structure.')
+        for iteration in range(1, max_iterations + 1):
+            strain_energy = self.analyse()
+            change = self.update(strain_energy)
+            if self.prune:
+                vanishing = self.active & (self.x <= self.x_min)
+                if vanishing.any():
+                    self.remove(np.flatnonzero(vanishing))
+
+            self.history.append({
+                'iteration': iteration,
+                'compliance': self.compliance,
+                'volume': float((self.x * self.A * self.L).sum()),
+                'members': int(self.active.sum()),
+                'change': float(change),
+            })
+            log.debug(f'Topology iteration {self.history[-1]}.')
+            if change < tol:
+                break
+
+        self.analyse()
+        log.info(
+            f'Topology optimization finished after {iteration} iterations '
+            f'with {self.active.sum()} members.'
+        )
+        return self.history
+
+    def areas(self):
+        ids = list(self.truss.connectivity)
+        return {
+            ids[e]: float(self.x[e] * self.A[e])
+            for e in np.flatnonzero(self.active)
+        }
+
+    def to_truss(self):
+        """
+        Keyword arguments for a Truss of the optimized structure, without
+        the removed members and the nodes they leave unconnected. Nodes
+        joining two collinear members remain, and are unstable across them.
+        """
+        t = self.truss
+        areas = self.areas()
+        connectivity = {id: t.connectivity[id] for id in areas}
+        mat_prop = {
+            id: {**t.mat_prop[id], 'A': A} for id, A in areas.items()
+        }
+        used = {n for c in connectivity.values() for n in (c['i'], c['j'])}
+        return {
+            'mat_prop': mat_prop,
+            'nodal_coords': {
+                id: c for id, c in t.nodal_coords.items() if id in used
+            },
+            'connectivity': connectivity,
+            'force_vector': [
+                f for f in t.force_vector if f['node'] in used
+            ],
+            'boundary_conditions': [
+                bc for bc in t.boundary_conditions if bc['node'] in used
+            ],
+        }
@@ -1,12 +1,23 @@
 import logging
-from copy import deepcopy
 import numpy as np
+from scipy import sparse
 from .node import Node
 from .element import Element
+from .results import ArrayView, TrussResults
+from . import assembly, banded, solver
 
 log = logging.getLogger(__name__)
 
 
+def is_planar(nodal_coords, force_vector=()):
+    """
+    Whether every node lies in the same plane z = constant, and no force in
+    force_vector acts out of it.
+    """
+    z = {node.get('z', 0) for node in nodal_coords.values()}
+    return len(z) <= 1 and not any(f.get('u3') for f in force_vector)
+
+
 class Truss():
     """
     Truss class, represent simplified model of a truss structure.
@@ -18,13 +29,14 @@ class Truss():
     ----------
     mat_prop : dict
         Material property dictionary.
-        Young's modulus, and cross-sectional area.
-        {'ele_id' : {'E': ..., 'A': ...}, ...}
+        Young's modulus, cross-sectional area, and optionally the allowable
+        stress.
+        {'ele_id' : {'E': ..., 'A': ..., 'Fy': ...}, ...}
     nodal_coords : dict
         Dictionary representing the coordinates of each node.
         {'node_id': {'x': ..., 'y': ..., 'z': ...}, ...}
-    deformed_nodal_coords : dict
-        Dictionary representing the deformed coordinates of each node.
+    deformed_nodal_coords : Mapping
+        View of the deformed coordinates of each node, once solved.
         {'node_id': {'x': ..., 'y': ..., 'z': ...}, ...}
     connectivity : dict
         Dictionary representing the 2 nodes associated with each element.
@@ -35,26 +47,96 @@ class Truss():
     boundary_conditions : list
         List of dict representing the boundary condition constraints.
         [{'node': ..., 'u1': ..., 'u2': ..., 'u3': ...}, ...]
-    K : ndarray
-        Stiffness matrix for the truss.
+    solver : str
+        Solver to use, 'auto', 'dense', 'banded', 'sparse', 'iterative' or
+        'matrix-free'.
+    preconditioner : str
+        Preconditioner of the matrix-free conjugate gradients, 'jacobi' or
+        'block-jacobi'.
+    profile : dict
+        Solver profile used for automatic solver selection.
+    workers : int
+        Number of threads used to assemble the stiffness matrix.
+    planar : bool
+        Whether the truss is solved in the x-y plane with 2 degrees of
+        freedom per node. Selected automatically when every node has the
+        same z coordinate and there are no superelements.
+    DOF : int
+        Degrees of freedom per node, 2 for planar trusses and 3 otherwise.
+    precision : str
+        'double', or 'mixed' to assemble and factor the stiffness matrix in
+        single precision and refine the displacements to double precision.
+    dtype : type
+        Floating point type of the stiffness matrix.
+    solver_info : dict
+        Description of the selected solver and storage format.
+    storage : str
+        Storage format of the stiffness matrix, 'dense', 'banded' or
+        'sparse', or 'elements' if it is not assembled.
+    K : ndarray or scipy.sparse.csr_matrix
+        Stiffness matrix for the truss. With banded storage, the upper band
+        of the reduced stiffness matrix in LAPACK banded storage, with the
+        equations in reverse Cuthill-McKee order.
     Q : ndarray
         Displacement matrix for the truss.
     nodes : dict
         A dictionary containing the nodes.
     elements : dict
         A dictionary containing the elements.
-    stresses: dict
-        Dictionary representing the stresses in the truss.
+    superelements : dict
+        A dictionary containing the condensed substructure instances.
+    coords : ndarray
+        (n_nodes, 3) array of the nodal coordinates.
+    stress_array : ndarray
+        Axial stress of each element, in element index order.
+    stresses: Mapping
+        View of the stresses in the truss.
+        {'ele_id': ..., ...}
+    reactions : ndarray
+        (n_nodes, DOF) support reactions, zero at unconstrained degrees of
+        freedom.
+    axial_forces : ndarray
+        Axial force of each element, tension positive.
+    element_energy : ndarray
+        Strain energy stored in each element.
+    strain_energy : float
+        Total strain energy of the truss.
+    utilization : ndarray
+        Ratio of the absolute stress to the allowable stress Fy of each
+        element, NaN for elements without an allowable stress.
+    equilibrium_residual : float
+        Norm of the out of balance force at the free degrees of freedom,
+        relative to the norm of the applied load.
+    results : TrussResults
+        Array backed results of the solved truss.
 
     Methods
     -------
+    add_superelement(superelement)
     create_nodes()
     create_elements()
+    assembly_blocks()
+    superelement_blocks()
+    element_pairs()
+    coupled_pairs()
+    node_order()
+    element_table()
+    stiffness_matvec(x)
+    matrix_stats()
+    select_solver()
     assemblage()
-    displacement()
+    banded_assemblage()
+    constrained_dofs()
+    band_dofs()
+    force_matrix()
+    reduced_system()
+    refine(K_reduced, forces_reduced, free, method)
+    matrix_free_displacement()
+    displacement(solve)
     stress()
+    post_process()
     calculate_deformed_nodal_coords()
-    solve_truss()
+    solve_truss(solve)
 
     """
 
@@ -64,22 +146,67 @@ class Truss():
         nodal_coords,
         connectivity,
         force_vector,
-        boundary_conditions
+        boundary_conditions,
+        solver='auto',
+        profile=None,
+        workers=1,
+        precision='double',
+        planar=None,
+        preconditioner='block-jacobi'
     ):
         log.info('Initializing truss solver.')
-        # A truss structure have 3 degrees of freedom.
-        self.DOF = 3
+        # A truss structure have 3 degrees of freedom, 2 in the plane.
+        self._auto_planar = planar is None
+        if planar is None:
+            planar = is_planar(nodal_coords, force_vector)
+        self.planar = planar
+        if self.planar and not is_planar(nodal_coords):
+            raise ValueError('Planar truss nodes must share a z coordinate.')
+        self.DOF = 2 if self.planar else 3
         self.mat_prop = mat_prop
         self.nodal_coords = nodal_coords
-        self.deformed_nodal_coords = deepcopy(nodal_coords)
+        self.deformed_nodal_coords = {}
         self.connectivity = connectivity
         self.force_vector = force_vector
         self.boundary_conditions = boundary_conditions
+        self.solver = solver
+        self.profile = profile
+        self.workers = workers
+        if precision not in ('double', 'mixed'):
+            raise ValueError(f'Unknown precision: {precision}')
+        self.precision = precision
+        if preconditioner not in ('jacobi', 'block-jacobi'):
+            raise ValueError(f'Unknown preconditioner: {preconditioner}')
+        self.preconditioner = preconditioner
+        # Mixed precision assembles and factors in single precision.
+        self.dtype = np.float32 if precision == 'mixed' else np.float64
+        self.solver_info = {}
+        self.storage = 'dense'
         self.K = np.zeros([])
         self.Q = np.zeros([])
+        self.coords = np.zeros([0, 3])
         self.nodes = {}
         self.elements = {}
+        self.superelements = {}
+        self._node_order = None
+        self.stress_array = np.zeros([0])
         self.stresses = {}
+        self.reactions = None
+        self.axial_forces = None
+        self.element_energy = None
+        self.strain_energy = None
+        self.utilization = None
+        self.equilibrium_residual = None
+        self.results = None
+
+    def add_superelement(self, superelement):
+        if self.planar:
+            if not self._auto_planar:
+                raise ValueError('Superelements require a spatial truss.')
+            log.info('Solving the truss in 3D for its superelements.')
+            self.planar = False
+            self.DOF = 3
+        self.superelements[superelement.id] = superelement
 
     def create_nodes(self):
         log.info('Instantiating truss nodes.')
@@ -89,8 +216,11 @@ class Truss():
                 index,
                 node['x'],
                 node['y'],
-                node['z']
+                node.get('z', 0)
             )
+        self.coords = np.array([
+            (n.x, n.y, n.z) for n in self.nodes.values()
+        ], dtype=float).reshape(-1, 3)
 
     def create_elements(self):
         log.info('Instantiating truss elements.')
@@ -100,81 +230,171 @@ class Truss():
                 index,
                 self.nodes[ele['i']],
                 self.nodes[ele['j']],
-                self.mat_prop[id]
+                self.mat_prop[id],
+                self.DOF
             )
             self.elements[id].stiffness()
 
+        for superelement in self.superelements.values():
+            superelement.check_placement(self.nodes)
+
+    def assembly_blocks(self):
+        DOF = self.DOF
+        dofs = np.empty([len(self.elements), 2*DOF], dtype=np.int64)
+        blocks = np.empty([len(self.elements), 2*DOF, 2*DOF])
+        for ele in self.elements.values():
+            dofs[ele.index, :DOF] = DOF*ele.nodei.index + np.arange(DOF)
+            dofs[ele.index, DOF:] = DOF*ele.nodej.index + np.arange(DOF)
+            blocks[ele.index] = ele.K
+
+        return dofs, blocks
+
+    def superelement_blocks(self):
+        return [
+            (s.dofs(self.nodes, self.DOF), s.stiffness())
+            for s in self.superelements.values()
+        ]
+
+    def element_pairs(self):
+        return np.array([
+            (ele.nodei.index, ele.nodej.index)
+            for ele in self.elements.values()
+        ], dtype=np.int64).reshape(-1, 2)
+
+    def element_table(self):
+        DOF = self.DOF
+        n = len(self.elements)
+        i = np.empty(n, dtype=np.int64)
+        j = np.empty(n, dtype=np.int64)
+        k = np.empty(n)
+        E = np.empty(n)
+        A = np.empty(n)
+        L = np.empty(n)
+        Fy = np.empty(n)
+        C = np.empty([n, DOF])
+        for ele in self.elements.values():
+            i[ele.index] = ele.nodei.index
+            j[ele.index] = ele.nodej.index
+            k[ele.index] = ele.E * ele.A / ele.L
+            E[ele.index] = ele.E
+            A[ele.index] = ele.A
+            L[ele.index] = ele.L
+            Fy[ele.index] = np.nan if ele.Fy is None else ele.Fy
+            C[ele.index] = (ele.Cx, ele.Cy, ele.Cz)[:DOF]
+
+        return {
+            'i': i, 'j': j, 'k': k, 'C': C, 'E': E, 'A': A, 'L': L, 'Fy': Fy
+        }
+
+    def stiffness_matvec(self, x, table=None):
+        table = table or self.element_table()
+        y = assembly.axial_matvec(
+            x.reshape(-1, self.DOF),
+            table['i'],
+            table['j'],
+            table['k'],
+            table['C'],
+        ).ravel()
+        for dofs, block in self.superelement_blocks():
+            y[dofs] += block @ x[dofs]
+        return y
+
+    def coupled_pairs(self):
+        DOF = self.DOF
+        pairs = [self.element_pairs()]
+        for s in self.superelements.values():
+            # A superelement couples all of its boundary nodes.
+            nodes = s.dofs(self.nodes, DOF)[::DOF] // DOF
+            i, j = np.triu_indices(len(nodes), 1)
+            pairs.append(np.stack([nodes[i], nodes[j]], axis=1))
+        return np.concatenate(pairs)
+
+    def node_order(self):
+        if self._node_order is None:
+            self._node_order = banded.node_order(
+                self.coupled_pairs(),
+                len(self.nodes)
+            )
+        return self._node_order
+
+    def matrix_stats(self):
+        return banded.matrix_stats(
+            self.coupled_pairs(),
+            len(self.nodes),
+            self.DOF,
+            self.node_order(),
+        )
+
+    def select_solver(self):
+        log.info('Selecting solver.')
+        n_dof, nnz, bandwidth = self.matrix_stats()
+        self.solver_info = solver.select_solver(
+            n_dof,
+            nnz,
+            bandwidth,
+            solver=self.solver,
+            profile=self.profile,
+            itemsize=np.dtype(self.dtype).itemsize,
+        )
+        self.storage = self.solver_info['storage']
+
     def assemblage(self):
         log.info('Calculating assemblage stiffness matrix.')
         DOF = self.DOF
         size = len(self.nodes) * DOF
 
+        if self.storage == 'sparse':
+            groups = [self.assembly_blocks()] + [
+                (dofs[None], block[None])
+                for dofs, block in self.superelement_blocks()
+            ]
+            rows = np.concatenate([
+                np.repeat(dofs, dofs.shape[1], axis=1).ravel()
+                for dofs, blocks in groups
+            ])
+            cols = np.concatenate([
+                np.tile(dofs, dofs.shape[1]).ravel()
+                for dofs, blocks in groups
+            ])
+            data = np.concatenate([blocks.ravel() for dofs, blocks in groups])
+            self.K = sparse.csr_matrix(
+                (data, (rows, cols)),
+                shape=(size, size),
+                dtype=self.dtype
+            )
+            log.info('Finished calculating assemblage stiffness matrix.')
+            return
+
+        if self.storage == 'banded':
+            self.K = self.banded_assemblage()
+            log.info('Finished calculating assemblage stiffness matrix.')
+            return
+
+        if self.storage == 'elements':
+            log.info('Matrix-free solver, the stiffness matrix is not formed.')
+            self.K = None
+            return
+
         # Initialize assemblage matrix to zeros
-        assemblage = np.zeros([size, size])
+        assemblage = np.zeros([size, size], dtype=self.dtype)
 
         # Add each element's stiffness matrix to the assemblage matrix
-        for ele in self.elements.values():
-            nodei_index = ele.nodei.index
-            nodej_index = ele.nodej.index
-
-            # Quadrant 1
-            # row: [ix, iy, iz], col: [ix, iy, iz]
-            for j in range(0, DOF):
-                for k in range(0, DOF):
-                    assemblage[
-                        DOF*nodei_index + j,
-                        DOF*nodei_index + k
-                    ] = assemblage[
-                        DOF*nodei_index + j,
-                        DOF*nodei_index + k
-                    ] + ele.K[j, k]
-
-            # Quadrant 2
-            # row:[ix, iy, iz], col:[jx, jy, jz]
-            for j in range(0, DOF):
-                for k in range(0, DOF):
-                    assemblage[
-                        DOF*nodei_index + j,
-                        DOF*nodej_index + k
-                    ] = assemblage[
-                        DOF*nodei_index + j,
-                        DOF*nodej_index + k
-                    ] + ele.K[j, k + DOF]
-
-            # Quadrant 3
-            # row:[jx, jy, jz], col:[ix, iy, iz]
-            for j in range(0, DOF):
-                for k in range(0, DOF):
-                    assemblage[
-                        DOF*nodej_index + j,
-                        DOF*nodei_index + k
-                    ] = assemblage[
-                        DOF*nodej_index + j,
-                        DOF*nodei_index + k
-                    ] + ele.K[j + DOF, k]
-
-            # Quadrant 4
-            # row:[jx, jy, jz], col:[jx, jy, jz]
-            for j in range(0, DOF):
-                for k in range(0, DOF):
-                    assemblage[
-                        DOF*nodej_index + j,
-                        DOF*nodej_index + k
-                    ] = assemblage[
-                        DOF*nodej_index + j,
-                        DOF*nodej_index + k
-                    ] + ele.K[j + DOF, k + DOF]
+        dofs, blocks = self.assembly_blocks()
+        assembly.scatter_add(
+            assemblage,
+            dofs,
+            blocks,
+            workers=self.workers,
+            pairs=self.element_pairs(),
+        )
+        for dofs, block in self.superelement_blocks():
+            assembly.scatter_add(assemblage, dofs[None], block[None])
 
         log.info('Finished calculating assemblage stiffness matrix.')
         self.K = assemblage
 
-    def displacement(self):
-        log.info('Calculating displacement of each node.')
+    def constrained_dofs(self):
         DOF = self.DOF
-        size = len(self.nodes) * DOF
-
-        # Find indices to remove from the assemblage matrix
-        log.info('Reducing the matrices based on the boundary conditions.')
         constraints = []
         for bc in self.boundary_conditions:
             node_index = self.nodes[bc['node']].index
@@ -182,91 +402,264 @@ class Truss():
                 constraints.append(DOF*node_index + 0)
             if bc['u2']:
                 constraints.append(DOF*node_index + 1)
-            if bc['u3']:
+            if DOF == 3 and bc.get('u3'):
                 constraints.append(DOF*node_index + 2)
+        return constraints
 
-        # Constructing the force matrix
+    def band_dofs(self):
+        # Unconstrained degrees of freedom in banded equation order.
+        DOF = self.DOF
+        order = (DOF*self.node_order()[:, None] + np.arange(DOF)).ravel()
+        return order[~np.isin(order, self.constrained_dofs())]
+
+    def banded_assemblage(self):
+        log.info('Assembling the upper band of the reduced stiffness matrix.')
+        size = len(self.nodes) * self.DOF
+        free = self.band_dofs()
+
+        # Equation number of each degree of freedom, -1 if constrained.
+        position = np.full(size, -1, dtype=np.int64)
+        position[free] = np.arange(len(free))
+
+        dofs, blocks = self.assembly_blocks()
+        superelements = self.superelement_blocks()
+        b = max(
+            [banded.bandwidth(position[dofs])] +
+            [banded.bandwidth(position[d][None]) for d, _ in superelements]
+        )
+
+        ab = np.zeros([b + 1, len(free)], dtype=self.dtype)
+        assembly.scatter_add(
+            ab,
+            position[dofs],
+            blocks,
+            workers=self.workers,
+            pairs=self.element_pairs(),
+            band=b,
+        )
+        for d, block in superelements:
+            assembly.scatter_add(ab, position[d][None], block[None], band=b)
+
+        self.solver_info['band'] = b
+        return ab
+
+    def force_matrix(self):
         log.info('Constructing the force matrix.')
-        forces = np.zeros([size, 1])
+        DOF = self.DOF
+        forces = np.zeros([len(self.nodes) * DOF, 1])
         for f in self.force_vector:
             node_index = self.nodes[f['node']].index
             forces[DOF*node_index + 0] += f['u1']
             forces[DOF*node_index + 1] += f['u2']
-            forces[DOF*node_index + 2] += f['u3']
+            if DOF == 3:
+                forces[DOF*node_index + 2] += f.get('u3', 0)
+            elif f.get('u3'):
+                raise ValueError(
+                    f'Out of plane force on node {f["node"]} of a planar '
+                    'truss, solve it with planar=False.'
+                )
+        for s in self.superelements.values():
+            forces[s.dofs(self.nodes, DOF), 0] += s.loads()
+        return forces
+
+    def reduced_system(self):
+        DOF = self.DOF
+        size = len(self.nodes) * DOF
 
-        K_reduced = np.delete(self.K, constraints, axis=0)
-        K_reduced = np.delete(K_reduced, constraints, axis=1)
-        forces_reduced = np.delete(forces, constraints, axis=0)
+        # Find indices to remove from the assemblage matrix
+        log.info('Reducing the matrices based on the boundary conditions.')
+        constraints = self.constrained_dofs()
+        forces = self.force_matrix()
+
+        # Degrees of freedom left after applying the boundary conditions
+        free = np.setdiff1d(np.arange(size), constraints)
+
+        if self.storage == 'banded':
+            # Assembled directly as the reduced system.
+            free = self.band_dofs()
+            K_reduced = self.K
+        elif self.storage == 'sparse':
+            K_reduced = self.K[free][:, free]
+        else:
+            K_reduced = np.delete(self.K, constraints, axis=0)
+            K_reduced = np.delete(K_reduced, constraints, axis=1)
+
+        return K_reduced, forces[free], free
+
+    def refine(self, K_reduced, forces_reduced, free, method):
+        log.info('Solving the linear system in mixed precision.')
+        size = len(self.nodes) * self.DOF
+        table = self.element_table()
+
+        def matvec(x):
+            full = np.zeros(size)
+            full[free] = x
+            return self.stiffness_matvec(full, table)[free]
+
+        Q, steps = solver.refine(
+            solver.factorize(K_reduced, method),
+            matvec,
+            forces_reduced.ravel(),
+            solver.norm_inf(K_reduced, method),
+        )
+        log.info(f'Iterative refinement converged in {steps} steps.')
+        self.solver_info['refinement_steps'] = steps
+        return Q.reshape(-1, 1)
 
-        # Solve the reduced linear system
-        log.info('Solving the linear system.')
-        Q_zero = np.zeros([size, 1])
-        Q = np.linalg.solve(K_reduced, forces_reduced)
+    def matrix_free_displacement(self):
+        log.info('Solving with element by element conjugate gradients.')
+        DOF = self.DOF
+        n = len(self.nodes)
+        table = self.element_table()
+        fixed = np.zeros(n * DOF, dtype=bool)
+        fixed[self.constrained_dofs()] = True
 
-        # Reconstruct displacement vector back to original size
-        log.info('Reconstructing the displacement vector.')
-        total_dof_index = np.linspace(
-            0,
-            size - 1,
-            num=size,
-            dtype=int
+        blocks = assembly.nodal_blocks(
+            table['i'], table['j'], table['k'], table['C'], n
         )
-        dof_index_without_constraints = np.setdiff1d(
-            total_dof_index,
-            constraints
+        for dofs, block in self.superelement_blocks():
+            for m, dof in enumerate(dofs[::DOF]):
+                local = slice(m * DOF, (m + 1) * DOF)
+                blocks[dof // DOF] += block[local, local]
+        precondition = solver.block_preconditioner(
+            blocks, fixed, self.preconditioner
         )
 
-        for i in range(0, len(Q)):
-            Q_zero[dof_index_without_constraints[i]] = Q[i]
+        # Boundary conditions by masking, fixed degrees of freedom are
+        # identity equations with no load.
+        def matvec(x):
+            y = self.stiffness_matvec(np.where(fixed, 0, x), table)
+            y[fixed] = x[fixed]
+            return y
+
+        forces = self.force_matrix().ravel()
+        forces[fixed] = 0
+        Q, iterations = solver.conjugate_gradient(
+            matvec, forces, precondition=precondition
+        )
+        log.info(f'Conjugate gradient converged in {iterations} iterations.')
+        self.solver_info['iterations'] = iterations
+        self.solver_info['precision'] = 'double'
+        self.Q = Q.reshape(-1, 1)
+
+    def displacement(self, solve=None):
+        """
+        solve, if given, solves the reduced system K Q = F in place of the
+        dense solver.
+        """
+        log.info('Calculating displacement of each node.')
+        if self.storage == 'elements':
+            return self.matrix_free_displacement()
+
+        size = len(self.nodes) * self.DOF
+        K_reduced, forces_reduced, free = self.reduced_system()
+        method = self.solver_info.get('solver', self.storage)
+
+        if self.dtype == np.float32:
+            try:
+                Q = self.refine(K_reduced, forces_reduced, free, method)
+            except (ArithmeticError, np.linalg.LinAlgError) as e:
+                log.warning(f'{e} Falling back to double precision.')
+                self.solver_info['precision_fallback'] = str(e)
+                self.dtype = np.float64
+                self.assemblage()
+                K_reduced, forces_reduced, free = self.reduced_system()
+
+        if self.dtype == np.float64:
+            # Solve the reduced linear system
+            log.info('Solving the linear system.')
+            try:
+                if solve is not None and method == 'dense':
+                    Q = solve(K_reduced, forces_reduced)
+                else:
+                    Q = solver.solve(K_reduced, forces_reduced, method)
+            except ArithmeticError as e:
+                log.warning(f'{e} Falling back to the sparse direct solver.')
+                self.solver_info['fallback'] = 'sparse'
+                Q = solver.solve(K_reduced, forces_reduced, 'sparse')
+
+        self.solver_info['precision'] = (
+            'mixed' if self.dtype == np.float32 else 'double'
+        )
+
+        # Reconstruct displacement vector back to original size
+        log.info('Reconstructing the displacement vector.')
+        Q_zero = np.zeros([size, 1])
+        Q_zero[free] = Q
 
         self.Q = Q_zero
 
     def stress(self):
-        DOF = self.DOF
         log.info('Computing axial stress for each element.')
-        for e in self.elements:
-            ele = self.elements[e]
+        table = self.element_table()
+        q = self.Q.reshape(-1, self.DOF)
 
-            # Displacements in Global Coordinates
-            qix = self.Q[ele.nodei.index*DOF + 0][0]
-            qiy = self.Q[ele.nodei.index*DOF + 1][0]
-            qiz = self.Q[ele.nodei.index*DOF + 2][0]
-            qjx = self.Q[ele.nodej.index*DOF + 0][0]
-            qjy = self.Q[ele.nodej.index*DOF + 1][0]
-            qjz = self.Q[ele.nodej.index*DOF + 2][0]
+        # Displacements in Local Coordinates
+        qi_local = (q[table['i']] * table['C']).sum(axis=1)
+        qj_local = (q[table['j']] * table['C']).sum(axis=1)
 
-            # Displacements in Local Coordinates
-            qi_local = qix*ele.Cx + qiy*ele.Cy + qiz*ele.Cz
-            qj_local = qjx*ele.Cx + qjy*ele.Cy + qjz*ele.Cz
+        # Local element stress
+        self.stress_array = table['E'] * (qj_local - qi_local) / table['L']
+        self.stresses = ArrayView(list(self.elements), self.stress_array)
 
-            # Local element stress
-            self.stresses[e] = ele.E * (qj_local - qi_local) / ele.L
+    def post_process(self):
+        log.info('Computing reactions, member forces and strain energy.')
+        DOF = self.DOF
+        table = self.element_table()
+        forces = self.force_matrix().ravel()
+        Q = self.Q.ravel()
+
+        # Element by element product, K is never formed as a dense matrix.
+        unbalanced = self.stiffness_matvec(Q, table) - forces
+
+        constraints = self.constrained_dofs()
+        reactions = np.zeros_like(unbalanced)
+        reactions[constraints] = unbalanced[constraints]
+        self.reactions = reactions.reshape(-1, DOF)
+
+        # Out of balance force at the free degrees of freedom, relative to
+        # the applied load.
+        unbalanced[constraints] = 0
+        residual = np.linalg.norm(unbalanced)
+        load = np.linalg.norm(forces)
+        self.equilibrium_residual = float(
+            residual / load if load else residual
+        )
+
+        self.axial_forces = self.stress_array * table['A']
+        # N^2 L / 2EA
+        self.element_energy = (
+            0.5 * self.axial_forces * self.stress_array
+            * table['L'] / table['E']
+        )
+        self.strain_energy = float(self.element_energy.sum())
+        self.utilization = np.abs(self.stress_array) / table['Fy']
 
     def calculate_deformed_nodal_coords(self):
-        DOF = self.DOF
         log.info('Calculating the deformed nodal coordinates.')
-        for q in range(0, int(len(self.Q) / DOF)):
-            qx = self.Q[q*DOF + 0][0]
-            qy = self.Q[q*DOF + 1][0]
-            qz = self.Q[q*DOF + 2][0]
-
-            # TODO: Revisit this index mapping.
-            node_id_map = {
-                self.nodes[node].index:
-                    self.nodes[node].id for node in self.nodes
-            }
-
-            node_id = node_id_map[q]
-            self.deformed_nodal_coords[node_id]['x'] += qx
-            self.deformed_nodal_coords[node_id]['y'] += qy
-            self.deformed_nodal_coords[node_id]['z'] += qz
-
-    def solve_truss(self):
+        self.results = TrussResults(
+            list(self.nodes),
+            list(self.elements),
+            self.coords,
+            self.Q,
+            self.stress_array,
+            reactions=self.reactions,
+            axial_forces=self.axial_forces,
+            element_energy=self.element_energy,
+            utilization=self.utilization,
+            equilibrium_residual=self.equilibrium_residual,
+        )
+        self.deformed_nodal_coords = self.results.deformed_nodal_coords
+        self.stresses = self.results.stresses
+
+    def solve_truss(self, solve=None):
         log.info('Solving truss.')
         self.create_nodes()
         self.create_elements()
+        self.select_solver()
         self.assemblage()
-        self.displacement()
+        self.displacement(solve)
         self.stress()
+        self.post_process()
         self.calculate_deformed_nodal_coords()
-        return self
+        return self.results